@@ -0,0 +1,152 @@
+"""Author field index: normalized name keys -> docs.
+
+Author names also go into the general postings, where "Smith J" is just the
+stemmed words "smith" and "j". Here every name in a record's ``authors`` list
+becomes a key ``surname|initials`` (lowercase, diacritics folded), so
+"Smith, Jane A.", "Jane A. Smith" and "J. Smith" give ``smith|ja`` and
+``smith|j``. Keys are kept sorted, so an exact key or any key prefix is found
+with bisect. A lookup for "Smith J" is the prefix ``smith|j``, which matches
+both spellings. "smith" alone matches every initial, and ``smi*`` is a raw
+prefix over surnames.
+"""
+import re, unicodedata
+from bisect import bisect_left
+from typing import Dict, List
+
+PARTICLES = {'van', 'von', 'der', 'den', 'de', 'del', 'della', 'da', 'di', 'du', 'la', 'le', 'st'}
+TITLES = {'dr', 'prof', 'professor', 'mr', 'mrs', 'ms', 'miss', 'sir', 'dame'}
+DEGREES = {'phd', 'dphil', 'md', 'mba', 'msc', 'ma', 'bsc', 'ba', 'llm', 'jd', 'frs', 'cpa', 'cfa',
+           'jr', 'sr', 'ii', 'iii', 'iv'}
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip diacritics and apostrophes, and collapse everything else to single spaces."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower().replace("'", '')
+    return _NON_ALNUM_RE.sub(' ', text).strip()
+
+
+def _is_initials(token: str) -> bool:
+    """'J', 'JA', 'J.A.' -- but not the short names 'Li', 'Ng', 'Wu'."""
+    letters = token.replace('.', '')
+    return 0 < len(letters) <= 3 and ('.' in token or letters.isupper())
+
+
+def _plain(token: str) -> str:
+    return token.replace('.', '').strip(',').lower()
+
+
+def _strip_titles(toks: List[str], min_left: int) -> List[str]:
+    """Drop leading titles ('Dr') and trailing degrees ('PhD', 'Jr'). A degree that could be
+    initials ('MA' in 'Smith MA') is only dropped while more than two tokens remain."""
+    while len(toks) > min_left and _plain(toks[0]) in TITLES:
+        toks = toks[1:]
+    while (len(toks) > min_left and _plain(toks[-1]) in DEGREES
+           and (len(toks) > 2 or not _is_initials(toks[-1]))):
+        toks = toks[:-1]
+    return toks
+
+
+def author_key(name: str) -> str:
+    """'Smith, Jane A.' / 'Dr Jane A. Smith' / 'Smith JA' -> 'smith|ja'; '' for names with no letters."""
+    parts = [p.strip() for p in name.split(',')]
+    while len(parts) > 1 and all(_plain(t) in DEGREES for t in parts[-1].split()):  # "Jane Smith, PhD"
+        parts.pop()
+    if len(parts) > 1:
+        surname = parts[0]
+        given = ' '.join(_strip_titles(' '.join(parts[1:]).split(), 0))
+    else:
+        toks = _strip_titles(parts[0].split(), 1)
+        if len(toks) > 1 and not _is_initials(toks[0]) and all(_is_initials(t) for t in toks[1:]):
+            surname, given = toks[0], ' '.join(toks[1:])          # "Smith J", "Smith JA"
+        else:
+            cut = len(toks) - 1
+            while cut > 1 and toks[cut - 1].lower() in PARTICLES:  # "Ludwig van Beethoven"
+                cut -= 1
+            surname, given = ' '.join(toks[cut:]), ' '.join(toks[:cut])
+    surname = fold(surname)
+    if not surname:
+        return ''
+    given_toks = fold(given.replace('.', ' ')).split()
+    if len(given_toks) == 1 and len(given_toks[0]) <= 3 and given.replace('.', '').strip().isupper():
+        initials = given_toks[0]  # "JA" written as initials
+    else:
+        initials = ''.join(t[0] for t in given_toks)
+    return f'{surname}|{initials}'
+
+
+def build_author_index(docs: Dict[str, dict]) -> dict:
+    """Sorted keys with a CSR of doc rows (positions in ``docs`` order), stored in index.json."""
+    rows_of: Dict[str, List[int]] = {}
+    names: Dict[str, str] = {}
+    for row, rec in enumerate(docs.values()):
+        for a in rec.get('authors', []):
+            key = author_key(a.get('name') or '')
+            if not key:
+                continue
+            rows = rows_of.setdefault(key, [])
+            if not rows or rows[-1] != row:
+                rows.append(row)
+            names.setdefault(key, a['name'].strip())
+    keys = sorted(rows_of)
+    ptr, rows = [0], []
+    for key in keys:
+        rows.extend(rows_of[key])
+        ptr.append(len(rows))
+    return {'keys': keys, 'names': [names[k] for k in keys], 'ptr': ptr, 'rows': rows}
+
+
+class AuthorIndex:
+    def __init__(self, meta: dict):
+        cols = meta.get('author_index') or build_author_index(meta['docs'])  # indexes built before it existed
+        self.keys: List[str] = cols['keys']
+        self.names: List[str] = cols['names']
+        self.ptr: List[int] = cols['ptr']
+        self.rows: List[int] = cols['rows']
+        self.doc_ids: List[str] = list(meta['docs'])
+
+    @classmethod
+    def from_arrays(cls, keys, names, ptr, rows, num_docs: int) -> 'AuthorIndex':
+        """Sequences that already are arrays / string tables (shared_index); doc ids are then row numbers."""
+        self = cls.__new__(cls)
+        self.keys, self.names, self.ptr, self.rows = keys, names, ptr, rows
+        self.doc_ids = range(num_docs)
+        return self
+
+    def _span(self, prefix: str):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\uffff', lo)
+        return lo, hi
+
+    def matching_keys(self, query: str, exact: bool = False) -> List[int]:
+        """Positions of keys matching ``query`` ('Smith J', 'smith', 'smi*')."""
+        if query.endswith('*'):
+            lo, hi = self._span(fold(query[:-1]))
+        else:
+            key = author_key(query)
+            if not key:
+                return []
+            if exact:
+                lo = bisect_left(self.keys, key)
+                return [lo] if lo < len(self.keys) and self.keys[lo] == key else []
+            lo, hi = self._span(key)
+        return list(range(lo, hi))
+
+    def lookup(self, query: str, exact: bool = False) -> List[str]:
+        """Doc ids of papers by any author matching ``query``, in index order."""
+        rows = set()
+        for k in self.matching_keys(query, exact):
+            rows.update(self.rows[self.ptr[k]:self.ptr[k + 1]])
+        return [self.doc_ids[r] for r in sorted(rows)]
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        """Display names for the first ``limit`` keys matching ``query`` (for autocompletion)."""
+        return [self.names[k] for k in self.matching_keys(query)[:limit]]
+
+
+def author_index(meta: dict) -> AuthorIndex:
+    """Built once per loaded index and kept on ``meta``."""
+    cached = meta.get('_author_index')
+    if cached is None:
+        cached = meta['_author_index'] = AuthorIndex(meta)
+    return cached
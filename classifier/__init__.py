@@ -1,24 +1,16 @@
-import joblib
-from pathlib import Path
-
-MODEL_DIR = Path("models")
-MODEL_PATH = MODEL_DIR / "news_clf.joblib"
-
-# Ensure models folder exists (useful if you plan to save later)
-MODEL_DIR.mkdir(parents=True, exist_ok=True)
-
-_model = None
+# Importing the package stays cheap: joblib/sklearn/numpy load on the first prediction,
+# and models/ is created by train_classifier when a model is saved.
+from .registry import MODEL_DIR, MODEL_PATH, get_pipeline
 
 def load_model():
-    global _model
-    if _model is None:
-        if not MODEL_PATH.exists():
-            raise FileNotFoundError(f"Model file not found: {MODEL_PATH.resolve()}")
-        payload = joblib.load(MODEL_PATH)
-        _model = payload["pipeline"]
-    return _model
+    return get_pipeline()
 
 def classify(text: str) -> str:
     """Classify a single text document into one of the trained categories."""
     model = load_model()
     return model.predict([text])[0]
+
+def classify_many(texts, batch_size: int = 512, n_jobs: int = 1):
+    """Classify many documents in vectorized chunks; see classifier.predict.classify_many."""
+    from .predict import classify_many as _classify_many
+    return _classify_many(texts, batch_size=batch_size, n_jobs=n_jobs)
@@ -0,0 +1,284 @@
+# compact.py  (run as: python -m classifier.compact ...)
+"""
+Compact, memory-mappable export of the trained TF-IDF + linear classifier.
+
+The joblib payload pickles the whole sklearn Pipeline, including a vocabulary
+dict with up to ~120k n-gram keys, so every process pays a slow unpickle and
+keeps its own copy. The compact format stores:
+
+  manifest.json        labels, analyzer settings, model type
+  vocab_hash.npy       sorted 64-bit hashes of the vocabulary terms
+  vocab_col.npy        feature column for each hash
+  vocab_offsets.npy    byte offsets into vocab_strings.bin (collision check)
+  vocab_strings.bin    the terms, UTF-8, in hash order
+  idf.npy              idf weights
+  coef.npy             (n_features, n_classes) weights, row per feature
+  intercept.npy        per-class bias
+
+Arrays are opened with ``mmap_mode="r"``, so cold start is a handful of
+file opens and the pages are shared by every process on the machine.
+CompactClassifier mirrors sklearn's arithmetic (float32 tf-idf, float64
+sequential dot products) and predicts the same labels as the pipeline.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from classifier.registry import MODEL_PATH, compact_dir_for
+
+COMPACT_DIR = compact_dir_for(MODEL_PATH)
+FORMAT_VERSION = 1
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _strip_accents_unicode(s: str) -> str:
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def _strip_accents_ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+# ---------------- Export ----------------
+def export_compact(pipeline, labels: List[str], out_dir=COMPACT_DIR, source_path=MODEL_PATH,
+                   meta: Optional[Dict] = None) -> Path:
+    """Write ``pipeline`` (TfidfVectorizer + NB/LR/LinearSVC) in the compact format."""
+    vec = pipeline.named_steps["tfidf"]
+    clf = pipeline.named_steps["clf"]
+    if vec.analyzer != "word" or vec.preprocessor is not None or callable(vec.strip_accents):
+        raise ValueError("Compact export supports word analyzers with built-in preprocessing only.")
+
+    if vec.tokenizer is None:
+        tokenizer = {"kind": "regex", "pattern": vec.token_pattern}
+    elif type(vec.tokenizer).__name__ == "LemmaTokenizer":
+        tok = vec.tokenizer
+        tokenizer = {"kind": "lemma", "lowercase": tok.lowercase, "remove_stops": tok.remove_stops,
+                     "keep_alpha": tok.keep_alpha}
+    else:
+        raise ValueError(f"Unsupported tokenizer: {type(vec.tokenizer).__name__}")
+
+    if hasattr(clf, "feature_log_prob_"):
+        model_type, weights, bias = "nb", clf.feature_log_prob_, clf.class_log_prior_
+    else:
+        model_type, weights, bias = "linear", clf.coef_, clf.intercept_
+
+    terms = list(vec.vocabulary_)
+    hashes = np.array([_term_hash(t) for t in terms], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    sorted_hashes = hashes[order]
+    if len(sorted_hashes) and np.any(sorted_hashes[1:] == sorted_hashes[:-1]):
+        raise ValueError("64-bit hash collision in vocabulary; compact export not possible.")
+    encoded = [terms[i].encode("utf-8") for i in order]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    np.save(out / "vocab_hash.npy", sorted_hashes)
+    np.save(out / "vocab_col.npy", np.array([vec.vocabulary_[terms[i]] for i in order], dtype=np.int32))
+    np.save(out / "vocab_offsets.npy", offsets)
+    (out / "vocab_strings.bin").write_bytes(b"".join(encoded))
+    np.save(out / "idf.npy", np.asarray(vec.idf_))
+    np.save(out / "coef.npy", np.ascontiguousarray(np.asarray(weights, dtype=np.float64).T))
+    np.save(out / "intercept.npy", np.asarray(bias, dtype=np.float64))
+
+    source = Path(source_path)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "labels": list(labels),
+        "classes": [str(c) for c in clf.classes_],
+        "model_type": model_type,
+        "n_features": len(terms),
+        "analyzer": {
+            "lowercase": bool(vec.lowercase),
+            "strip_accents": vec.strip_accents,
+            "tokenizer": tokenizer,
+            "stop_words": sorted(vec.get_stop_words() or []),
+            "ngram_range": list(vec.ngram_range),
+        },
+        "sublinear_tf": bool(vec.sublinear_tf),
+        "use_idf": bool(vec.use_idf),
+        "norm": vec.norm,
+        "dtype": np.dtype(vec.dtype).name,
+        "source": {"path": str(source), "mtime": source.stat().st_mtime, "size": source.stat().st_size}
+                  if source.exists() else None,
+        "meta": meta or {},
+    }
+    with open(out / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return out
+
+
+# ---------------- Predictor ----------------
+class CompactClassifier:
+    """Pure-NumPy predictor over a compact export; ``predict`` matches the sklearn pipeline."""
+
+    def __init__(self, model_dir=COMPACT_DIR):
+        d = Path(model_dir)
+        with open(d / "manifest.json", "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format: {self.manifest.get('format_version')}")
+        self.labels = self.manifest["labels"]
+        self.classes_ = np.array(self.manifest["classes"])
+        self._hashes = np.load(d / "vocab_hash.npy", mmap_mode="r")
+        self._cols = np.load(d / "vocab_col.npy", mmap_mode="r")
+        self._offsets = np.load(d / "vocab_offsets.npy", mmap_mode="r")
+        self._strings = np.memmap(d / "vocab_strings.bin", dtype=np.uint8, mode="r") \
+            if os.path.getsize(d / "vocab_strings.bin") else np.zeros(0, dtype=np.uint8)
+        self._idf = np.load(d / "idf.npy", mmap_mode="r")
+        self._coef = np.load(d / "coef.npy", mmap_mode="r")
+        self._intercept = np.load(d / "intercept.npy")
+        self._dtype = np.dtype(self.manifest["dtype"])
+        self._binary = self.manifest["model_type"] == "linear" and self._coef.shape[1] == 1
+        self._analyze = self._build_analyzer(self.manifest["analyzer"])
+
+    @staticmethod
+    def _build_analyzer(cfg: Dict):
+        lowercase = cfg["lowercase"]
+        strip = {"unicode": _strip_accents_unicode, "ascii": _strip_accents_ascii}.get(cfg["strip_accents"])
+        tok_cfg = cfg["tokenizer"]
+        if tok_cfg["kind"] == "regex":
+            pattern = re.compile(tok_cfg["pattern"])
+            if pattern.groups > 1:
+                raise ValueError("token_pattern may contain at most one capturing group")
+            tokenize = pattern.findall
+        else:
+            from classifier.text import LemmaTokenizer
+            tokenize = LemmaTokenizer(tok_cfg["lowercase"], tok_cfg["remove_stops"], tok_cfg["keep_alpha"])
+        stop_words = frozenset(cfg["stop_words"]) or None
+        min_n, max_n = cfg["ngram_range"]
+
+        def analyze(doc: str) -> List[str]:
+            if lowercase:
+                doc = doc.lower()
+            if strip is not None:
+                doc = strip(doc)
+            tokens = tokenize(doc)
+            if stop_words is not None:
+                tokens = [w for w in tokens if w not in stop_words]
+            if max_n == 1:
+                return tokens
+            original = tokens
+            grams = list(original) if min_n == 1 else []
+            for n in range(max(min_n, 2), min(max_n + 1, len(original) + 1)):
+                for i in range(len(original) - n + 1):
+                    grams.append(" ".join(original[i:i + n]))
+            return grams
+        return analyze
+
+    def _lookup(self, terms: List[str]) -> np.ndarray:
+        if not terms or not len(self._hashes):
+            return np.zeros(0, dtype=np.int64)
+        hashes = np.fromiter((_term_hash(t) for t in terms), dtype=np.uint64, count=len(terms))
+        pos = np.searchsorted(self._hashes, hashes)
+        pos[pos == len(self._hashes)] = 0
+        hit = np.nonzero(self._hashes[pos] == hashes)[0]
+        cols = []
+        for i in hit:
+            p = pos[i]
+            if bytes(self._strings[self._offsets[p]:self._offsets[p + 1]]) == terms[i].encode("utf-8"):
+                cols.append(self._cols[p])
+        return np.asarray(cols, dtype=np.int64)
+
+    def _features(self, doc: str):
+        cols, counts = np.unique(self._lookup(self._analyze(doc)), return_counts=True)
+        data = counts.astype(self._dtype)
+        if self.manifest["sublinear_tf"]:
+            np.log(data, data)
+            data += 1.0
+        if self.manifest["use_idf"]:
+            data *= self._idf[cols]
+        if self.manifest["norm"] == "l2" and len(data):
+            norm = math.sqrt(sum((data * data).tolist()))  # sequential double sum, as sklearn's kernel
+            if norm != 0.0:
+                data = (data.astype(np.float64) / norm).astype(self._dtype)
+        elif self.manifest["norm"] == "l1" and len(data):
+            norm = sum(np.abs(data).tolist())
+            if norm != 0.0:
+                data = (data.astype(np.float64) / norm).astype(self._dtype)
+        return cols, data
+
+    def decision_function(self, texts: Iterable[str]) -> np.ndarray:
+        rows = []
+        for doc in texts:
+            cols, data = self._features(doc)
+            if len(cols):
+                # cumsum accumulates in column order, like scipy's CSR x dense kernel
+                dot = np.cumsum(self._coef[cols] * data.astype(np.float64)[:, None], axis=0)[-1]
+            else:
+                dot = np.zeros(self._coef.shape[1])
+            rows.append(dot + self._intercept)
+        return np.vstack(rows) if rows else np.zeros((0, self._coef.shape[1]))
+
+    def predict(self, texts: Iterable[str]) -> np.ndarray:
+        scores = self.decision_function(texts)
+        if self._binary:
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def compact_is_current(model_dir=COMPACT_DIR, source_path=MODEL_PATH) -> bool:
+    """True when a compact export exists and was made from the current joblib file (or that file is gone)."""
+    manifest_path = Path(model_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    source = Path(source_path)
+    if not source.exists():
+        return True
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        recorded = json.load(f).get("source") or {}
+    st = source.stat()
+    return recorded.get("mtime") == st.st_mtime and recorded.get("size") == st.st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or check the compact classifier artifact.")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model", default=str(MODEL_PATH))
+    parser.add_argument("--out", default=str(COMPACT_DIR))
+    args = parser.parse_args()
+
+    import joblib
+    t0 = time.perf_counter()
+    payload = joblib.load(args.model)  # always the full pipeline here, never the compact stand-in
+    joblib_load_s = time.perf_counter() - t0
+    if args.command == "export":
+        out = export_compact(payload["pipeline"], payload["labels"], args.out, args.model, payload.get("meta"))
+        print(f"[saved] {out.resolve()}")
+        return
+
+    from classifier.train_classifier import load_dataset
+    t0 = time.perf_counter()
+    compact = CompactClassifier(args.out)
+    compact_load_s = time.perf_counter() - t0
+    texts, _ = load_dataset()
+    expected = payload["pipeline"].predict(texts)
+    t0 = time.perf_counter()
+    got = compact.predict(texts)
+    predict_s = time.perf_counter() - t0
+    mismatches = int(np.sum(expected != got))
+    print(f"load: joblib {joblib_load_s * 1000:.1f} ms, compact {compact_load_s * 1000:.1f} ms")
+    print(f"predictions: {len(texts)} docs, {mismatches} mismatches, {len(texts) / max(predict_s, 1e-9):.0f} docs/sec")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# feature_cache.py
+"""
+Tokenization and per-fold TF-IDF cache for train_classifier.
+
+A sweep over nb/lr/svm used to re-tokenize every document and refit the
+TfidfVectorizer for each algorithm and each CV fold. Tokenization depends only
+on the vectorizer's preprocessing/tokenizer settings, and a fold's TF-IDF
+matrices only on the vectorizer settings and the split, never on the
+classifier. So both are computed once, stored under models/feature_cache/
+keyed by a hash of the data and those settings, and shared by every
+algorithm and fold. Each fold's vectorizer is still fitted on that fold's
+training part only, so CV scores are unchanged.
+"""
+import hashlib
+import json
+import os
+import warnings
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from classifier.registry import MODEL_DIR
+from classifier.text import pretokenize
+
+CACHE_DIR = MODEL_DIR / "feature_cache"
+
+
+def data_hash(texts: Sequence[str], labels: Sequence[str] = None) -> str:
+    h = hashlib.sha256()
+    for t in texts:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    for label in labels if labels is not None else ():
+        h.update(str(label).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def tokenizer_params(vec) -> Dict:
+    """Everything that decides what ``preprocess -> tokenize`` returns for a document."""
+    tok = vec.tokenizer
+    if tok is None:
+        tok_desc = {"token_pattern": vec.token_pattern}
+    elif hasattr(tok, "cache_key"):
+        tok_desc = tok.cache_key()
+    else:
+        tok_desc = {"type": type(tok).__qualname__, **vars(tok)}
+    return {"lowercase": vec.lowercase, "strip_accents": vec.strip_accents, "tokenizer": tok_desc}
+
+
+def vectorizer_params(vec) -> Dict:
+    """Everything that decides the fitted vocabulary and the TF-IDF values."""
+    return {
+        **tokenizer_params(vec),
+        "stop_words": vec.stop_words if isinstance(vec.stop_words, str) else sorted(vec.stop_words or []),
+        "ngram_range": list(vec.ngram_range),
+        "min_df": vec.min_df, "max_df": vec.max_df, "max_features": vec.max_features,
+        "binary": vec.binary, "norm": vec.norm, "use_idf": vec.use_idf,
+        "smooth_idf": vec.smooth_idf, "sublinear_tf": vec.sublinear_tf,
+        "dtype": np.dtype(vec.dtype).name,
+    }
+
+
+@contextmanager
+def _pretokenized(vec):
+    """Let ``vec`` consume token lists: only stop-word filtering and n-gram generation run."""
+    analyzer = vec.analyzer
+    vec.analyzer = partial(vec._word_ngrams, stop_words=vec.get_stop_words())
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # "token_pattern/ngram_range will not be used"
+            yield vec
+    finally:
+        vec.analyzer = analyzer
+
+
+def _save_npz(path: Path, matrix):
+    tmp = path.with_name(path.stem + ".tmp.npz")
+    sparse.save_npz(tmp, matrix, compressed=False)
+    os.replace(tmp, path)
+
+
+def score_fold(clf, X_tr, y_tr, X_te, y_te) -> Tuple[float, float]:
+    """Fit ``clf`` on one fold's cached matrices; returns (macro-F1, accuracy) on the fold's test part."""
+    y_hat = clf.fit(X_tr, y_tr).predict(X_te)
+    return f1_score(y_te, y_hat, average="macro"), accuracy_score(y_te, y_hat)
+
+
+class FeatureCache:
+    """Token lists and fold matrices, memoized in memory and (when enabled) on disk."""
+
+    def __init__(self, cache_dir=CACHE_DIR, enabled: bool = True, n_jobs: int = 1):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.n_jobs = n_jobs  # processes used to tokenize cache misses
+        self._tokens: Dict[str, Dict[str, List[str]]] = {}
+        self._folds: Dict[str, list] = {}
+        self._fitted: Dict[str, tuple] = {}
+        if enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------- tokens ----------
+    def tokens(self, vec, texts: Sequence[str]) -> List[List[str]]:
+        tkey = _key(tokenizer_params(vec))
+        table = self._tokens.setdefault(tkey, {})
+        missing = [t for t in dict.fromkeys(texts) if t not in table]
+        if missing:
+            path = self.cache_dir / f"tokens-{_key(tkey, data_hash(missing))}.joblib"
+            if self.enabled and path.exists():
+                docs = joblib.load(path)
+                print(f"[cache] tokens: {len(docs)} docs from {path.name}")
+            else:
+                docs = pretokenize(missing, vec.build_tokenizer(), vec.build_preprocessor(), n_jobs=self.n_jobs)
+                if self.enabled:
+                    tmp = path.with_name(path.name + ".tmp")
+                    joblib.dump(docs, tmp)
+                    os.replace(tmp, path)
+                print(f"[cache] tokens: tokenized {len(docs)} docs")
+            table.update(zip(missing, docs))
+        return [table[t] for t in texts]
+
+    def transform(self, vec, texts: Sequence[str]):
+        with _pretokenized(vec):
+            return vec.transform(self.tokens(vec, texts))
+
+    # ---------- CV folds ----------
+    def cv_folds(self, vec, X: Sequence[str], y: Sequence[str], folds: int, random_state: int) -> list:
+        """[(X_train, y_train, X_test, y_test)] per StratifiedKFold split, with a vectorizer fitted per fold."""
+        key = _key(vectorizer_params(vec), data_hash(X, y), folds, random_state)
+        if key in self._folds:
+            return self._folds[key]
+        y = np.asarray(y)
+        fold_dir = self.cache_dir / f"folds-{key}"
+        skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+        docs, out, built = None, [], 0
+        for i, (tr, te) in enumerate(skf.split(np.zeros(len(y)), y)):
+            tr_path, te_path = fold_dir / f"fold{i}_train.npz", fold_dir / f"fold{i}_test.npz"
+            if self.enabled and tr_path.exists() and te_path.exists():
+                X_tr, X_te = sparse.load_npz(tr_path), sparse.load_npz(te_path)
+            else:
+                if docs is None:
+                    docs = self.tokens(vec, X)
+                fold_vec = clone(vec)
+                with _pretokenized(fold_vec):
+                    X_tr = fold_vec.fit_transform([docs[j] for j in tr])
+                    X_te = fold_vec.transform([docs[j] for j in te])
+                if self.enabled:
+                    fold_dir.mkdir(parents=True, exist_ok=True)
+                    _save_npz(tr_path, X_tr)
+                    _save_npz(te_path, X_te)
+                built += 1
+            out.append((X_tr, y[tr], X_te, y[te]))
+        print(f"[cache] cv folds: {folds - built} reused, {built} vectorized")
+        self._folds[key] = out
+        return out
+
+    # ---------- final fit ----------
+    def fit_pipeline(self, pipe: Pipeline, X: Sequence[str], y: Sequence[str]) -> Pipeline:
+        """Same result as ``pipe.fit(X, y)``; the vectorizer is fitted once per settings and shared."""
+        vec = pipe.named_steps["tfidf"]
+        key = _key(vectorizer_params(vec), data_hash(X))
+        if key not in self._fitted:
+            fitted = clone(vec)
+            with _pretokenized(fitted):
+                matrix = fitted.fit_transform(self.tokens(fitted, X))
+            self._fitted[key] = (fitted, matrix)
+        fitted, matrix = self._fitted[key]
+        clf = pipe.named_steps["clf"]
+        clf.fit(matrix, y)
+        return Pipeline([("tfidf", fitted), ("clf", clf)])
+
+    def predict(self, pipe: Pipeline, X: Sequence[str]):
+        return pipe.named_steps["clf"].predict(self.transform(pipe.named_steps["tfidf"], X))
@@ -1,37 +1,24 @@
-# predict.py
+# predict.py  (run as: python -m classifier.predict ...)
 import argparse
-import joblib
-from pathlib import Path
-from typing import Tuple, List
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Tuple
 
-# Define the path to the trained model.
-MODEL_DIR = Path("models")
-MODEL_PATH = MODEL_DIR / "news_clf.joblib"
+from classifier.registry import MODEL_PATH, get_pipeline, load_payload
 
-# Use a global variable to cache the loaded model and labels.
-# This prevents the model from being reloaded from disk on every prediction call.
-_model_cache = None
+DEFAULT_BATCH_SIZE = 512
+# Below this many documents a process pool costs more (spawn + model load) than it saves.
+PARALLEL_MIN_DOCS = 5_000
 
 
 def load_model() -> Tuple:
-    """Load the trained model pipeline and labels from disk."""
-    global _model_cache
-    if _model_cache is None:
-        if not MODEL_PATH.exists():
-            raise FileNotFoundError(f"Model file not found: {MODEL_PATH.resolve()}")
-
-        # Load the pipeline and labels from the joblib file
-        payload = joblib.load(MODEL_PATH)
-        pipeline = payload.get("pipeline")
-        labels = payload.get("labels")
-
-        if not pipeline or not labels:
-            raise ValueError("Invalid model payload. Missing 'pipeline' or 'labels' keys.")
-
-        _model_cache = (pipeline, labels)
-        print("Successfully loaded model and labels.")
-
-    return _model_cache
+    """Load the trained model pipeline and labels from disk (cached in classifier.registry)."""
+    payload = load_payload()
+    return payload["pipeline"], payload["labels"]
 
 
 def classify(text: str) -> str:
@@ -45,19 +32,129 @@ def classify(text: str) -> str:
     return predicted_label
 
 
+def predict_with_confidence(model, texts: List[str]) -> List[Tuple[str, float]]:
+    """
+    (label, confidence) per text. Confidence is the class probability: predict_proba
+    where the model has no decision scores (NB pipeline), otherwise a softmax over
+    decision_function (equal to predict_proba for NB/LR, a relative margin for SVM).
+    """
+    import numpy as np
+    if hasattr(model, "decision_function"):
+        scores = np.asarray(model.decision_function(texts), dtype=np.float64)
+        if scores.ndim == 1:
+            scores = scores[:, None]
+        if scores.shape[1] == 1:  # binary: one margin for the positive class
+            scores = np.column_stack([np.zeros_like(scores[:, 0]), scores[:, 0]])
+        scores -= scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        proba /= proba.sum(axis=1, keepdims=True)
+    else:
+        proba = np.asarray(model.predict_proba(texts))
+    best = proba.argmax(axis=1)
+    return [(str(model.classes_[i]), float(p)) for i, p in zip(best, proba[np.arange(len(best)), best])]
+
+
+# ---------------- Batch prediction ----------------
+_worker_model_path = None
+
+
+def _init_worker(model_path: str):
+    global _worker_model_path
+    _worker_model_path = model_path
+    get_pipeline(model_path)  # warm the per-process cache once
+
+
+def _predict_chunk(chunk: List[str]) -> List[str]:
+    return [str(label) for label in get_pipeline(_worker_model_path).predict(chunk)]
+
+
+def _predict_chunk_with_confidence(chunk: List[str]) -> List[Tuple[str, float]]:
+    return predict_with_confidence(get_pipeline(_worker_model_path), chunk)
+
+
+def classify_many(texts: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE, n_jobs: int = 1,
+                  model_path=MODEL_PATH, return_confidence: bool = False) -> List:
+    """
+    Predict labels for many texts, vectorizing ``batch_size`` documents per call.
+    With ``n_jobs`` > 1 (or -1 for all cores) large inputs are spread over worker
+    processes, each loading the model once. With ``return_confidence`` each item
+    is a (label, confidence) pair.
+    """
+    texts = list(texts)
+    chunks = [texts[i:i + batch_size] for i in range(0, len(texts), max(1, batch_size))]
+    workers = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+    if workers <= 1 or len(chunks) <= 1 or len(texts) < PARALLEL_MIN_DOCS:
+        model = get_pipeline(model_path)
+        if return_confidence:
+            return [pair for chunk in chunks for pair in predict_with_confidence(model, chunk)]
+        return [str(label) for chunk in chunks for label in model.predict(chunk)]
+    predict_chunk = _predict_chunk_with_confidence if return_confidence else _predict_chunk
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                             initargs=(str(model_path),)) as pool:
+        return [item for items in pool.map(predict_chunk, chunks) for item in items]
+
+
+def _read_batch_inputs(args) -> Tuple[List[str], List[str]]:
+    ids, texts = [], []
+    if args.input_dir:
+        for fp in sorted(glob.glob(os.path.join(args.input_dir, "**", "*.txt"), recursive=True)):
+            with open(fp, "r", encoding="utf-8", errors="ignore") as f:
+                ids.append(os.path.relpath(fp, args.input_dir))
+                texts.append(f.read())
+    if args.jsonl:
+        src = sys.stdin if args.jsonl == "-" else open(args.jsonl, "r", encoding="utf-8")
+        try:
+            for line_no, line in enumerate(src, 1):
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                ids.append(str(rec.get(args.id_field, line_no)))
+                texts.append(" ".join(str(rec.get(field) or "") for field in args.fields))
+        finally:
+            if src is not sys.stdin:  # closing stdin would break any later read in this process
+                src.close()
+    return ids, texts
+
+
 def main():
     """
     Main function to handle command-line arguments and run the classification.
     """
     parser = argparse.ArgumentParser(description="Classify a document into Politics, Business, or Health.")
-    parser.add_argument("text", type=str, nargs="+",
+    parser.add_argument("text", type=str, nargs="*",
                         help="Text/document to classify (wrap in quotes if it contains spaces).")
+    parser.add_argument("--input-dir", help="Classify every .txt file under this directory.")
+    parser.add_argument("--jsonl", help="Classify records of a JSONL file ('-' for stdin).")
+    parser.add_argument("--fields", nargs="+", default=["text"],
+                        help="JSONL fields joined into the text to classify (e.g. title abstract).")
+    parser.add_argument("--id-field", default="id", help="JSONL field echoed as the output id.")
+    parser.add_argument("--out", help="Write JSONL predictions here instead of stdout.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--n-jobs", type=int, default=1, help="Worker processes for large batches (-1 = all cores).")
     args = parser.parse_args()
 
-    # Join the arguments to form the full input text.
-    input_text = " ".join(args.text)
-
     try:
+        if args.input_dir or args.jsonl:
+            ids, texts = _read_batch_inputs(args)
+            load_model()
+            started = time.perf_counter()
+            labels = classify_many(texts, batch_size=args.batch_size, n_jobs=args.n_jobs)
+            elapsed = time.perf_counter() - started
+            out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+            try:
+                for doc_id, label in zip(ids, labels):
+                    out.write(json.dumps({"id": doc_id, "label": label}, ensure_ascii=False) + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            print(f"Classified {len(texts)} documents in {elapsed:.2f}s "
+                  f"({len(texts) / max(elapsed, 1e-9):.0f} docs/sec)", file=sys.stderr)
+            return
+        if not args.text:
+            parser.error("provide text, --input-dir or --jsonl")
+
+        # Join the arguments to form the full input text.
+        input_text = " ".join(args.text)
         category = classify(input_text)
         print(f"\nInput: {input_text}\nPredicted Category: {category}")
     except FileNotFoundError as e:
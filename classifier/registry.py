@@ -0,0 +1,59 @@
+# registry.py
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MODEL_DIR = Path("models")
+MODEL_PATH = MODEL_DIR / "news_clf.joblib"
+
+# One cache per process, shared by classifier/__init__.py, predict.py and batch workers,
+# so the model is never loaded twice into the same process.
+_payloads: Dict[Tuple[Path, bool], dict] = {}
+_lock = threading.Lock()
+
+
+def compact_dir_for(model_path=MODEL_PATH) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + "_compact")
+
+
+def load_payload(model_path=MODEL_PATH, prefer_compact: bool = True) -> dict:
+    """
+    Load (once) and return the saved payload: {'pipeline', 'labels', 'meta'}.
+    When an up-to-date compact export sits next to the joblib file, its
+    memory-mapped predictor is used as the 'pipeline' instead (same predictions).
+    """
+    key = (Path(model_path).resolve(), prefer_compact)
+    with _lock:
+        if key not in _payloads:
+            _payloads[key] = _load(key[0], prefer_compact)
+        return _payloads[key]
+
+
+def _load(model_path: Path, prefer_compact: bool) -> dict:
+    if prefer_compact:
+        from classifier.compact import CompactClassifier, compact_is_current
+        compact_dir = compact_dir_for(model_path)
+        if compact_is_current(compact_dir, model_path):
+            model = CompactClassifier(compact_dir)
+            return {"pipeline": model, "labels": model.labels, "meta": model.manifest.get("meta", {})}
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    import joblib  # sklearn comes with the unpickled pipeline; neither is needed until a model is used
+    payload = joblib.load(model_path)
+    if payload.get("pipeline") is None or not payload.get("labels"):
+        raise ValueError("Invalid model payload. Missing 'pipeline' or 'labels' keys.")
+    return payload
+
+
+def get_pipeline(model_path=MODEL_PATH, prefer_compact: bool = True):
+    return load_payload(model_path, prefer_compact)["pipeline"]
+
+
+def get_labels(model_path=MODEL_PATH) -> List[str]:
+    return load_payload(model_path)["labels"]
+
+
+def clear_cache():
+    with _lock:
+        _payloads.clear()
@@ -0,0 +1,179 @@
+# search.py  (used by: python -m classifier.train_classifier --search grid|random)
+"""
+Successive-halving hyperparameter search over the TF-IDF + NB/LR/SVM pipelines.
+
+Every candidate is cross-validated on a small stratified subsample first; only
+the best 1/eta move on to a sample eta times larger, until the survivors are
+scored on the full training split. Candidates that share vectorizer settings
+(min_df, max_features, ngram_max) share one set of fold matrices per rung via
+FeatureCache, and all (candidate, fold) classifier fits of a rung run in
+parallel across cores.
+"""
+import itertools
+import json
+import math
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from classifier.feature_cache import FeatureCache, score_fold
+
+VECTORIZER_GRID = {
+    "min_df": [1, 2, 5],
+    "max_features": [40_000, 80_000, 120_000],
+    "ngram_max": [1, 2, 3],
+}
+CLASSIFIER_GRID = {
+    "nb": {"nb_alpha": [0.1, 0.3, 1.0]},
+    "lr": {"lr_C": [0.5, 2.0, 8.0]},
+    "svm": {"svm_C": [0.25, 1.0, 4.0]},
+}
+# Log-uniform ranges for --search random.
+CLASSIFIER_RANGES = {"nb": ("nb_alpha", 0.01, 3.0), "lr": ("lr_C", 0.05, 20.0), "svm": ("svm_C", 0.05, 20.0)}
+
+
+def _product(grid: Dict[str, list]) -> List[Dict]:
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def grid_candidates(algos: Sequence[str]) -> List[Dict]:
+    return [{"algo": algo, **vec, **clf}
+            for algo in algos for vec in _product(VECTORIZER_GRID) for clf in _product(CLASSIFIER_GRID[algo])]
+
+
+def random_candidates(algos: Sequence[str], n: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        algo = rng.choice(list(algos))
+        name, low, high = CLASSIFIER_RANGES[algo]
+        cand = {"algo": algo, **{k: rng.choice(v) for k, v in VECTORIZER_GRID.items()},
+                name: round(math.exp(rng.uniform(math.log(low), math.log(high))), 4)}
+        out.append(cand)
+    return out
+
+
+def _vectorizer_key(cand: Dict) -> tuple:
+    return tuple(cand[k] for k in VECTORIZER_GRID)
+
+
+def _subsample(y: np.ndarray, n: int, random_state: int) -> np.ndarray:
+    if n >= len(y):
+        return np.arange(len(y))
+    idx, _ = train_test_split(np.arange(len(y)), train_size=n, stratify=y, random_state=random_state)
+    return np.sort(idx)
+
+
+def successive_halving(
+    candidates: List[Dict],
+    X: Sequence[str], y: Sequence[str],
+    build_pipeline: Callable,
+    features: FeatureCache,
+    folds: int = 5,
+    eta: int = 3,
+    min_resources: int = None,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    **pipe_kwargs,
+) -> Dict:
+    """
+    Run the search and return {'best', 'leaderboard', 'rungs', ...}.
+    ``build_pipeline(algo, **params, **pipe_kwargs)`` builds a candidate's pipeline.
+    """
+    y = np.asarray(y)
+    n_total, n_classes = len(y), len(set(y.tolist()))
+    floor = max(min_resources or 0, folds * n_classes * 2)  # every fold needs a couple of docs per class
+    # As many halvings as the candidates need, but never start below ``floor`` documents.
+    n_rungs = 1 + int(min(math.log(max(len(candidates), 1), eta), math.log(max(n_total / floor, 1), eta)) + 1e-9)
+    first = max(floor, n_total // eta ** (n_rungs - 1))
+
+    records = [{"id": i, "params": cand, "scores": []} for i, cand in enumerate(candidates)]
+    alive = list(records)
+    rungs, fits, sample_fits = [], 0, 0
+    started = time.perf_counter()
+
+    for rung in range(n_rungs):
+        t0 = time.perf_counter()
+        n_res = n_total if rung == n_rungs - 1 else min(n_total, first * eta ** rung)
+        idx = _subsample(y, n_res, random_state)
+        X_r, y_r = [X[i] for i in idx], y[idx]
+
+        # Vectorize once per distinct vectorizer setting, then fan out classifier fits.
+        tasks, owners = [], []
+        groups: Dict[tuple, List[Dict]] = {}
+        for rec in alive:
+            groups.setdefault(_vectorizer_key(rec["params"]), []).append(rec)
+        for members in groups.values():
+            p = members[0]["params"]
+            vec = build_pipeline(p["algo"], min_df=p["min_df"], max_features=p["max_features"],
+                                 ngram_max=p["ngram_max"], **pipe_kwargs).named_steps["tfidf"]
+            try:
+                fold_data = features.cv_folds(vec, X_r, y_r, folds, random_state)
+            except ValueError as e:  # e.g. min_df prunes every term on a small sample
+                for rec in members:
+                    rec["scores"].append({"rung": rung, "n_samples": n_res, "f1_macro": None, "error": str(e)})
+                continue
+            for rec in members:
+                clf = build_pipeline(**rec["params"], **pipe_kwargs).named_steps["clf"]
+                for fold in fold_data:
+                    tasks.append(delayed(score_fold)(clone(clf), *fold))
+                    owners.append(rec)
+        results = Parallel(n_jobs=n_jobs)(tasks)
+        fits += len(results)
+        sample_fits += len(results) * n_res
+
+        per_rec: Dict[int, List] = {}
+        for rec, (f1, acc) in zip(owners, results):
+            per_rec.setdefault(rec["id"], []).append((f1, acc))
+        for rec in alive:
+            if rec["id"] in per_rec:
+                f1s, accs = zip(*per_rec[rec["id"]])
+                rec["scores"].append({"rung": rung, "n_samples": n_res,
+                                      "f1_macro": float(np.mean(f1s)), "f1_macro_std": float(np.std(f1s)),
+                                      "accuracy": float(np.mean(accs))})
+
+        ranked = sorted(alive, key=lambda r: -(r["scores"][-1]["f1_macro"] or -1.0))
+        rungs.append({"rung": rung, "n_samples": n_res, "candidates": len(alive),
+                      "vectorizer_settings": len(groups), "fits": len(results),
+                      "seconds": round(time.perf_counter() - t0, 3)})
+        print(f"[search] rung {rung}: {len(alive)} candidates x {folds} folds on {n_res} docs "
+              f"({len(groups)} vectorizer settings) in {rungs[-1]['seconds']:.1f}s; "
+              f"best F1 {ranked[0]['scores'][-1]['f1_macro'] or 0:.4f}")
+        if rung < n_rungs - 1:
+            alive = ranked[:max(1, math.ceil(len(alive) / eta))]
+
+    def sort_key(rec):
+        last = rec["scores"][-1]
+        return (-last["rung"], -(last["f1_macro"] if last["f1_macro"] is not None else -1.0))
+
+    leaderboard = []
+    for rank, rec in enumerate(sorted(records, key=sort_key), 1):
+        last = rec["scores"][-1]
+        leaderboard.append({"rank": rank, "params": rec["params"], "rung_reached": last["rung"],
+                            "f1_macro": last["f1_macro"], "history": rec["scores"]})
+    exhaustive_fits = len(candidates) * folds
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "eta": eta,
+        "folds": folds,
+        "n_candidates": len(candidates),
+        "rungs": rungs,
+        "fits": fits,
+        "exhaustive_fits": exhaustive_fits,
+        # Fits weighted by training-set size, relative to scoring every candidate on all documents.
+        "cost_fraction": round(sample_fits / max(exhaustive_fits * n_total, 1), 4),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "best": leaderboard[0],
+        "leaderboard": leaderboard,
+    }
+
+
+def write_leaderboard(result: Dict, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
@@ -0,0 +1,199 @@
+# text.py  (benchmark: python -m classifier.text --bench)
+"""
+Tokenizers shared by training, the feature cache and the compact predictor.
+
+LemmaTokenizer lives here rather than in train_classifier so pickled models
+reference ``classifier.text.LemmaTokenizer`` (not ``__main__``) and load from
+any entry point. Lemmas are memoized per surface form: a corpus has a few
+tens of thousands of distinct words but millions of tokens, and
+``WordNetLemmatizer.lemmatize`` is the expensive part.
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    _NLTK_AVAILABLE = True
+except Exception:
+    _NLTK_AVAILABLE = False
+
+_WORD_RE = re.compile(r"[A-Za-z]+")
+_STOP = set()
+
+if _NLTK_AVAILABLE:
+    try:
+        _STOP = set(stopwords.words("english"))
+    except Exception:
+        _STOP = set()
+    _LEM = WordNetLemmatizer()
+
+# Distinct surface forms remembered per tokenizer; beyond this new words are lemmatized uncached.
+LEMMA_CACHE_SIZE = 200_000
+
+
+class LemmaTokenizer:
+    """Regex tokenize -> lowercase -> stopword filter -> WordNet lemmatize (memoized)."""
+    def __init__(self, lowercase=True, remove_stops=True, keep_alpha=True, cache_size=LEMMA_CACHE_SIZE):
+        self.lowercase = lowercase
+        self.remove_stops = remove_stops
+        self.keep_alpha = keep_alpha
+        self.cache_size = cache_size
+        self._lemmas: Dict[str, str] = {}  # surface form -> lemma, "" for dropped tokens
+
+    def __setstate__(self, state):
+        # Models pickled before the cache existed.
+        state.setdefault("cache_size", LEMMA_CACHE_SIZE)
+        state.setdefault("_lemmas", {})
+        self.__dict__.update(state)
+
+    def cache_key(self) -> Dict:
+        # Output differs when NLTK (or its stopword list) is missing, so that is part of the key.
+        return {"type": "LemmaTokenizer", "lowercase": self.lowercase, "remove_stops": self.remove_stops,
+                "keep_alpha": self.keep_alpha, "nltk": _NLTK_AVAILABLE, "stops": len(_STOP)}
+
+    def clear_cache(self):
+        self._lemmas = {}
+
+    def _lemma(self, w: str) -> str:
+        if self.remove_stops and w in _STOP:
+            lemma = ""
+        else:
+            lemma = _LEM.lemmatize(w)
+        if len(self._lemmas) < self.cache_size:
+            self._lemmas[w] = lemma
+        return lemma
+
+    def __call__(self, doc: str):
+        text = doc.lower() if self.lowercase else doc
+        if not _NLTK_AVAILABLE:
+            # Fallback: basic alpha tokenization, no lemmatization
+            return _WORD_RE.findall(text)
+
+        toks = _WORD_RE.findall(text) if self.keep_alpha else nltk.word_tokenize(text)
+        lemmas, lemma_of = self._lemmas, self._lemma
+        out = []
+        for w in toks:
+            lemma = lemmas.get(w)
+            if lemma is None:
+                lemma = lemma_of(w)
+            if lemma:
+                out.append(lemma)
+        return out
+
+
+# ---------------- Parallel pre-tokenization ----------------
+_worker_tokenize: Optional[Callable] = None
+_worker_preprocess: Optional[Callable] = None
+
+
+def _init_worker(tokenize: Callable, preprocess: Optional[Callable]):
+    global _worker_tokenize, _worker_preprocess
+    _worker_tokenize, _worker_preprocess = tokenize, preprocess
+
+
+def _tokenize_chunk(chunk: List[str]):
+    preprocess = _worker_preprocess or (lambda s: s)
+    docs = [_worker_tokenize(preprocess(t)) for t in chunk]
+    return docs, getattr(_worker_tokenize, "_lemmas", None)
+
+
+def pretokenize(texts: Sequence[str], tokenize: Callable, preprocess: Optional[Callable] = None,
+                n_jobs: int = 1, chunk_size: int = 256) -> List[List[str]]:
+    """
+    ``tokenize(preprocess(text))`` for every text, optionally across ``n_jobs``
+    processes (-1 = all cores). Each worker starts from the tokenizer's current
+    lemma cache, and the lemmas the workers learn are merged back into it.
+    """
+    texts = list(texts)
+    workers = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+    if workers <= 1 or len(texts) <= chunk_size:
+        preprocess = preprocess or (lambda s: s)
+        return [tokenize(preprocess(t)) for t in texts]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    docs: List[List[str]] = []
+    learned = getattr(tokenize, "_lemmas", None)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                             initargs=(tokenize, preprocess)) as pool:
+        for chunk_docs, lemmas in pool.map(_tokenize_chunk, chunks):
+            docs.extend(chunk_docs)
+            if learned is not None and lemmas:
+                room = tokenize.cache_size - len(learned)
+                for w, lemma in lemmas.items():
+                    if room <= 0:
+                        break
+                    if w not in learned:
+                        learned[w] = lemma
+                        room -= 1
+    return docs
+
+
+# ---------------- Benchmark ----------------
+def _reference_tokenize(tok: LemmaTokenizer, doc: str) -> List[str]:
+    """The original, unmemoized LemmaTokenizer.__call__ (benchmark baseline)."""
+    if not _NLTK_AVAILABLE:
+        text = doc.lower() if tok.lowercase else doc
+        return _WORD_RE.findall(text)
+    text = doc.lower() if tok.lowercase else doc
+    toks = _WORD_RE.findall(text) if tok.keep_alpha else nltk.word_tokenize(text)
+    out = []
+    for w in toks:
+        if tok.remove_stops and w in _STOP:
+            continue
+        lemma = _LEM.lemmatize(w)
+        if lemma:
+            out.append(lemma)
+    return out
+
+
+def benchmark(n_jobs: int = -1, repeat: int = 1) -> Dict:
+    from classifier.train_classifier import load_dataset
+    texts, _ = load_dataset()
+    texts = texts * repeat
+    n_tokens = sum(len(_WORD_RE.findall(t)) for t in texts)
+    if _NLTK_AVAILABLE:
+        _LEM.lemmatize("warmup")  # load WordNet outside the timed sections
+
+    t0 = time.perf_counter()
+    baseline = [_reference_tokenize(LemmaTokenizer(), t) for t in texts]
+    t_base = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    memo = LemmaTokenizer()
+    serial = [memo(t) for t in texts]
+    t_memo = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    parallel = pretokenize(texts, LemmaTokenizer(), n_jobs=n_jobs)
+    t_par = time.perf_counter() - t0
+
+    if not (baseline == serial == parallel):
+        raise AssertionError("memoized/parallel tokenization differs from the original")
+    return {
+        "docs": len(texts), "tokens": n_tokens, "nltk": _NLTK_AVAILABLE,
+        "distinct_forms": len(memo._lemmas),
+        "original_s": round(t_base, 3),
+        "memoized_s": round(t_memo, 3),
+        "parallel_s": round(t_par, 3),
+        "n_jobs": (os.cpu_count() or 1) if n_jobs < 0 else n_jobs,
+        "speedup_memoized": round(t_base / max(t_memo, 1e-9), 2),
+        "speedup_parallel": round(t_base / max(t_par, 1e-9), 2),
+    }
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Benchmark LemmaTokenizer on the classification dataset.")
+    p.add_argument("--bench", action="store_true")
+    p.add_argument("--n_jobs", type=int, default=-1)
+    p.add_argument("--repeat", type=int, default=1, help="Replicate the corpus to get stable timings")
+    args = p.parse_args()
+    if args.bench:
+        for k, v in benchmark(args.n_jobs, args.repeat).items():
+            print(f"{k:>18}: {v}")
+    else:
+        p.print_help()
@@ -6,6 +6,7 @@ from datetime import datetime
 
 import numpy as np
 from sklearn.model_selection import train_test_split, StratifiedKFold, cross_validate
+from sklearn.base import clone
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
 from sklearn.pipeline import Pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -13,6 +14,12 @@ from sklearn.naive_bayes import MultinomialNB
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import LinearSVC
 import joblib
+from joblib import Parallel, delayed
+
+from classifier.compact import COMPACT_DIR, export_compact  # run as: python -m classifier.train_classifier
+from classifier.feature_cache import CACHE_DIR, FeatureCache, score_fold
+from classifier.search import grid_candidates, random_candidates, successive_halving, write_leaderboard
+from classifier.text import LemmaTokenizer  # noqa: F401  (also keeps models pickled from here loadable)
 
 # ---------------- Config ----------------
 # DATA_DIR = Path("data/classification")
@@ -21,51 +28,12 @@ DATA_DIR = Path(__file__).parent.parent / "data" / "classification"
 MODEL_DIR = Path("models")
 MODEL_PATH = MODEL_DIR / "news_clf.joblib"
 SUMMARY_PATH = MODEL_DIR / "news_clf_summary.json"
+LEADERBOARD_PATH = MODEL_DIR / "news_clf_leaderboard.json"
 CATEGORIES = ["politics", "business", "health"]
 RANDOM_STATE = 42
 
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
-try:
-    import nltk
-    from nltk.corpus import stopwords
-    from nltk.stem import WordNetLemmatizer
-    _NLTK_AVAILABLE = True
-except Exception:
-    _NLTK_AVAILABLE = False
-
-_WORD_RE = re.compile(r"[A-Za-z]+")
-if _NLTK_AVAILABLE:
-    try:
-        _STOP = set(stopwords.words("english"))
-    except Exception:
-        _STOP = set()
-    _LEM = WordNetLemmatizer()
-
-class LemmaTokenizer:
-    """Regex tokenize -> lowercase -> stopword filter -> WordNet lemmatize."""
-    def __init__(self, lowercase=True, remove_stops=True, keep_alpha=True):
-        self.lowercase = lowercase
-        self.remove_stops = remove_stops
-        self.keep_alpha = keep_alpha
-
-    def __call__(self, doc: str):
-        if not _NLTK_AVAILABLE:
-            # Fallback: basic alpha tokenization, no lemmatization
-            text = doc.lower() if self.lowercase else doc
-            return _WORD_RE.findall(text)
-
-        text = doc.lower() if self.lowercase else doc
-        toks = _WORD_RE.findall(text) if self.keep_alpha else nltk.word_tokenize(text)
-        out = []
-        for w in toks:
-            if self.remove_stops and w in _STOP:
-                continue
-            lemma = _LEM.lemmatize(w)
-            if lemma:
-                out.append(lemma)
-        return out
-
 # ---------------- Data ----------------
 def load_dataset() -> Tuple[List[str], List[str]]:
     texts, labels = [], []
@@ -138,13 +106,22 @@ def build_pipeline(
     return Pipeline([("tfidf", vec), ("clf", clf)])
 
 # ---------------- Training & Eval ----------------
-def evaluate_cv(pipe: Pipeline, X: List[str], y: List[str], folds: int = 5) -> Dict[str, float]:
-    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
-    cv = cross_validate(
-        pipe, X, y, cv=skf,
-        scoring=["f1_macro", "accuracy"],
-        n_jobs=-1, return_train_score=False
-    )
+def evaluate_cv(pipe: Pipeline, X: List[str], y: List[str], folds: int = 5,
+                features: FeatureCache = None) -> Dict[str, float]:
+    if features is None:
+        skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+        cv = cross_validate(
+            pipe, X, y, cv=skf,
+            scoring=["f1_macro", "accuracy"],
+            n_jobs=-1, return_train_score=False
+        )
+    else:
+        # Same splits and scores as cross_validate, but only the classifier is fitted per fold.
+        fold_data = features.cv_folds(pipe.named_steps["tfidf"], X, y, folds, RANDOM_STATE)
+        scores = Parallel(n_jobs=-1)(
+            delayed(score_fold)(clone(pipe.named_steps["clf"]), *fold) for fold in fold_data
+        )
+        cv = {"test_f1_macro": [s[0] for s in scores], "test_accuracy": [s[1] for s in scores]}
     return {
         "cv_f1_macro_mean": float(np.mean(cv["test_f1_macro"])),
         "cv_f1_macro_std": float(np.std(cv["test_f1_macro"])),
@@ -152,8 +129,8 @@ def evaluate_cv(pipe: Pipeline, X: List[str], y: List[str], folds: int = 5) -> D
         "cv_acc_std": float(np.std(cv["test_accuracy"])),
     }
 
-def heldout_report(pipe: Pipeline, X_te: List[str], y_te: List[str]) -> Dict:
-    y_hat = pipe.predict(X_te)
+def heldout_report(pipe: Pipeline, X_te: List[str], y_te: List[str], features: FeatureCache = None) -> Dict:
+    y_hat = pipe.predict(X_te) if features is None else features.predict(pipe, X_te)
     acc = accuracy_score(y_te, y_hat)
     f1m = f1_score(y_te, y_hat, average="macro")
     report = classification_report(y_te, y_hat, labels=CATEGORIES, zero_division=0, digits=4)
@@ -171,17 +148,21 @@ def train_and_eval(
     X_tr: List[str], y_tr: List[str],
     X_te: List[str], y_te: List[str],
     folds: int,
+    features: FeatureCache = None,
     **pipe_kwargs
 ):
     pipe = build_pipeline(algo, **pipe_kwargs)
 
     print(f"\n[cv] {algo.upper()} on training fold...")
-    cv_stats = evaluate_cv(pipe, X_tr, y_tr, folds=folds)
+    cv_stats = evaluate_cv(pipe, X_tr, y_tr, folds=folds, features=features)
     print(f"  F1-macro {cv_stats['cv_f1_macro_mean']:.4f} ± {cv_stats['cv_f1_macro_std']:.4f} | "
           f"ACC {cv_stats['cv_acc_mean']:.4f} ± {cv_stats['cv_acc_std']:.4f}")
 
-    pipe.fit(X_tr, y_tr)
-    held = heldout_report(pipe, X_te, y_te)
+    if features is None:
+        pipe.fit(X_tr, y_tr)
+    else:
+        pipe = features.fit_pipeline(pipe, X_tr, y_tr)
+    held = heldout_report(pipe, X_te, y_te, features)
     print("\n[held-out] accuracy:", f"{held['test_accuracy']:.4f}")
     print("[held-out] macro-F1:", f"{held['test_f1_macro']:.4f}")
     print(held["classification_report"])
@@ -202,6 +183,11 @@ def main(
     alpha: float,
     lr_C: float,
     svm_C: float,
+    use_cache: bool = True,
+    cache_dir: Path = CACHE_DIR,
+    search: str = None,  # None | 'grid' | 'random'
+    n_candidates: int = 60,
+    eta: int = 3,
 ):
     random.seed(RANDOM_STATE); np.random.seed(RANDOM_STATE)
 
@@ -219,12 +205,44 @@ def main(
     # Decide which models to run
     to_run = [model] if model in {"nb","lr","svm"} else ["nb","lr","svm"]
 
+    # Tokenize every document once; folds and final fits reuse the tokens (and fold matrices)
+    features = None
+    if use_cache or len(to_run) > 1 or search:
+        features = FeatureCache(cache_dir, enabled=use_cache, n_jobs=-1 if use_lemmatization else 1)
+        features.tokens(build_pipeline(to_run[0], ngram_max=ngram_max, use_lemmatization=use_lemmatization)
+                        .named_steps["tfidf"], X)
+
+    search_result = None
+    if search:
+        candidates = (grid_candidates(to_run) if search == "grid"
+                      else random_candidates(to_run, n_candidates, RANDOM_STATE))
+        print(f"\n[search] {search}: {len(candidates)} candidates, successive halving with eta={eta}")
+        search_result = successive_halving(
+            candidates, X_tr, y_tr, build_pipeline, features,
+            folds=folds, eta=eta, random_state=RANDOM_STATE, use_lemmatization=use_lemmatization,
+        )
+        search_result["strategy"] = search
+        MODEL_DIR.mkdir(parents=True, exist_ok=True)
+        write_leaderboard(search_result, LEADERBOARD_PATH)
+        print(f"[search] {search_result['fits']} fold fits in {search_result['elapsed_s']:.1f}s; weighted by sample size "
+              f"{search_result['cost_fraction']:.0%} of scoring every candidate on the full split")
+        print(f"[saved] {LEADERBOARD_PATH.resolve()}")
+
+        # Retrain the winner through the normal path (full CV + held-out report + saved model)
+        best_params = search_result["best"]["params"]
+        to_run = [best_params["algo"]]
+        min_df, max_features, ngram_max = best_params["min_df"], best_params["max_features"], best_params["ngram_max"]
+        alpha = best_params.get("nb_alpha", alpha)
+        lr_C = best_params.get("lr_C", lr_C)
+        svm_C = best_params.get("svm_C", svm_C)
+
     results = {}
     best = {"name": None, "pipe": None, "cv": None, "held": None, "f1": -1}
 
     for algo in to_run:
         pipe, cv_stats, held = train_and_eval(
             algo, X_tr, y_tr, X_te, y_te, folds,
+            features=features,
             min_df=min_df,
             max_features=max_features,
             ngram_max=ngram_max,
@@ -257,8 +275,13 @@ def main(
             }
         }
     }
+    tokenizer = best["pipe"].named_steps["tfidf"].tokenizer
+    if tokenizer is not None:
+        tokenizer.clear_cache()  # the lemma memo is rebuilt on use; keep it out of the artifact
     joblib.dump(payload, MODEL_PATH)
     print(f"\n[saved] {MODEL_PATH.resolve()}")
+    compact_dir = export_compact(best["pipe"], CATEGORIES, COMPACT_DIR, MODEL_PATH, payload["meta"])
+    print(f"[saved] {compact_dir.resolve()}")
 
     summary = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -267,11 +290,14 @@ def main(
         "split": {"train": len(X_tr), "test": len(X_te), "test_size": test_size},
         "best_model": best["name"],
         "per_model": results,
+        "search": {"strategy": search, "best_params": search_result["best"]["params"],
+                   "leaderboard": str(LEADERBOARD_PATH)} if search_result else None,
         "cv_best": best["cv"],
         "heldout": best["held"],
         "notes": {
             "vectorizer": "TF-IDF word ngrams",
-            "lemmatization": "NLTK WordNet (if installed) in custom tokenizer"
+            "lemmatization": "NLTK WordNet (if installed) in custom tokenizer",
+            "feature_cache": str(cache_dir) if use_cache else None,
         }
     }
     with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
@@ -292,6 +318,12 @@ if __name__ == "__main__":
     p.add_argument("--alpha", type=float, default=0.3, help="MultinomialNB alpha")
     p.add_argument("--lr_C", type=float, default=2.0, help="LogReg regularization C (higher=less regularization)")
     p.add_argument("--svm_C", type=float, default=1.0, help="LinearSVC C")
+    p.add_argument("--no_cache", action="store_true", help="Do not read or write the on-disk feature cache")
+    p.add_argument("--cache_dir", type=Path, default=CACHE_DIR, help="Token and CV-fold matrix cache")
+    p.add_argument("--search", choices=["grid", "random"],
+                   help="Tune min_df/max_features/ngram_max and alpha/C by successive halving, then train the winner")
+    p.add_argument("--n_candidates", type=int, default=60, help="Candidates sampled for --search random")
+    p.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta candidates per halving round")
     args = p.parse_args()
 
     main(
@@ -305,4 +337,9 @@ if __name__ == "__main__":
         alpha=args.alpha,
         lr_C=args.lr_C,
         svm_C=args.svm_C,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        search=args.search,
+        n_candidates=args.n_candidates,
+        eta=args.eta,
     )
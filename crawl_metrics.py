@@ -0,0 +1,182 @@
+import json, math, os, threading, time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 40.0, 60.0)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+
+
+class CrawlMetrics:
+    """Thread-safe timings, counters and memory samples for one crawl run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._durations: Dict[str, List[float]] = defaultdict(list)
+            self._errors: Counter = Counter()       # (stage, exception type)
+            self._retries: Counter = Counter()      # (stage, exception type)
+            self._events: Counter = Counter()       # (name, label) e.g. ("fallback", "authors:subtitle")
+            self._worker_pages: Counter = Counter()
+            self._worker_window: Dict[str, List[float]] = {}
+            self._heap_mb: List[float] = []
+
+    # ---------- recording ----------
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self._durations[stage].append(seconds)
+
+    @contextmanager
+    def timed(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def record_error(self, stage: str, error: BaseException):
+        with self._lock:
+            self._errors[(stage, type(error).__name__)] += 1
+
+    def record_retry(self, stage: str, error: BaseException):
+        with self._lock:
+            self._retries[(stage, type(error).__name__)] += 1
+
+    def record_event(self, name: str, label: str):
+        with self._lock:
+            self._events[(name, label)] += 1
+
+    def record_page(self, started: float, worker: Optional[str] = None):
+        worker = worker or threading.current_thread().name
+        now = time.time()
+        with self._lock:
+            self._worker_pages[worker] += 1
+            window = self._worker_window.setdefault(worker, [started, now])
+            window[0] = min(window[0], started)
+            window[1] = max(window[1], now)
+
+    def record_heap(self, heap_mb: Optional[float]):
+        if heap_mb is None:
+            return
+        with self._lock:
+            self._heap_mb.append(heap_mb)
+
+    # ---------- reporting ----------
+    def report(self) -> Dict:
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            stages = {}
+            for stage, values in self._durations.items():
+                ordered = sorted(values)
+                total = sum(ordered)
+                stages[stage] = {
+                    "count": len(ordered),
+                    "total_s": round(total, 4),
+                    "mean_s": round(total / len(ordered), 4),
+                    "p50_s": round(_percentile(ordered, 50), 4),
+                    "p90_s": round(_percentile(ordered, 90), 4),
+                    "p99_s": round(_percentile(ordered, 99), 4),
+                    "max_s": round(ordered[-1], 4),
+                    "histogram": {str(b): sum(1 for v in ordered if v <= b) for b in LATENCY_BUCKETS},
+                }
+            workers = {}
+            for worker, pages in self._worker_pages.items():
+                start, end = self._worker_window[worker]
+                workers[worker] = {"pages": pages, "pages_per_minute": round(pages / max((end - start) / 60, 1e-9), 2)}
+            total_pages = sum(self._worker_pages.values())
+            return {
+                "started_at": self.started_at,
+                "elapsed_s": round(elapsed, 3),
+                "pages": total_pages,
+                "pages_per_minute": round(total_pages / max(elapsed / 60, 1e-9), 2),
+                "stages": dict(sorted(stages.items(), key=lambda kv: kv[1]["total_s"], reverse=True)),
+                "errors": [{"stage": s, "type": t, "count": n} for (s, t), n in sorted(self._errors.items())],
+                "retries": [{"stage": s, "type": t, "count": n} for (s, t), n in sorted(self._retries.items())],
+                "events": [{"name": n, "label": l, "count": c} for (n, l), c in sorted(self._events.items())],
+                "workers": workers,
+                "browser_heap_mb": {
+                    "samples": len(self._heap_mb),
+                    "mean": round(sum(self._heap_mb) / len(self._heap_mb), 2) if self._heap_mb else None,
+                    "max": round(max(self._heap_mb), 2) if self._heap_mb else None,
+                },
+            }
+
+    def prometheus_text(self, prefix: str = "crawler") -> str:
+        rep = self.report()
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Time spent per crawl step.",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        for stage, values in sorted(durations.items()):
+            for bucket in LATENCY_BUCKETS:
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{{_labels(stage=stage, le=bucket)}}} '
+                             f'{sum(1 for v in values if v <= bucket)}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{{_labels(stage=stage, le="+Inf")}}} {len(values)}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{{_labels(stage=stage)}}} {sum(values):.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{{_labels(stage=stage)}}} {len(values)}')
+        for metric, rows, help_text in (("errors_total", rep["errors"], "Failures by step and exception type."),
+                                        ("retries_total", rep["retries"], "Retries by step and exception type.")):
+            lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} counter"]
+            lines += [f'{prefix}_{metric}{{{_labels(stage=r["stage"], type=r["type"])}}} {r["count"]}' for r in rows]
+        lines += [f"# HELP {prefix}_events_total Selector fallbacks and other notable events.",
+                  f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{{_labels(name=r["name"], label=r["label"])}}} {r["count"]}' for r in rep["events"]]
+        lines += [f"# HELP {prefix}_worker_pages_total Detail pages completed per worker.",
+                  f"# TYPE {prefix}_worker_pages_total counter"]
+        lines += [f'{prefix}_worker_pages_total{{{_labels(worker=w)}}} {s["pages"]}' for w, s in sorted(rep["workers"].items())]
+        lines += [f"# HELP {prefix}_worker_pages_per_minute Detail page rate per worker.",
+                  f"# TYPE {prefix}_worker_pages_per_minute gauge"]
+        lines += [f'{prefix}_worker_pages_per_minute{{{_labels(worker=w)}}} {s["pages_per_minute"]}' for w, s in sorted(rep["workers"].items())]
+        heap = rep["browser_heap_mb"]
+        if heap["samples"]:
+            lines += [f"# HELP {prefix}_browser_heap_megabytes Sampled Chrome JS heap size.",
+                      f"# TYPE {prefix}_browser_heap_megabytes gauge",
+                      f'{prefix}_browser_heap_megabytes{{{_labels(stat="mean")}}} {heap["mean"]}',
+                      f'{prefix}_browser_heap_megabytes{{{_labels(stat="max")}}} {heap["max"]}']
+        lines += [f"# TYPE {prefix}_run_duration_seconds gauge", f"{prefix}_run_duration_seconds {rep['elapsed_s']}",
+                  f"# TYPE {prefix}_pages_per_minute gauge", f"{prefix}_pages_per_minute {rep['pages_per_minute']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        """Write the JSON run report and/or a node_exporter textfile (each replaced atomically)."""
+        if json_path:
+            _atomic_write(json_path, json.dumps(self.report(), indent=2))
+        if prometheus_path:
+            _atomic_write(prometheus_path, self.prometheus_text())
+
+    def summary_lines(self, limit: int = 8) -> List[str]:
+        rep = self.report()
+        lines = [f"{'step':<18}{'count':>7}{'total s':>10}{'mean s':>9}{'p90 s':>9}"]
+        for stage, stats in list(rep["stages"].items())[:limit]:
+            lines.append(f"{stage:<18}{stats['count']:>7}{stats['total_s']:>10.1f}{stats['mean_s']:>9.2f}{stats['p90_s']:>9.2f}")
+        return lines
+
+
+def _atomic_write(path: str, text: str):
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, target)
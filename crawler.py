@@ -1,28 +1,65 @@
-import argparse, json, os, time, re, unicodedata, sys
-from math import ceil
+from __future__ import annotations  # annotations name selenium types that are only imported on first use
+
+import argparse, html as html_lib, json, os, time, re, unicodedata, sys, threading
+from contextlib import contextmanager, redirect_stdout
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 from urllib.parse import urljoin
 
-# Selenium
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+# Selenium: bound by _import_selenium() before the first browser starts, so importing this
+# module (pipeline, record parsing, archive tooling) does not pay for selenium/webdriver_manager.
+webdriver = By = ChromeService = Options = None
+TimeoutException = WebDriverException = WebDriverWait = EC = None
+_selenium_lock = threading.Lock()
+
+
+def _import_selenium():
+    global webdriver, By, ChromeService, Options, TimeoutException, WebDriverException, WebDriverWait, EC
+    with _selenium_lock:
+        if webdriver is not None:
+            return
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.chrome.options import Options
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium import webdriver as _webdriver
+        webdriver = _webdriver  # bound last: it is the "already imported" flag
+
+from crawl_metrics import CrawlMetrics
+from page_archive import PageArchive
 
 # Parallelism
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 # ---------- Config ----------
 MAIN_PORTAL_URL = "https://pureportal.coventry.ac.uk"
 PUBLICATIONS_BASE_URL = f"{MAIN_PORTAL_URL}/en/organisations/fbl-school-of-economics-finance-and-accounting/publications/"
 
+# Requests the extractor never needs (images, fonts, media, trackers, consent banner).
+# Stylesheets stay: author ordering uses element y-positions and abstracts are
+# read with innerText, both of which depend on layout and visibility.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*cookielaw.org*", "*onetrust.com*",
+]
+RECYCLE_AFTER_PAGES = 150
+MAX_BROWSER_HEAP_MB = 512.0
+MEMORY_CHECK_EVERY = 10
+DETAIL_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 2.0
+
+# Timings, error counts and memory samples for the current run (see crawl_metrics.py).
+METRICS = CrawlMetrics()
+
 
 def configure_browser_options(run_headless: bool, use_legacy_mode: bool = False) -> Options:
+    _import_selenium()
     browser_opts = Options()
     if run_headless:
         browser_opts.add_argument("--headless" + ("" if use_legacy_mode else "=new"))
@@ -48,28 +85,189 @@ def configure_browser_options(run_headless: bool, use_legacy_mode: bool = False)
     return browser_opts
 
 
-def initialize_webdriver(run_headless: bool, use_legacy_mode: bool = False) -> webdriver.Chrome:
-    driver_service = ChromeService(ChromeDriverManager().install(), log_output=os.devnull)
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path() -> str:
+    """Resolve the chromedriver binary once per process instead of once per browser."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def _enable_resource_blocking(web_driver: webdriver.Chrome):
+    try:
+        web_driver.execute_cdp_cmd("Network.enable", {})
+        web_driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception:
+        pass
+
+
+def _disable_network(web_driver: webdriver.Chrome):
+    web_driver.execute_cdp_cmd("Network.enable", {})
+    web_driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": ["*"]})
+    web_driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
+        "offline": True, "latency": 0, "downloadThroughput": -1, "uploadThroughput": -1,
+    })
+
+
+def browser_heap_mb(web_driver: webdriver.Chrome) -> Optional[float]:
+    try:
+        metrics = web_driver.execute_cdp_cmd("Performance.getMetrics", {}).get("metrics", [])
+    except Exception:
+        return None
+    for metric in metrics:
+        if metric.get("name") == "JSHeapUsedSize":
+            return metric.get("value", 0) / (1024 * 1024)
+    return None
+
+
+def initialize_webdriver(run_headless: bool, use_legacy_mode: bool = False, block_resources: bool = False,
+                         offline: bool = False) -> webdriver.Chrome:
+    _import_selenium()
+    driver_service = ChromeService(resolve_driver_path(), log_output=os.devnull)
     web_driver = webdriver.Chrome(service=driver_service, options=configure_browser_options(run_headless, use_legacy_mode))
     web_driver.set_page_load_timeout(40)
     try:
         web_driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
         })
+        web_driver.execute_cdp_cmd("Performance.enable", {})
     except Exception:
         pass
+    if offline:
+        _disable_network(web_driver)
+    elif block_resources:
+        _enable_resource_blocking(web_driver)
     return web_driver
 
 
-def handle_cookie_consent(web_driver: webdriver.Chrome):
+class BrowserPool:
+    """Warm Chrome sessions shared by the listing and detail stages.
+
+    Sessions are started lazily (up to ``size``) and handed out one at a time.
+    A session is quit and replaced after ``recycle_after`` pages, when its JS
+    heap grows past ``max_heap_mb``, or when it stops responding.
+    """
+
+    def __init__(self, size: int, run_headless: bool = True, use_legacy_mode: bool = False,
+                 recycle_after: int = RECYCLE_AFTER_PAGES, max_heap_mb: float = MAX_BROWSER_HEAP_MB,
+                 block_resources: bool = True, offline: bool = False):
+        _import_selenium()  # the pool's except clauses name selenium exceptions
+        self.size = max(1, size)
+        self.run_headless = run_headless
+        self.use_legacy_mode = use_legacy_mode
+        self.recycle_after = recycle_after
+        self.max_heap_mb = max_heap_mb
+        self.block_resources = block_resources
+        self.offline = offline
+        self.sessions_started = 0
+        self.sessions_recycled = 0
+        self._idle: List[webdriver.Chrome] = []  # LIFO: the warmest session goes out first
+        self._page_counts: Dict[int, int] = {}
+        self._live = 0
+        self._lock = threading.Condition()  # notified when a session goes idle or a slot frees
+
+    def acquire(self) -> webdriver.Chrome:
+        with self._lock:
+            while not self._idle and self._live >= self.size:
+                self._lock.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._live += 1
+        try:
+            with METRICS.timed("browser_start"):
+                web_driver = initialize_webdriver(self.run_headless, self.use_legacy_mode, self.block_resources, self.offline)
+        except Exception:
+            with self._lock:
+                self._live -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._page_counts[id(web_driver)] = 0
+            self.sessions_started += 1
+        return web_driver
+
+    def release(self, web_driver: webdriver.Chrome, healthy: bool = True):
+        with self._lock:
+            pages_served = self._page_counts.get(id(web_driver), 0) + 1
+            self._page_counts[id(web_driver)] = pages_served
+        recycle = not healthy or pages_served >= self.recycle_after
+        if not recycle and self.max_heap_mb and pages_served % MEMORY_CHECK_EVERY == 0:
+            heap_mb = browser_heap_mb(web_driver)
+            METRICS.record_heap(heap_mb)
+            recycle = heap_mb is not None and heap_mb > self.max_heap_mb
+        if recycle:
+            METRICS.record_event("browser", "recycled" if healthy else "dead")
+            self._discard(web_driver)
+            with self._lock:
+                self.sessions_recycled += 1
+        else:
+            with self._lock:
+                self._idle.append(web_driver)
+                self._lock.notify()
+
+    @contextmanager
+    def session(self):
+        web_driver = self.acquire()
+        try:
+            yield web_driver
+        except WebDriverException:
+            self.release(web_driver, healthy=_session_alive(web_driver))
+            raise
+        except BaseException:
+            self.release(web_driver)
+            raise
+        else:
+            self.release(web_driver)
+
+    def _discard(self, web_driver: webdriver.Chrome):
+        try:
+            web_driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._page_counts.pop(id(web_driver), None)
+            self._live -= 1
+            self._lock.notify()  # a waiter can start a replacement
+
+    def close(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                web_driver = self._idle.pop()
+            self._discard(web_driver)
+
+
+def _session_alive(web_driver: webdriver.Chrome) -> bool:
     try:
-        consent_btn = WebDriverWait(web_driver, 6).until(EC.presence_of_element_located((By.ID, "onetrust-accept-btn-handler")))
-        web_driver.execute_script("arguments[0].click();", consent_btn)
-        time.sleep(0.2)
-    except TimeoutException:
-        pass
+        web_driver.execute_script("return 1")
+        return True
     except Exception:
-        pass
+        return False
+
+
+def handle_cookie_consent(web_driver: webdriver.Chrome):
+    # The banner only shows until it is accepted (or never, when its script is
+    # blocked), so a warm session skips the 6s wait after the first page.
+    if getattr(web_driver, "cookie_consent_handled", False):
+        return
+    with METRICS.timed("cookie_consent"):
+        try:
+            consent_btn = WebDriverWait(web_driver, 6).until(EC.presence_of_element_located((By.ID, "onetrust-accept-btn-handler")))
+            web_driver.execute_script("arguments[0].click();", consent_btn)
+            time.sleep(0.2)
+            METRICS.record_event("cookie_consent", "accepted")
+        except TimeoutException:
+            METRICS.record_event("cookie_consent", "timeout")
+        except Exception:
+            pass
+    web_driver.cookie_consent_handled = True
 
 
 # =========================== Utilities ===========================
@@ -117,17 +315,31 @@ def _parse_publication_year(date_string: str) -> Optional[int]:
     return int(year_match.group(0)) if year_match else None
 
 # =========================== LISTING (Stage 1) ===========================
+LISTING_CONCURRENCY = 4  # politeness cap on simultaneous listing requests
+
+LAST_PAGE_SCRIPT = """
+let last = null;
+for (const a of document.querySelectorAll("a[href*='page=']")) {
+    const m = /[?&]page=(\\d+)/.exec(a.getAttribute("href") || "");
+    if (m) last = Math.max(last === null ? 0 : last, parseInt(m[1], 10));
+}
+return last;
+"""
+
+
 def extract_publications_from_page(web_driver: webdriver.Chrome, page_number: int) -> List[Dict]:
     target_url = f"{PUBLICATIONS_BASE_URL}?page={page_number}"
-    web_driver.get(target_url)
+    with METRICS.timed("listing_fetch"):
+        web_driver.get(target_url)
     handle_cookie_consent(web_driver)
-    try:
-        WebDriverWait(web_driver, 15).until(
-            lambda driver: driver.find_elements(By.CSS_SELECTOR, ".result-container h3.title a")
-                      or "No results" in driver.page_source
-        )
-    except TimeoutException:
-        pass
+    with METRICS.timed("listing_wait"):
+        try:
+            WebDriverWait(web_driver, 15).until(
+                lambda driver: driver.find_elements(By.CSS_SELECTOR, ".result-container h3.title a")
+                          or "No results" in driver.page_source
+            )
+        except TimeoutException:
+            METRICS.record_event("timeout", "listing_wait")
 
     publication_entries = []
     for container in web_driver.find_elements(By.CLASS_NAME, "result-container"):
@@ -142,114 +354,297 @@ def extract_publications_from_page(web_driver: webdriver.Chrome, page_number: in
     return publication_entries
 
 
-def collect_all_publication_links(max_page_limit: int, headless_browsing: bool = False, use_legacy_mode: bool = False) -> List[Dict]:
-    web_driver = initialize_webdriver(headless_browsing, use_legacy_mode)
+def collect_all_publication_links(max_page_limit: int, browser_pool: BrowserPool,
+                                  concurrency: int = LISTING_CONCURRENCY) -> List[Dict]:
+    collected_publications: List[Dict] = []
+    for page_publications in iter_publication_links(max_page_limit, browser_pool, concurrency):
+        collected_publications.extend(page_publications)
+    return collected_publications
+
+
+def _read_last_page_index(web_driver: webdriver.Chrome) -> Optional[int]:
     try:
-        web_driver.get(PUBLICATIONS_BASE_URL)
-        handle_cookie_consent(web_driver)
-        collected_publications: List[Dict] = []
-        for page_idx in range(max_page_limit):
-            print(f"Processing publication listing page {page_idx + 1} of {max_page_limit}")
-            page_publications = extract_publications_from_page(web_driver, page_idx)
-            if not page_publications:
-                print(f"No publications found on page {page_idx}. Stopping collection process.")
-                break
-            collected_publications.extend(page_publications)
-        unique_publications = {}
-        for publication in collected_publications:
-            unique_publications[publication["link"]] = publication
-        return list(unique_publications.values())
-    finally:
-        try:
-            web_driver.quit()
-        except Exception:
-            pass
+        return web_driver.execute_script(LAST_PAGE_SCRIPT)
+    except Exception:
+        return None
+
+
+def _fetch_listing_page(browser_pool: BrowserPool, page_number: int) -> Tuple[List[Dict], Optional[int]]:
+    with browser_pool.session() as web_driver:
+        page_publications = extract_publications_from_page(web_driver, page_number)
+        last_page_index = _read_last_page_index(web_driver) if page_number == 0 else None
+    return page_publications, last_page_index
+
+
+def iter_publication_links(max_page_limit: int, browser_pool: BrowserPool, concurrency: int = LISTING_CONCURRENCY):
+    """Yield each listing page's new (not yet seen) links as soon as that page is parsed.
+
+    Page 0 is fetched first to learn the last page from the pager; the rest are
+    fetched ``concurrency`` at a time. The first empty page caps the range and
+    cancels any queued requests beyond it.
+    """
+    if max_page_limit <= 0:
+        return
+    seen_links = set()
+
+    def new_links(page_publications: List[Dict]) -> List[Dict]:
+        fresh = []
+        for publication in page_publications:
+            if publication["link"] not in seen_links:
+                seen_links.add(publication["link"])
+                fresh.append(publication)
+        return fresh
+
+    print(f"Processing publication listing page 1 of {max_page_limit}")
+    first_page, last_page_index = _fetch_listing_page(browser_pool, 0)
+    if not first_page:
+        print("No publications found on page 0. Stopping collection process.")
+        return
+    yield new_links(first_page)
+
+    stop_page = max_page_limit
+    if last_page_index is not None:
+        stop_page = min(stop_page, last_page_index + 1)
+        print(f"Pager reports {last_page_index + 1} listing pages; scanning {stop_page}")
+
+    next_page = 1
+    in_flight: Dict = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, browser_pool.size))) as executor:
+        while in_flight or next_page < stop_page:
+            while next_page < stop_page and len(in_flight) < max(1, concurrency):
+                print(f"Processing publication listing page {next_page + 1} of {max_page_limit}")
+                in_flight[executor.submit(_fetch_listing_page, browser_pool, next_page)] = next_page
+                next_page += 1
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                page_idx = in_flight.pop(future)
+                if page_idx >= stop_page:
+                    continue
+                try:
+                    page_publications, _ = future.result()
+                except WebDriverException as web_error:
+                    METRICS.record_error("listing", web_error)
+                    print(f"Error loading listing page {page_idx}: {web_error}")
+                    continue
+                if not page_publications:
+                    print(f"No publications found on page {page_idx}. Stopping collection process.")
+                    stop_page = page_idx
+                    for pending, pending_idx in list(in_flight.items()):
+                        if pending_idx >= stop_page and pending.cancel():
+                            in_flight.pop(pending)
+                    continue
+                yield new_links(page_publications)
 
 
 # =========================== DETAIL (Stage 2) ===========================
-def _expand_author_sections(web_driver: webdriver.Chrome):
+NAVIGATION_XPATHS = [
+    "//a[normalize-space()='Overview']",
+    "//nav[contains(@class,'tabbed-navigation')]",
+    "//div[contains(@class,'navigation') and .//a[contains(.,'Overview')]]",
+]
+AUTHOR_META_NAMES = ["citation_author", "dc.contributor", "dc.contributor.author"]
+DATE_META_NAMES = ["citation_publication_date", "dc.date", "article:published_time"]
+DATE_SELECTORS = ["span.date", "time[datetime]", "time"]
+ABSTRACT_SELECTORS = [
+    "section#abstract .textblock", "section.abstract .textblock", "div.abstract .textblock",
+    "div#abstract", "section#abstract", "div.textblock",
+]
+EXPAND_BUTTON_XPATH = (
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show') or "
+    "contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'more')]"
+)
+
+# Collects every candidate field the extractor may fall back to in a single
+# chromedriver round-trip; the fallback order itself lives in Python below.
+PAGE_SNAPSHOT_SCRIPT = """
+const cfg = arguments[0];
+const xpathFirst = (xp, ctx) => document.evaluate(
+    xp, ctx || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const text = el => el ? (el.innerText || "") : null;
+const pageY = el => Math.round(el.getBoundingClientRect().top + window.scrollY);
+
+const navY = cfg.navXpaths.map(xp => { const el = xpathFirst(xp); return el ? pageY(el) : null; });
+const personLinks = Array.from(document.querySelectorAll("a[href*='/en/persons/']")).map(a => {
+    const span = a.querySelector("span");
+    return {href: a.getAttribute("href"), span: span ? text(span) : null, text: text(a), y: pageY(a)};
+});
+const dateEl = document.querySelector("span.date");
+let subtitle = null;
+if (dateEl) {
+    const box = xpathFirst("ancestor::*[contains(@class,'subtitle')][1]", dateEl) || dateEl.parentElement;
+    subtitle = text(box) || "";
+}
+const meta = {};
+for (const name of cfg.metaNames) {
+    meta[name] = Array.from(document.querySelectorAll(`meta[name="${name}"], meta[property="${name}"]`))
+        .map(el => el.getAttribute("content") || "");
+}
+const abstractHeadings = [];
+for (const h of document.querySelectorAll("h2, h3")) {
+    if (text(h).trim().toLowerCase().includes("abstract")) {
+        abstractHeadings.push(text(xpathFirst("./following::*[self::div or self::p or self::section][1]", h)));
+    }
+}
+return {
+    url: window.location.href,
+    h1: text(document.querySelector("h1")),
+    nav_y: navY,
+    person_links: personLinks,
+    subtitle: subtitle,
+    meta: meta,
+    json_ld: Array.from(document.querySelectorAll('script[type="application/ld+json"]')).map(s => s.textContent || ""),
+    dates: cfg.dateSelectors.map(sel => {
+        const el = document.querySelector(sel);
+        return el ? {datetime: el.getAttribute("datetime"), text: text(el)} : null;
+    }),
+    abstracts: cfg.abstractSelectors.map(sel => text(document.querySelector(sel))),
+    abstract_headings: abstractHeadings,
+};
+"""
+
+EXPAND_SECTIONS_SCRIPT = """
+const found = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+let clicked = 0;
+for (let i = 0; i < Math.min(found.snapshotLength, 2); i++) {
+    try {
+        const button = found.snapshotItem(i);
+        button.scrollIntoView({block: 'center'});
+        button.click();
+        clicked++;
+    } catch (e) {}
+}
+return clicked;
+"""
+
+
+# Text of every <link rel=stylesheet> the page loaded, @imports expanded, so the archive can
+# store it and replay can inline it. Cross-origin sheets cannot be read and are only counted.
+STYLESHEETS_SCRIPT = """
+const ruleText = sheet => Array.from(sheet.cssRules).map(rule =>
+    rule instanceof CSSImportRule && rule.styleSheet ? ruleText(rule.styleSheet) : rule.cssText).join("\\n");
+const sheets = [];
+let unreadable = 0;
+for (const sheet of document.styleSheets) {
+    if (!sheet.href || !sheet.ownerNode || sheet.ownerNode.tagName !== "LINK") continue;
+    try {
+        sheets.push({href: sheet.href, css: ruleText(sheet)});
+    } catch (e) {
+        unreadable++;
+    }
+}
+return {sheets: sheets, unreadable: unreadable};
+"""
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.I)
+_TAG_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+
+
+def inline_stylesheets(html: str, base_url: str, stylesheets: Dict[str, str]) -> str:
+    """Replace each ``<link rel=stylesheet>`` whose resolved URL is in ``stylesheets`` with a ``<style>``
+    holding its archived text, keeping ``media``; other links are left as they are."""
+    def replace(match):
+        attrs = {name.lower(): html_lib.unescape(double or single or bare)
+                 for name, double, single, bare in _TAG_ATTR_RE.findall(match.group(0))}
+        rel = attrs.get("rel", "").lower().split()
+        if "stylesheet" not in rel or "alternate" in rel:  # alternate sheets do not apply live either
+            return match.group(0)
+        href = urljoin(base_url, attrs.get("href", ""))
+        if href not in stylesheets:
+            return match.group(0)
+        media = f' media="{html_lib.escape(attrs["media"])}"' if attrs.get("media") else ""
+        css = re.sub(r"</(style)", r"<\\/\1", stylesheets[href], flags=re.I)
+        return f'<style data-archived-href="{html_lib.escape(href)}"{media}>{css}</style>'
+    return _LINK_TAG_RE.sub(replace, html)
+
+
+def _archive_stylesheets(web_driver: webdriver.Chrome, archive: PageArchive) -> Dict:
+    """Store the page's stylesheets; returns the page entry fields that record them."""
     try:
-        for expand_button in web_driver.find_elements(
-                By.XPATH,
-                "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show') or "
-                "contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'more')]"
-        )[:2]:
-            try:
-                web_driver.execute_script("arguments[0].scrollIntoView({block:'center'});", expand_button)
-                time.sleep(0.1)
-                expand_button.click()
-                time.sleep(0.2)
-            except Exception:
-                continue
+        found = web_driver.execute_script(STYLESHEETS_SCRIPT) or {}
     except Exception:
-        pass
+        found = {}
+    for sheet in found.get("sheets") or []:
+        archive.append_stylesheet(sheet["href"], sheet["css"])
+    return {"stylesheets": [sheet["href"] for sheet in found.get("sheets") or []],
+            "stylesheets_unreadable": found.get("unreadable", 0)}
 
 
-def _extract_authors_from_navigation_links(web_driver: webdriver.Chrome) -> List[Dict]:
-    navigation_y_position = None
-    for xpath_selector in [
-        "//a[normalize-space()='Overview']",
-        "//nav[contains(@class,'tabbed-navigation')]",
-        "//div[contains(@class,'navigation') and .//a[contains(.,'Overview')]]",
-    ]:
+def _expand_author_sections(web_driver: webdriver.Chrome):
+    with METRICS.timed("expand_sections"):
         try:
-            navigation_element = web_driver.find_element(By.XPATH, xpath_selector)
-            navigation_y_position = navigation_element.location.get("y", None)
-            if navigation_y_position:
-                break
+            if web_driver.execute_script(EXPAND_SECTIONS_SCRIPT, EXPAND_BUTTON_XPATH):
+                time.sleep(0.2)
         except Exception:
+            pass
+
+
+def take_page_snapshot(web_driver: webdriver.Chrome) -> Dict:
+    with METRICS.timed("snapshot"):
+        return web_driver.execute_script(PAGE_SNAPSHOT_SCRIPT, {
+            "navXpaths": NAVIGATION_XPATHS,
+            "metaNames": AUTHOR_META_NAMES + DATE_META_NAMES,
+            "dateSelectors": DATE_SELECTORS,
+            "abstractSelectors": ABSTRACT_SELECTORS,
+        }) or {}
+
+
+def _extract_authors_from_navigation_links(page_snapshot: Dict) -> List[Dict]:
+    navigation_y_position = None
+    for nav_y in page_snapshot.get("nav_y") or []:
+        if nav_y is None:
             continue
+        navigation_y_position = nav_y
+        if navigation_y_position:
+            break
     if navigation_y_position is None:
         navigation_y_position = 900  # fallback
 
+    base_url = page_snapshot.get("url") or ""
     author_candidates: List[Dict[str, Optional[str]]] = []
     processed_authors = set()
-    for author_link in web_driver.find_elements(By.CSS_SELECTOR, "a[href*='/en/persons/']"):
-        try:
-            link_y_position = author_link.location.get("y", 99999)
-            if link_y_position >= navigation_y_position:
-                continue
-            author_href = (author_link.get_attribute("href") or "").strip()
-            try:
-                author_name = author_link.find_element(By.CSS_SELECTOR, "span").text.strip()
-            except NoSuchElementException:
-                author_name = (author_link.text or "").strip()
-            if not _validate_person_name(author_name):
-                continue
-            author_key = (author_name, author_href)
-            if author_key in processed_authors:
-                continue
-            processed_authors.add(author_key)
-            author_candidates.append({"name": author_name, "profile": urljoin(web_driver.current_url, author_href)})
-        except Exception:
+    for author_link in page_snapshot.get("person_links") or []:
+        link_y_position = author_link.get("y")
+        if (99999 if link_y_position is None else link_y_position) >= navigation_y_position:
+            continue
+        author_href = urljoin(base_url, (author_link.get("href") or "").strip())
+        if author_link.get("span") is not None:
+            author_name = author_link["span"].strip()
+        else:
+            author_name = (author_link.get("text") or "").strip()
+        if not _validate_person_name(author_name):
+            continue
+        author_key = (author_name, author_href)
+        if author_key in processed_authors:
             continue
+        processed_authors.add(author_key)
+        author_candidates.append({"name": author_name, "profile": author_href})
 
     return _remove_duplicate_authors(author_candidates)
 
 
-def _extract_metadata_content(web_driver: webdriver.Chrome, metadata_attributes: List[str]) -> List[str]:
+def _extract_metadata_content(page_snapshot: Dict, metadata_attributes: List[str]) -> List[str]:
     metadata_values = []
     for attribute_name in metadata_attributes:
-        for meta_element in web_driver.find_elements(By.CSS_SELECTOR, f'meta[name="{attribute_name}"], meta[property="{attribute_name}"]'):
-            content_value = (meta_element.get_attribute("content") or "").strip()
+        for content_value in (page_snapshot.get("meta") or {}).get(attribute_name, []):
+            content_value = (content_value or "").strip()
             if content_value:
                 metadata_values.append(content_value)
     return _remove_duplicate_strings(metadata_values)
 
 
-def _parse_authors_from_json_ld(web_driver: webdriver.Chrome) -> List[str]:
-    import json as _json
+def _parse_authors_from_json_ld(page_snapshot: Dict) -> List[str]:
     author_names = []
-    for script_element in web_driver.find_elements(By.CSS_SELECTOR, 'script[type="application/ld+json"]'):
-        script_content = (script_element.get_attribute("textContent") or "").strip()
+    for script_content in page_snapshot.get("json_ld") or []:
+        script_content = (script_content or "").strip()
         if not script_content:
             continue
         try:
-            json_data = _json.loads(script_content)
+            json_data = json.loads(script_content)
         except Exception:
             continue
         data_objects = json_data if isinstance(json_data, list) else [json_data]
         for data_object in data_objects:
+            if not isinstance(data_object, dict):
+                continue
             author_field = data_object.get("author")
             if not author_field:
                 continue
@@ -265,19 +660,10 @@ def _parse_authors_from_json_ld(web_driver: webdriver.Chrome) -> List[str]:
     return _remove_duplicate_strings(author_names)
 
 
-def _extract_authors_from_subtitle_text(web_driver: webdriver.Chrome, publication_title: str) -> List[str]:
-    try:
-        date_element = web_driver.find_element(By.CSS_SELECTOR, "span.date")
-    except NoSuchElementException:
+def _extract_authors_from_subtitle_text(page_snapshot: Dict, publication_title: str) -> List[str]:
+    subtitle_text = page_snapshot.get("subtitle")
+    if subtitle_text is None:
         return []
-    try:
-        subtitle_container = date_element.find_element(By.XPATH, "ancestor::*[contains(@class,'subtitle')][1]")
-    except Exception:
-        try:
-            subtitle_container = date_element.find_element(By.XPATH, "..")
-        except Exception:
-            subtitle_container = None
-    subtitle_text = (subtitle_container.text if subtitle_container else "")
     if publication_title and publication_title in subtitle_text:
         subtitle_text = subtitle_text.replace(publication_title, "")
     subtitle_text = " ".join(subtitle_text.split()).strip()
@@ -292,81 +678,66 @@ def _convert_names_to_objects(name_list: List[str]) -> List[Dict]:
     return _remove_duplicate_authors([{"name": author_name, "profile": None} for author_name in name_list])
 
 
-def extract_publication_details(web_driver: webdriver.Chrome, publication_url: str, fallback_title: str) -> Dict:
-    web_driver.get(publication_url)
-    handle_cookie_consent(web_driver)
-    try:
-        WebDriverWait(web_driver, 18).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
-    except TimeoutException:
-        pass
-
+def build_publication_record(page_snapshot: Dict, publication_url: str, fallback_title: str) -> Dict:
+    """Apply the title/author/date/abstract fallback chain to a page snapshot (no browser calls)."""
     # Title
-    try:
-        publication_title = web_driver.find_element(By.CSS_SELECTOR, "h1").text.strip()
-    except NoSuchElementException:
+    if page_snapshot.get("h1") is not None:
+        publication_title = page_snapshot["h1"].strip()
+    else:
         publication_title = fallback_title or ""
 
-    _expand_author_sections(web_driver)
-
     # AUTHORS
-    publication_authors: List[Dict[str, Optional[str]]] = _extract_authors_from_navigation_links(web_driver)
+    author_source = "navigation"
+    publication_authors: List[Dict[str, Optional[str]]] = _extract_authors_from_navigation_links(page_snapshot)
     publication_authors = [author for author in publication_authors if _validate_person_name(author.get("name", ""))]
     if not publication_authors:
-        author_name_list = _extract_authors_from_subtitle_text(web_driver, publication_title)
+        author_source = "subtitle"
+        author_name_list = _extract_authors_from_subtitle_text(page_snapshot, publication_title)
         publication_authors = _convert_names_to_objects(author_name_list)
     if not publication_authors:
-        author_name_list = _extract_metadata_content(web_driver, ["citation_author", "dc.contributor", "dc.contributor.author"])
+        author_source = "meta"
+        author_name_list = _extract_metadata_content(page_snapshot, AUTHOR_META_NAMES)
         publication_authors = _convert_names_to_objects(author_name_list)
     if not publication_authors:
-        author_name_list = _parse_authors_from_json_ld(web_driver)
+        author_source = "json_ld"
+        author_name_list = _parse_authors_from_json_ld(page_snapshot)
         publication_authors = _convert_names_to_objects(author_name_list)
+    METRICS.record_event("authors", author_source if publication_authors else "none")
 
     # PUBLISHED DATE → YEAR
     publication_date_text = None
-    for css_selector in ["span.date", "time[datetime]", "time"]:
-        try:
-            date_element = web_driver.find_element(By.CSS_SELECTOR, css_selector)
-            publication_date_text = date_element.get_attribute("datetime") or date_element.text.strip()
-            if publication_date_text:
-                break
-        except NoSuchElementException:
+    for date_element in page_snapshot.get("dates") or []:
+        if date_element is None:
             continue
+        publication_date_text = date_element.get("datetime") or (date_element.get("text") or "").strip()
+        if publication_date_text:
+            break
     if not publication_date_text:
-        date_metadata = _extract_metadata_content(web_driver, ["citation_publication_date", "dc.date", "article:published_time"])
+        date_metadata = _extract_metadata_content(page_snapshot, DATE_META_NAMES)
         if date_metadata:
             publication_date_text = date_metadata[0]
+            METRICS.record_event("date", "meta")
 
-    publication_year = None
-    if publication_date_text:
-        year_match = re.search(r"(19|20)\d{2}", publication_date_text)
-        if year_match:
-            publication_year = int(year_match.group(0))
+    publication_year = _parse_publication_year(publication_date_text) if publication_date_text else None
 
     # ABSTRACT
     abstract_content = None
-    for css_selector in [
-        "section#abstract .textblock", "section.abstract .textblock", "div.abstract .textblock",
-        "div#abstract", "section#abstract", "div.textblock",
-    ]:
-        try:
-            abstract_element = web_driver.find_element(By.CSS_SELECTOR, css_selector)
-            abstract_text = abstract_element.text.strip()
-            if abstract_text and len(abstract_text) > 15:
-                abstract_content = abstract_text
+    for selector, abstract_text in zip(ABSTRACT_SELECTORS, page_snapshot.get("abstracts") or []):
+        abstract_text = (abstract_text or "").strip()
+        if abstract_text and len(abstract_text) > 15:
+            abstract_content = abstract_text
+            METRICS.record_event("abstract", selector)
+            break
+    if not abstract_content:
+        for following_text in page_snapshot.get("abstract_headings") or []:
+            if following_text is None:
+                break  # heading with nothing after it ended the old XPath scan too
+            if following_text.strip():
+                abstract_content = following_text.strip()
+                METRICS.record_event("abstract", "heading")
                 break
-        except NoSuchElementException:
-            continue
     if not abstract_content:
-        try:
-            for heading_element in web_driver.find_elements(By.CSS_SELECTOR, "h2, h3"):
-                if "abstract" in heading_element.text.strip().lower():
-                    next_element = heading_element.find_element(By.XPATH, "./following::*[self::div or self::p or self::section][1]")
-                    abstract_text = next_element.text.strip()
-                    if abstract_text:
-                        abstract_content = abstract_text
-                        break
-        except Exception:
-            pass
+        METRICS.record_event("abstract", "none")
 
     return {
         "title": publication_title,
@@ -377,79 +748,279 @@ def extract_publication_details(web_driver: webdriver.Chrome, publication_url: s
     }
 
 
+def load_publication_page(web_driver: webdriver.Chrome, publication_url: str):
+    with METRICS.timed("fetch"):
+        web_driver.get(publication_url)
+    handle_cookie_consent(web_driver)
+    with METRICS.timed("wait"):
+        try:
+            WebDriverWait(web_driver, 18).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
+        except TimeoutException:
+            METRICS.record_event("timeout", "wait_h1")
+
+
+def extract_loaded_publication(web_driver: webdriver.Chrome, publication_url: str, fallback_title: str,
+                               archive: Optional[PageArchive] = None) -> Dict:
+    with METRICS.timed("extract"):
+        _expand_author_sections(web_driver)
+        if archive is not None:
+            # Archive the expanded DOM so replay sees exactly what the snapshot saw.
+            with METRICS.timed("archive"):
+                archive.append(publication_url, web_driver.page_source, title=fallback_title,
+                               final_url=web_driver.current_url, **_archive_stylesheets(web_driver, archive))
+        page_snapshot = take_page_snapshot(web_driver)
+        with METRICS.timed("parse"):
+            return build_publication_record(page_snapshot, publication_url, fallback_title)
+
+
+def extract_publication_details(web_driver: webdriver.Chrome, publication_url: str, fallback_title: str) -> Dict:
+    load_publication_page(web_driver, publication_url)
+    return extract_loaded_publication(web_driver, publication_url, fallback_title)
+
+
+def _load_archived_html(web_driver: webdriver.Chrome, html: str):
+    web_driver.get("about:blank")
+    frame_id = web_driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]["frame"]["id"]
+    web_driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame_id, "html": html})
+
+
 # =========================== Workers ===========================
-def process_publication_batch(publication_batch: List[Dict], run_headless: bool, use_legacy_mode: bool) -> List[Dict]:
-    # batch_driver = initialize_webdriver(headless=run_headless, legacy_headless=use_legacy_mode)
-    batch_driver = initialize_webdriver(run_headless=run_headless, use_legacy_mode=use_legacy_mode)
-    processed_publications: List[Dict] = []
-    try:
-        for batch_index, publication_item in enumerate(publication_batch, 1):
-            try:
-                publication_record = extract_publication_details(batch_driver, publication_item["link"], publication_item.get("title", ""))
-                processed_publications.append(publication_record)
-                if batch_index % 5 == 0:
-                    print(f"Batch processing: {batch_index} of {len(publication_batch)} publications completed")
-            except WebDriverException as web_error:
-                print(f"Error processing publication {publication_item['link']}: {web_error}")
+def process_publication(publication_item: Dict, browser_pool: BrowserPool, retries: int = DETAIL_RETRIES,
+                        archive: Optional[PageArchive] = None) -> Optional[Dict]:
+    """Scrape one detail page on a pooled session, retrying WebDriver failures with backoff."""
+    page_started = time.time()
+    for attempt in range(retries + 1):
+        try:
+            with METRICS.timed("page_total"), browser_pool.session() as web_driver:
+                load_publication_page(web_driver, publication_item["link"])
+                publication_record = extract_loaded_publication(web_driver, publication_item["link"],
+                                                                publication_item.get("title", ""), archive)
+            METRICS.record_page(page_started)
+            return publication_record
+        except WebDriverException as web_error:
+            if attempt < retries:
+                METRICS.record_retry("detail", web_error)
+                time.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
                 continue
+            METRICS.record_error("detail", web_error)
+            print(f"Error processing publication {publication_item['link']}: {web_error}")
+    return None
+
+
+def replay_archived_page(archive: PageArchive, entry: Dict, browser_pool: BrowserPool,
+                         stylesheets: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+    """Re-run extraction over one archived page in an offline browser, its archived stylesheets inlined."""
+    page_started = time.time()
+    try:
+        _, html = archive.read(entry)
+        if stylesheets:
+            html = inline_stylesheets(html, entry.get("final_url") or entry["url"], stylesheets)
+        with METRICS.timed("page_total"), browser_pool.session() as web_driver:
+            _load_archived_html(web_driver, html)
+            page_snapshot = take_page_snapshot(web_driver)
+        page_snapshot["url"] = entry.get("final_url") or entry["url"]
+        with METRICS.timed("parse"):
+            publication_record = build_publication_record(page_snapshot, entry["url"], entry.get("title", ""))
+        METRICS.record_page(page_started)
+        return publication_record
+    except Exception as replay_error:
+        METRICS.record_error("replay", replay_error)
+        print(f"Error replaying {entry['url']}: {replay_error}")
+        return None
+
+
+def replay_archive(archive_directory: str, worker_count: int, use_legacy_mode: bool = False) -> List[Dict]:
+    """Extract records from archived pages only: network is disabled in every browser.
+
+    Pages archived without their stylesheets (before they were stored, or cross-origin ones)
+    render unstyled, so their author cutoff and abstract text may differ from a live crawl.
+    """
+    archive = PageArchive(archive_directory)
+    archive_entries = archive.entries()
+    stylesheets = archive.stylesheets()
+    unstyled = sum(1 for entry in archive_entries if "stylesheets" not in entry or entry.get("stylesheets_unreadable"))
+    if unstyled:
+        print(f"Warning: {unstyled} archived pages lack some stylesheets; their records may differ from a live crawl")
+    replay_pool = BrowserPool(worker_count, run_headless=True, use_legacy_mode=use_legacy_mode, offline=True)
+    replayed: List[Dict] = []
+    try:
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="replay") as executor:
+            replay_futures = [executor.submit(replay_archived_page, archive, entry, replay_pool, stylesheets)
+                              for entry in archive_entries]
+            for completed, future in enumerate(as_completed(replay_futures), 1):
+                publication_record = future.result()
+                if publication_record is not None:
+                    replayed.append(publication_record)
+                if completed % 50 == 0 or completed == len(replay_futures):
+                    print(f"Replay progress: {completed} of {len(replay_futures)} archived pages")
     finally:
-        try:
-            batch_driver.quit()
-        except Exception:
-            pass
-    return processed_publications
+        replay_pool.close()
+    return replayed
+
 
+def compare_records(live_records: List[Dict], replayed_records: List[Dict]) -> List[str]:
+    """Differences between a live crawl and a replay of its archive, matched by ``pub_url``."""
+    live_by_url = {record["pub_url"]: record for record in live_records}
+    differences = []
+    for replayed_record in replayed_records:
+        live_record = live_by_url.get(replayed_record["pub_url"])
+        if live_record is None:
+            continue  # archived in an earlier crawl
+        changed = [field for field in sorted(set(live_record) | set(replayed_record))
+                   if live_record.get(field) != replayed_record.get(field)]
+        if changed:
+            differences.append(f"{replayed_record['pub_url']}: {', '.join(changed)} differ")
+    return differences
 
-def split_into_batches(publication_items: List[Dict], batch_count: int) -> List[List[Dict]]:
-    if batch_count <= 1:
-        return [publication_items]
-    batch_size = ceil(len(publication_items) / batch_count)
-    return [publication_items[i:i + batch_size] for i in range(0, len(publication_items), batch_size)]
+
+def write_jsonl(publication_records: List[Dict], output_file_path: Path):
+    with output_file_path.open("w", encoding="utf-8") as output_file:
+        for publication_record in publication_records:
+            json.dump(publication_record, output_file, ensure_ascii=False)
+            output_file.write("\n")
+
+
+def _emit_record(on_record: Callable[[Dict], None], detail_future):
+    if not detail_future.cancelled() and detail_future.exception() is None and detail_future.result() is not None:
+        on_record(detail_future.result())
 
 
 # =========================== Orchestrator ===========================
-def main():
+def main(argv: Optional[List[str]] = None, on_record: Optional[Callable[[Dict], None]] = None) -> Optional[Path]:
+    """Run the crawler; returns the JSONL path written, or None when nothing was collected.
+
+    ``on_record`` is called (from worker threads) with each record the moment it
+    is extracted, so a downstream indexer can consume the crawl as it happens.
+    """
     argument_parser = argparse.ArgumentParser(description="Coventry PurePortal scraper (listing → details, clean author links).")
     argument_parser.add_argument("--outdir", default="data")
     argument_parser.add_argument("--max-pages", type=int, default=50, help="Max listing pages to scan.")
-    argument_parser.add_argument("--workers", type=int, default=8, help="Parallel headless browsers for detail pages.")
+    argument_parser.add_argument("--workers", type=int, default=None,
+                                 help="Parallel headless browsers for detail pages (default 8; CPU count with --replay).")
     argument_parser.add_argument("--listing-headless", action="store_true", help="Run listing headless.")
     argument_parser.add_argument("--legacy-headless", action="store_true", help="Use legacy --headless.")
-    parsed_args = argument_parser.parse_args()
+    argument_parser.add_argument("--listing-concurrency", type=int, default=LISTING_CONCURRENCY,
+                                 help="Listing pages fetched at once (politeness limit).")
+    argument_parser.add_argument("--recycle-after", type=int, default=RECYCLE_AFTER_PAGES, help="Restart a browser after this many pages.")
+    argument_parser.add_argument("--max-heap-mb", type=float, default=MAX_BROWSER_HEAP_MB, help="Restart a browser once its JS heap exceeds this.")
+    argument_parser.add_argument("--no-block-resources", action="store_true", help="Load images, fonts and trackers too.")
+    argument_parser.add_argument("--retries", type=int, default=DETAIL_RETRIES, help="Retries per detail page on WebDriver errors.")
+    argument_parser.add_argument("--metrics-json", default=None, help="Run report path (default: <outdir>/crawl_report.json).")
+    argument_parser.add_argument("--metrics-prom", default=None, help="Prometheus textfile path (default: <outdir>/crawl_metrics.prom).")
+    argument_parser.add_argument("--archive", default=None, help="Append each detail page's raw HTML to this archive directory.")
+    argument_parser.add_argument("--replay", default=None, metavar="ARCHIVE_DIR",
+                                 help="Re-extract records from an archive offline instead of crawling.")
+    argument_parser.add_argument("--compare", default=None, metavar="LIVE_JSONL",
+                                 help="With --replay: report records that differ from this live crawl output.")
+    argument_parser.add_argument("--emit-jsonl", action="store_true",
+                                 help="Stream records to stdout as JSONL while crawling (progress goes to stderr).")
+    parsed_args = argument_parser.parse_args(argv)
+    if parsed_args.compare and not parsed_args.replay:
+        argument_parser.error("--compare only applies to --replay")
+
+    if parsed_args.emit_jsonl:
+        record_stream, emit_lock, downstream = sys.stdout, threading.Lock(), on_record
+
+        def on_record(publication_record: Dict):
+            with emit_lock:
+                record_stream.write(json.dumps(publication_record, ensure_ascii=False) + "\n")
+                record_stream.flush()
+            if downstream is not None:
+                downstream(publication_record)
+
+        with redirect_stdout(sys.stderr):
+            return run_crawl(parsed_args, on_record)
+    return run_crawl(parsed_args, on_record)
+
+
+def run_crawl(parsed_args: argparse.Namespace, on_record: Optional[Callable[[Dict], None]] = None) -> Optional[Path]:
+    METRICS.reset()
 
     output_directory = Path(parsed_args.outdir)
     output_directory.mkdir(parents=True, exist_ok=True)
 
-    # Stage 1: listing
-    print(f"Stage 1: Gathering publication links from up to {parsed_args.max_pages} pages")
-    publication_listing = collect_all_publication_links(parsed_args.max_pages, headless_browsing=parsed_args.listing_headless,
-                                       use_legacy_mode=parsed_args.legacy_headless)
-    if not publication_listing:
-        print("No publications discovered during listing collection.", file=sys.stderr)
-        return
-    (output_directory / "publications_links.json").write_text(json.dumps(publication_listing, indent=2), encoding="utf-8")
-    print(f"Stage 1 complete: Found {len(publication_listing)} unique publication links")
-
-    # Stage 2: details
-    print(f"Stage 2: Extracting detailed information using {parsed_args.workers} parallel workers")
-    publication_batches = split_into_batches(publication_listing, max(1, parsed_args.workers))
-    detailed_results: List[Dict] = []
-    with ThreadPoolExecutor(max_workers=max(1, parsed_args.workers)) as executor:
-        batch_futures = [executor.submit(process_publication_batch, batch, True, parsed_args.legacy_headless) for batch in publication_batches]
-        completed_batches = 0
-        for future in as_completed(batch_futures):
-            batch_results = future.result() or []
-            detailed_results.extend(batch_results)
-            completed_batches += 1
-            print(f"Stage 2 progress: {completed_batches} of {len(publication_batches)} batches completed (added {len(batch_results)} publications)")
+    if parsed_args.replay:
+        replay_workers = max(1, parsed_args.workers or os.cpu_count() or 1)
+        print(f"Replaying archived pages from {parsed_args.replay} with {replay_workers} offline browsers")
+        live_records = None
+        if parsed_args.compare:  # read first: the replay output may overwrite it
+            with open(parsed_args.compare, "r", encoding="utf-8") as live_file:
+                live_records = [json.loads(line) for line in live_file if line.strip()]
+        replayed = replay_archive(parsed_args.replay, replay_workers, parsed_args.legacy_headless)
+        output_file_path = output_directory / "publications.jsonl"
+        write_jsonl(replayed, output_file_path)
+        if on_record is not None:
+            for publication_record in replayed:
+                on_record(publication_record)
+        METRICS.write(str(output_directory / "replay_report.json"))
+        print(f"Replay complete: Saved {len(replayed)} publication records to {output_file_path}")
+        if live_records is not None:
+            differences = compare_records(live_records, replayed)
+            for difference in differences[:20]:
+                print(f"  {difference}")
+            print(f"Replay check: {len(differences)} of {len(replayed)} replayed records differ from {parsed_args.compare}")
+        return output_file_path
+
+    worker_count = max(1, parsed_args.workers or 8)
+    page_archive = PageArchive(parsed_args.archive) if parsed_args.archive else None
+
+    detail_pool = BrowserPool(worker_count, run_headless=True, use_legacy_mode=parsed_args.legacy_headless,
+                              recycle_after=parsed_args.recycle_after, max_heap_mb=parsed_args.max_heap_mb,
+                              block_resources=not parsed_args.no_block_resources)
+    # A headless listing run can borrow a detail session; a visible one needs its own window.
+    listing_pool = detail_pool if parsed_args.listing_headless else BrowserPool(
+        max(1, parsed_args.listing_concurrency), run_headless=False, use_legacy_mode=parsed_args.legacy_headless,
+        block_resources=not parsed_args.no_block_resources)
+    try:
+        # Stage 1 feeds Stage 2: detail pages are queued as soon as their listing page is parsed.
+        print(f"Stage 1: Gathering publication links from up to {parsed_args.max_pages} pages "
+              f"({parsed_args.listing_concurrency} at a time)")
+        print(f"Stage 2: Extracting detailed information using {worker_count} parallel workers")
+        publication_listing: List[Dict] = []
+        detailed_results: List[Dict] = []
+        stage_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="detail") as executor:
+            detail_futures = []
+            try:
+                for page_publications in iter_publication_links(parsed_args.max_pages, listing_pool,
+                                                                parsed_args.listing_concurrency):
+                    publication_listing.extend(page_publications)
+                    for item in page_publications:
+                        detail_future = executor.submit(process_publication, item, detail_pool, parsed_args.retries, page_archive)
+                        if on_record is not None:
+                            detail_future.add_done_callback(partial(_emit_record, on_record))
+                        detail_futures.append(detail_future)
+            finally:
+                if listing_pool is not detail_pool:
+                    listing_pool.close()
+            if not publication_listing:
+                print("No publications discovered during listing collection.", file=sys.stderr)
+                return None
+            (output_directory / "publications_links.json").write_text(json.dumps(publication_listing, indent=2), encoding="utf-8")
+            print(f"Stage 1 complete: Found {len(publication_listing)} unique publication links")
+
+            for completed, future in enumerate(as_completed(detail_futures), 1):
+                publication_record = future.result()
+                if publication_record is not None:
+                    detailed_results.append(publication_record)
+                if completed % 5 == 0 or completed == len(detail_futures):
+                    print(f"Stage 2 progress: {completed} of {len(detail_futures)} publications processed")
+        stage_minutes = (time.perf_counter() - stage_started) / 60
+        print(f"Stage 2 throughput: {len(detailed_results) / max(stage_minutes, 1e-9):.1f} pages/min "
+              f"({detail_pool.sessions_started} browser sessions started, {detail_pool.sessions_recycled} recycled)")
+    finally:
+        detail_pool.close()
+        METRICS.write(parsed_args.metrics_json or str(output_directory / "crawl_report.json"),
+                      parsed_args.metrics_prom or str(output_directory / "crawl_metrics.prom"))
+        print("Time by step:")
+        for summary_line in METRICS.summary_lines():
+            print(f"  {summary_line}")
 
     # Save JSONL
     output_file_path = output_directory / "publications.jsonl"
-    with output_file_path.open("w", encoding="utf-8") as output_file:
-        for publication_record in detailed_results:
-            json.dump(publication_record, output_file, ensure_ascii=False)
-            output_file.write("\n")
+    write_jsonl(detailed_results, output_file_path)
     print(f"Process complete: Saved {len(detailed_results)} publication records to {output_file_path}")
+    return output_file_path
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""Near-duplicate publications: MinHash signatures + LSH banding + union-find.
+
+``indexer.doc_id`` only merges records whose title+year hash is identical, so
+the same paper with different title punctuation, or listed as both preprint
+and journal article, was indexed several times. Each record's title and
+abstract are cut into word shingles and summarized by a MinHash signature.
+Records that agree on every row of at least one band land in the same LSH
+bucket, and only those candidate pairs are compared, so clustering stays
+roughly linear in the number of records. Pairs whose estimated Jaccard
+similarity passes the threshold (or that share a DOI) are merged, and one
+canonical record is kept per cluster.
+"""
+import argparse, json, re, time, zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from preprocess import normalize
+
+NUM_PERM = 128
+BANDS = 16            # 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+SHINGLE_SIZE = 3
+THRESHOLD = 0.8       # estimated Jaccard needed to merge a candidate pair
+_PRIME = (1 << 31) - 1  # h(x) = (a*x + b) mod p with a, b, x < p: a*x < 2^62, exact in uint64
+_PREPRINT_RE = re.compile(r'preprint|arxiv|ssrn|working paper|discussion paper', re.I)
+_DOI_RE = re.compile(r'10\.\d{4,9}/\S+')
+
+
+def shingles(rec: dict, size: int = SHINGLE_SIZE) -> List[int]:
+    """crc32 of each ``size``-word shingle of title + abstract (stopwords dropped, lightly stemmed)."""
+    toks = normalize(f"{rec.get('title', '')} {rec.get('abstract', '')}")
+    if len(toks) < size:
+        grams = [' '.join(toks)] if toks else []
+    else:
+        grams = [' '.join(toks[i:i + size]) for i in range(len(toks) - size + 1)]
+    return sorted({zlib.crc32(g.encode('utf-8')) for g in grams})
+
+
+def normalized_doi(rec: dict) -> Optional[str]:
+    m = _DOI_RE.search(str(rec.get('doi') or ''))
+    return m.group(0).lower().rstrip('.') if m else None
+
+
+def canonical_key(rec: dict) -> tuple:
+    """Higher is better: has a DOI, published (not a preprint), longer abstract, more authors, later year."""
+    where = f"{rec.get('title', '')} {rec.get('pub_url', '')} {rec.get('type', '')} {rec.get('journal', '')}"
+    return (normalized_doi(rec) is not None, bool(rec.get('journal')), not _PREPRINT_RE.search(where),
+            len(rec.get('abstract') or ''), len(rec.get('authors') or []), rec.get('year') or 0)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        self.parent[rb] = ra
+        return True
+
+
+class NearDuplicates:
+    """Collects records (``add``) and clusters them (``clusters``) once all have arrived."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, threshold: float = THRESHOLD, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.num_perm, self.bands, self.rows, self.threshold = num_perm, bands, num_perm // bands, threshold
+        rng = np.random.RandomState(seed)
+        # Universal hash family: a uniform in [1, p), b uniform in [0, p), shingles reduced mod p first.
+        self._a = rng.randint(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self.ids: List[str] = []
+        self.records: List[dict] = []
+        self._sigs: List[np.ndarray] = []
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._doi: Dict[str, int] = {}
+        self._doi_pairs: List[Tuple[int, int]] = []
+
+    def signature(self, rec: dict) -> np.ndarray:
+        sh = shingles(rec)
+        if not sh:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        x = np.asarray(sh, dtype=np.uint64)[:, None] % np.uint64(_PRIME)
+        return ((x * self._a + self._b) % np.uint64(_PRIME)).min(axis=0)
+
+    def add(self, did: str, rec: dict):
+        i = len(self.ids)
+        sig = self.signature(rec)
+        self.ids.append(did)
+        self.records.append(rec)
+        self._sigs.append(sig)
+        if sig[0] != np.iinfo(np.uint64).max:  # records without text only merge on DOI
+            for band, bucket in enumerate(self._buckets):
+                bucket[sig[band * self.rows:(band + 1) * self.rows].tobytes()].append(i)
+        doi = normalized_doi(rec)
+        if doi:
+            if doi in self._doi:
+                self._doi_pairs.append((self._doi[doi], i))
+            else:
+                self._doi[doi] = i
+
+    def similarity(self, i: int, j: int) -> float:
+        """MinHash estimate of the Jaccard similarity of two records' shingle sets."""
+        return float(np.mean(self._sigs[i] == self._sigs[j]))
+
+    def clusters(self) -> Tuple[List[List[int]], Dict]:
+        """Clusters of two or more record positions (canonical first) and stats about the run."""
+        t0 = time.perf_counter()
+        uf = _UnionFind(len(self.ids))
+        for i, j in self._doi_pairs:
+            uf.union(i, j)
+        candidates = verified = 0
+        for bucket in self._buckets:
+            for members in bucket.values():
+                for x in range(1, len(members)):
+                    for y in range(x):
+                        i, j = members[y], members[x]
+                        if uf.find(i) == uf.find(j):
+                            continue
+                        candidates += 1
+                        if self.similarity(i, j) >= self.threshold:
+                            uf.union(i, j)
+                            verified += 1
+        groups = defaultdict(list)
+        for i in range(len(self.ids)):
+            groups[uf.find(i)].append(i)
+        out = []
+        for members in groups.values():
+            if len(members) > 1:
+                members.sort(key=lambda i: canonical_key(self.records[i]), reverse=True)
+                out.append(members)
+        sizes = Counter(len(m) for m in out)
+        stats = {
+            'records': len(self.ids),
+            'clusters': len(out),
+            'duplicates_removed': sum(len(m) - 1 for m in out),
+            'largest_cluster': max(sizes, default=0),
+            'cluster_sizes': {str(k): v for k, v in sorted(sizes.items())},
+            'doi_matches': len(self._doi_pairs),
+            'candidate_pairs': candidates,
+            'merged_pairs': verified,
+            'threshold': self.threshold,
+            'bands': self.bands, 'rows': self.rows,
+            'cluster_seconds': round(time.perf_counter() - t0, 3),
+        }
+        return out, stats
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Report near-duplicate publications in a JSONL crawl (dry run).')
+    ap.add_argument('--in', dest='inp', required=True)
+    ap.add_argument('--threshold', type=float, default=THRESHOLD)
+    ap.add_argument('--report', help='Write clusters + stats as JSON to this path')
+    args = ap.parse_args()
+
+    from indexer import doc_id, read_jsonl
+    nd, seen = NearDuplicates(threshold=args.threshold), set()
+    t0 = time.perf_counter()
+    for rec in read_jsonl(args.inp):
+        did = doc_id(rec)
+        if did not in seen:
+            seen.add(did)
+            nd.add(did, rec)
+    groups, stats = nd.clusters()
+    stats['total_seconds'] = round(time.perf_counter() - t0, 3)
+    for members in groups:
+        keep = nd.records[members[0]]
+        print(f"keep  {keep.get('title')} ({keep.get('year')})  {keep.get('pub_url')}")
+        for i in members[1:]:
+            rec = nd.records[i]
+            print(f"  dup {nd.similarity(members[0], i):.2f}  {rec.get('title')} ({rec.get('year')})  {rec.get('pub_url')}")
+    print(json.dumps(stats, indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'stats': stats, 'clusters': [[nd.ids[i] for i in m] for m in groups]}, f, indent=2)
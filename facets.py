@@ -0,0 +1,108 @@
+"""Columnar year / author facets.
+
+The indexer stores, aligned with the order of ``meta['docs']``:
+
+- ``year``: publication year per doc (0 when unknown)
+- ``author_ptr`` / ``author_ids``: a CSR mapping doc row -> author ids, so the
+  authors of row ``i`` are ``author_ids[author_ptr[i]:author_ptr[i + 1]]``
+- ``authors``: the interned author names the ids point into
+
+Facets for a result set are then ``np.bincount`` over the rows it matched,
+instead of a walk over every matched record's dicts. NumPy is imported only
+when facets are asked for, so plain searches keep their fast start-up.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+FACET_FIELDS = ('category', 'year', 'author')
+TOP_AUTHORS = 10
+_SPACE_RE = re.compile(r'\s+')
+
+
+def build_columns(docs: Dict[str, dict]) -> dict:
+    """Year and author columns for ``docs`` (plain lists, stored in index.json)."""
+    author_id: Dict[str, int] = {}
+    years, ptr, ids = [], [0], []
+    for rec in docs.values():
+        y = rec.get('year')
+        years.append(y if isinstance(y, int) else 0)
+        row = []
+        for a in rec.get('authors', []):
+            name = _SPACE_RE.sub(' ', a.get('name') or '').strip()
+            if name:
+                aid = author_id.setdefault(name, len(author_id))
+                if aid not in row:
+                    row.append(aid)
+        ids.extend(row)
+        ptr.append(len(ids))
+    return {'year': years, 'author_ptr': ptr, 'author_ids': ids, 'authors': list(author_id)}
+
+
+class FacetColumns:
+    """NumPy views of the index columns plus doc id -> row."""
+
+    def __init__(self, meta: dict):
+        import numpy as np
+        self.np = np
+        cols = meta.get('columns') or build_columns(meta['docs'])  # indexes built before the columns existed
+        self.row = {did: i for i, did in enumerate(meta['docs'])}
+        self.year = np.asarray(cols['year'], dtype=np.int32)
+        self.author_ptr = np.asarray(cols['author_ptr'], dtype=np.int64)
+        self.author_ids = np.asarray(cols['author_ids'], dtype=np.int32)
+        self.authors: List[str] = cols['authors']
+        self._set_min_year()
+
+    @classmethod
+    def from_arrays(cls, year, author_ptr, author_ids, authors) -> 'FacetColumns':
+        """Columns that already are arrays (shared_index); doc ids are then the row numbers."""
+        import numpy as np
+        self = cls.__new__(cls)
+        self.np, self.row = np, None
+        self.year, self.author_ptr, self.author_ids, self.authors = year, author_ptr, author_ids, authors
+        self._set_min_year()
+        return self
+
+    def _set_min_year(self):
+        known = self.year[self.year > 0]
+        self.min_year = int(known.min()) if len(known) else 0
+
+    def rows(self, dids: Iterable[str]):
+        row = self.row
+        if row is None:
+            return self.np.fromiter(dids, dtype=self.np.int64)
+        return self.np.fromiter((row[d] for d in dids), dtype=self.np.int64)
+
+    def year_counts(self, rows) -> Dict[int, int]:
+        np = self.np
+        years = self.year[rows]
+        years = years[years > 0] - self.min_year
+        counts = np.bincount(years)
+        return {int(y) + self.min_year: int(counts[y]) for y in np.flatnonzero(counts)}
+
+    def author_counts(self, rows, top: Optional[int] = TOP_AUTHORS) -> Dict[str, int]:
+        """The ``top`` most frequent authors of ``rows`` (all of them for None); ties by name."""
+        np = self.np
+        starts, ends = self.author_ptr[rows], self.author_ptr[rows + 1]
+        lens = ends - starts
+        total = int(lens.sum())
+        if not total:
+            return {}
+        # Concatenate the CSR slices of the selected rows without a Python loop.
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lens)[:-1])), lens)
+        ids = self.author_ids[offsets + np.arange(total)]
+        counts = np.bincount(ids, minlength=len(self.authors))
+        best = np.flatnonzero(counts)
+        if top is not None and top < len(best):
+            kth = np.partition(counts[best], len(best) - top)[len(best) - top]
+            best = best[counts[best] >= kth]  # everything tied with the last place, cut after sorting
+        names = self.authors
+        best = sorted(best.tolist(), key=lambda i: (-counts[i], names[i]))[:top]
+        return {names[i]: int(counts[i]) for i in best}
+
+
+def facet_columns(meta: dict) -> FacetColumns:
+    """Built once per loaded index and kept on ``meta``."""
+    cached = meta.get('_facet_columns')
+    if cached is None:
+        cached = meta['_facet_columns'] = FacetColumns(meta)
+    return cached
@@ -1,59 +1,156 @@
-import argparse, json, math, hashlib
+import argparse, json, math, hashlib, sys
 from collections import defaultdict, Counter
-from typing import Dict, List
+from typing import Dict, Iterable
+from authors import build_author_index
+from facets import build_columns
 from preprocess import normalize
 
 def doc_id(rec: dict) -> str:
     h = hashlib.sha1((rec.get('title','') + str(rec.get('year',''))).encode('utf-8')).hexdigest()
     return f"hash:{h[:16]}"
 
-def build_index(in_jsonl: str, index_out: str, postings_out: str):
-    docs = {}
-    corpus_tokens = {}
+class IndexBuilder:
+    """Incremental TF-IDF index: records are tokenized and posted as they arrive, idf is fixed at seal()."""
 
-    with open(in_jsonl, 'r', encoding='utf-8') as f:
-        for line in f:
-            rec = json.loads(line)
-            did = doc_id(rec)
-            if did in docs:
-                continue  # dedupe
-            docs[did] = rec
-            # index title + abstract + authors' names
-            author_names = ' '.join(a.get('name','') for a in rec.get('authors', []))
-            text = f"{rec.get('title','')} {rec.get('abstract','')} {author_names}"
-            tokens = normalize(text)
-            corpus_tokens[did] = tokens
-
-    df = Counter()
-    for toks in corpus_tokens.values():
-        df.update(set(toks))
-
-    N = len(corpus_tokens)
-    idf = {t: math.log((N + 1) / (df_t + 1)) + 1.0 for t, df_t in df.items()}
-
-    postings = defaultdict(list)
-    for did, toks in corpus_tokens.items():
-        tf = Counter(toks)
+    def __init__(self, dedupe: bool = False):
+        self.docs: Dict[str, dict] = {}
+        self.df = Counter()
+        self.postings = defaultdict(list)
+        self.near_dupes = None
+        if dedupe:
+            from dedupe import NearDuplicates  # numpy only needed with --dedupe
+            self.near_dupes = NearDuplicates()
+
+    def add(self, rec: dict) -> bool:
+        did = doc_id(rec)
+        if did in self.docs:
+            return False  # dedupe
+        self.docs[did] = rec
+        if self.near_dupes is not None:
+            self.near_dupes.add(did, rec)
+        # index title + abstract + authors' names
+        author_names = ' '.join(a.get('name','') for a in rec.get('authors', []))
+        text = f"{rec.get('title','')} {rec.get('abstract','')} {author_names}"
+        tf = Counter(normalize(text))
+        self.df.update(tf.keys())
         for t, c in tf.items():
-            postings[t].append((did, c))
+            self.postings[t].append((did, c))
+        return True
+
+    def add_all(self, records: Iterable[dict]):
+        for rec in records:
+            self.add(rec)
+
+    def drop_near_duplicates(self) -> dict:
+        """Keep one canonical record per near-duplicate cluster; the others leave docs, postings and df."""
+        groups, stats = self.near_dupes.clusters()
+        ids = self.near_dupes.ids
+        dropped = set()
+        for members in groups:
+            keep = self.docs[ids[members[0]]]
+            keep['duplicate_urls'] = [self.docs[ids[i]].get('pub_url') for i in members[1:]]
+            dropped.update(ids[i] for i in members[1:])
+        if dropped:
+            for did in dropped:
+                del self.docs[did]
+            for t in list(self.postings):
+                plist = [p for p in self.postings[t] if p[0] not in dropped]
+                if plist:
+                    self.postings[t] = plist
+                    self.df[t] = len(plist)
+                else:
+                    del self.postings[t]
+                    del self.df[t]
+        print(f"Near-duplicates: {stats['duplicates_removed']} records merged into {stats['clusters']} clusters "
+              f"({stats['candidate_pairs']} candidate pairs, {stats['cluster_seconds']}s)")
+        return stats
+
+    def seal(self, index_out: str, postings_out: str, classify: bool = False, classify_jobs: int = 1,
+             semantic_dims: int = 0, semantic_dtype: str = 'float32', num_shards: int = 0):
+        dedupe_stats = self.drop_near_duplicates() if self.near_dupes is not None else None
+        N = len(self.docs)
+        idf = {t: math.log((N + 1) / (df_t + 1)) + 1.0 for t, df_t in self.df.items()}
 
-    meta = {
-        'num_docs': N,
-        'idf': idf,
-        'docs': docs,
+        meta = {
+            'num_docs': N,
+            'idf': idf,
+            'docs': self.docs,
+            'columns': build_columns(self.docs),  # year + author ids per doc, for facet counts
+            'author_index': build_author_index(self.docs),  # normalized name keys for author: queries
+        }
+        if dedupe_stats:
+            meta['dedupe'] = dedupe_stats
+        if classify:
+            meta['categories'] = classify_docs(self.docs, n_jobs=classify_jobs)
+
+        with open(index_out, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        with open(postings_out, 'w', encoding='utf-8') as f:
+            json.dump({t: v for t, v in self.postings.items()}, f)
+
+        print(f"Indexed {N} documents. Wrote {index_out} and {postings_out}")
+        if semantic_dims:
+            from semantic import build_semantic, semantic_dir_for  # numpy only needed with --semantic
+            build_semantic(meta, self.postings, semantic_dir_for(index_out), semantic_dims, semantic_dtype)
+        if num_shards:
+            from shards import shards_dir_for, write_shards
+            write_shards(meta, self.postings, shards_dir_for(index_out), num_shards)
+
+def classify_docs(docs: Dict[str, dict], n_jobs: int = 1) -> dict:
+    """
+    Run the trained classifier over title + abstract of every doc in one batch.
+    Returned columns are aligned with the order of ``docs`` (kept by the JSON index):
+    ``codes[i]`` indexes ``labels`` and ``confidence[i]`` is the predicted class probability.
+    """
+    from classifier.predict import classify_many  # sklearn/numpy only needed with --classify
+    from classifier.registry import get_labels
+    texts = [f"{rec.get('title','')} {rec.get('abstract','')}" for rec in docs.values()]
+    predicted = classify_many(texts, n_jobs=n_jobs, return_confidence=True)
+    labels = list(get_labels())
+    for label, _ in predicted:
+        if label not in labels:
+            labels.append(label)
+    code_of = {label: i for i, label in enumerate(labels)}
+    return {
+        'labels': labels,
+        'codes': [code_of[label] for label, _ in predicted],
+        'confidence': [round(conf, 3) for _, conf in predicted],
     }
 
-    with open(index_out, 'w', encoding='utf-8') as f:
-        json.dump(meta, f)
-    with open(postings_out, 'w', encoding='utf-8') as f:
-        json.dump({t: v for t, v in postings.items()}, f)
+def read_jsonl(in_jsonl: str):
+    """Yield records from a JSONL file, or from stdin as they arrive when ``in_jsonl`` is '-'."""
+    f = sys.stdin if in_jsonl == '-' else open(in_jsonl, 'r', encoding='utf-8')
+    try:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
 
-    print(f"Indexed {N} documents. Wrote {index_out} and {postings_out}")
+def build_index(in_jsonl: str, index_out: str, postings_out: str, classify: bool = False, classify_jobs: int = 1,
+                semantic_dims: int = 0, semantic_dtype: str = 'float32', dedupe: bool = False, num_shards: int = 0):
+    builder = IndexBuilder(dedupe=dedupe)
+    builder.add_all(read_jsonl(in_jsonl))
+    builder.seal(index_out, postings_out, classify=classify, classify_jobs=classify_jobs,
+                 semantic_dims=semantic_dims, semantic_dtype=semantic_dtype, num_shards=num_shards)
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
-    ap.add_argument('--in', dest='inp', required=True)
+    ap.add_argument('--in', dest='inp', required=True, help="JSONL path, or '-' to index records streamed on stdin")
     ap.add_argument('--index', required=True)
     ap.add_argument('--postings', required=True)
+    ap.add_argument('--classify', action='store_true',
+                    help='Store the trained classifier\'s label + confidence per doc (enables category filters)')
+    ap.add_argument('--classify-jobs', type=int, default=1, help='Worker processes for --classify (-1 = all cores)')
+    ap.add_argument('--semantic', type=int, nargs='?', const=128, default=0, metavar='DIMS',
+                    help='Also build LSA vectors + IVF index for similar papers / query expansion (default 128 dims)')
+    ap.add_argument('--semantic-dtype', choices=['float32', 'int8'], default='float32')
+    ap.add_argument('--dedupe', action='store_true',
+                    help='Merge near-duplicate records (MinHash/LSH over title + abstract, or same DOI)')
+    ap.add_argument('--shards', type=int, default=0, metavar='N',
+                    help='Also split the index into N shards (global idf) for shards.py scatter-gather queries')
     args = ap.parse_args()
-    build_index(args.inp, args.index, args.postings)
+    build_index(args.inp, args.index, args.postings, classify=args.classify, classify_jobs=args.classify_jobs,
+                semantic_dims=args.semantic, semantic_dtype=args.semantic_dtype, dedupe=args.dedupe,
+                num_shards=args.shards)
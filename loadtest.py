@@ -0,0 +1,324 @@
+"""Load generator for the search path: replays queries at a fixed concurrency.
+
+Queries come from a log (one query per line, or JSONL with a "query" field)
+or from a synthetic Zipfian mix over the index vocabulary, where a few
+queries repeat often and most are rare. They are sent either
+
+- in-process: ``--concurrency`` worker processes, each loading the index once
+  (JSON, or the mmapped ``index.pack`` with ``--pack``) and calling
+  ``search_core.rank`` in a closed loop, or
+- over HTTP with ``--url``: as many threads issuing GET requests to a search
+  endpoint (``{q}`` in the URL is replaced by the quoted query). The repo has
+  no HTTP API of its own, so this is for whatever serves ``rank`` in front of it.
+
+The report has throughput, latency percentiles and errors overall and per
+``--interval`` seconds. It is printed and written as JSON, and ``--baseline``
+prints the change against an earlier report.
+
+    python loadtest.py --concurrency 4 --duration 30 --json data/load_report.json
+    python loadtest.py --log queries.txt --concurrency 8 --pack
+    python loadtest.py --url 'http://localhost:8000/search?q={q}' --concurrency 16 --duration 60
+    python loadtest.py --json new.json --baseline data/load_report.json
+"""
+import argparse, json, math, os, queue, random, subprocess, sys, threading, time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+WARMUP = 20
+
+
+# ---------------- Query mixes ----------------
+def read_query_log(path: str) -> Tuple[List[str], int]:
+    """Queries from a log as ``search_cli --queries-file`` reads them, and the number of malformed lines skipped."""
+    from search_cli import read_queries
+    skipped: List[int] = []
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(read_queries(f, skipped)), len(skipped)
+
+
+def zipf_queries(postings, n: int, distinct: int = 5000, s: float = 1.1, seed: int = 0) -> List[str]:
+    """``n`` queries drawn with Zipf(``s``) popularity from ``distinct`` 1-3 word queries over the vocabulary."""
+    rng = random.Random(seed)
+    terms = [t for t in postings if len(t) > 2 and not t.isdigit()]
+    terms.sort(key=lambda t: -len(postings[t]))
+    vocab = terms[len(terms) // 100:] or terms  # the top 1% are near-stopwords
+    weights = [len(postings[t]) for t in vocab]  # common words show up in more queries
+    pool = list(dict.fromkeys(' '.join(rng.choices(vocab, weights, k=rng.choice((1, 1, 2, 2, 2, 3))))
+                              for _ in range(distinct)))
+    popularity = [1 / (rank + 1) ** s for rank in range(len(pool))]
+    return rng.choices(pool, popularity, k=n)
+
+
+# ---------------- Workers ----------------
+def _run_loop(call, queries: List[str], duration: Optional[float]) -> List[Tuple[float, float, Optional[str]]]:
+    """Closed loop over ``queries`` (cycled until ``duration`` if given): (start offset, latency, error) per query."""
+    records = []
+    if not queries:
+        return records
+    t0 = time.perf_counter()
+    i = 0
+    while True:
+        if duration is None:
+            if i == len(queries):
+                break
+        elif time.perf_counter() - t0 >= duration:
+            break
+        q = queries[i % len(queries)]
+        i += 1
+        start = time.perf_counter()
+        error = None
+        try:
+            call(q)
+        except Exception as e:  # counted, the run goes on
+            error = f'{type(e).__name__}: {e}'[:200]
+        end = time.perf_counter()
+        records.append((start - t0, end - start, error))
+    return records
+
+
+def _rank_worker(source: str, postings_path: str, packed: bool, queries: List[str], duration: Optional[float],
+                 options: dict, start, out):
+    try:
+        from search_core import load_index, rank
+        if packed:
+            from shared_index import load
+            meta, postings = load(source)
+        else:
+            meta, postings = load_index(source, postings_path)
+        for q in queries[:WARMUP]:
+            try:
+                rank(meta, postings, q, **options)
+            except ValueError:  # a logged query that only excludes; the timed loop counts it as an error
+                pass
+    except BaseException as e:
+        out.put(('error', f'{type(e).__name__}: {e}'))
+        start.abort()  # the parent and the other workers stop waiting
+        return
+    try:
+        start.wait()
+    except threading.BrokenBarrierError:  # another worker failed; the parent reports it
+        return
+    out.put(('ok', _run_loop(lambda q: rank(meta, postings, q, **options), queries, duration)))
+
+
+def _collect(procs, out) -> list:
+    """Records from every worker; RuntimeError as soon as one fails or dies instead of waiting forever."""
+    results = []
+    while len(results) < len(procs):
+        try:
+            status, payload = out.get(timeout=1.0)
+        except queue.Empty:
+            dead = [p.exitcode for p in procs if p.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(f'a worker exited with code {dead[0]} without reporting')
+            continue
+        if status != 'ok':
+            raise RuntimeError(f'a worker failed: {payload}')
+        results.append(payload)
+    return [r for records in results for r in records]
+
+
+def run_in_process(index_path: str, postings_path: str, queries: List[str], concurrency: int,
+                   duration: Optional[float], options: dict, packed: bool = False,
+                   load_timeout: float = 600.0) -> Tuple[list, float]:
+    """Closed-loop ``rank`` in ``concurrency`` processes; RuntimeError if a worker fails to load or dies."""
+    import multiprocessing as mp
+    source = index_path
+    if packed:
+        from shared_index import pack, pack_path_for
+        source = pack_path_for(index_path)
+        if not os.path.exists(source) or os.path.getmtime(source) < os.path.getmtime(postings_path):
+            from search_core import load_index
+            pack(*load_index(index_path, postings_path), source)
+    ctx = mp.get_context('spawn')
+    start, out = ctx.Barrier(concurrency + 1), ctx.Queue()
+    procs = [ctx.Process(target=_rank_worker, args=(source, postings_path, packed, queries[i::concurrency],
+                                                    duration, options, start, out))
+             for i in range(concurrency)]
+    for proc in procs:
+        proc.start()
+    try:
+        try:
+            start.wait(timeout=load_timeout)  # every worker has loaded the index and warmed up
+        except threading.BrokenBarrierError:
+            try:
+                status, payload = out.get(timeout=5.0)
+            except queue.Empty:
+                raise RuntimeError(f'workers did not load the index within {load_timeout:g}s') from None
+            raise RuntimeError(f'a worker failed to load the index: {payload}') from None
+        t0 = time.perf_counter()
+        records = _collect(procs, out)
+        wall = time.perf_counter() - t0
+    except BaseException:
+        for proc in procs:
+            proc.terminate()
+        raise
+    for proc in procs:
+        proc.join()
+    return records, wall
+
+
+def run_http(url: str, queries: List[str], concurrency: int, duration: Optional[float],
+             timeout: float = 10.0) -> Tuple[list, float]:
+    from urllib.parse import quote_plus
+    from urllib.request import urlopen
+
+    def call(q):
+        with urlopen(url.replace('{q}', quote_plus(q)), timeout=timeout) as resp:
+            resp.read()
+
+    shards: List[list] = [[] for _ in range(concurrency)]
+
+    def work(i):
+        shards[i] = _run_loop(call, queries[i::concurrency], duration)
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [r for shard in shards for r in shard], time.perf_counter() - t0
+
+
+# ---------------- Report ----------------
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    k = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    lat = sorted(latencies)
+    out = {f'p{p:g}': round(1000 * percentile(lat, p), 3) for p in PERCENTILES}
+    out['mean'] = round(1000 * sum(lat) / len(lat), 3) if lat else 0.0
+    out['max'] = round(1000 * lat[-1], 3) if lat else 0.0
+    return out
+
+
+def summarize(records: list, wall: float, interval: float) -> Dict:
+    ok = [lat for _, lat, err in records if err is None]
+    errors = Counter(err for _, _, err in records if err is not None)
+    buckets: Dict[int, list] = {}
+    for offset, lat, err in records:
+        buckets.setdefault(int(offset // interval), []).append((lat, err))
+    timeline = []
+    for b in sorted(buckets):
+        rows = buckets[b]
+        good = sorted(lat for lat, err in rows if err is None)
+        timeline.append({'t': round(b * interval, 3), 'qps': round(len(rows) / interval, 1),
+                         'p50_ms': round(1000 * percentile(good, 50), 3),
+                         'p99_ms': round(1000 * percentile(good, 99), 3),
+                         'errors': sum(1 for _, err in rows if err is not None)})
+    return {
+        'queries': len(records),
+        'seconds': round(wall, 3),
+        'throughput_qps': round(len(records) / wall, 1) if wall else 0.0,
+        'latency_ms': _latency_summary(ok),
+        'errors': sum(errors.values()),
+        'error_rate': round(sum(errors.values()) / len(records), 5) if records else 0.0,
+        'top_errors': dict(errors.most_common(5)),
+        'timeline': timeline,
+    }
+
+
+def build_info(index_path: str) -> Dict:
+    """What was measured, so reports from different builds can be told apart."""
+    info = {'index': os.path.abspath(index_path)}
+    try:
+        info['git_commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        info['git_commit'] = None
+    versions_dir = os.path.dirname(os.path.dirname(os.path.abspath(index_path)))
+    manifest = os.path.join(os.path.dirname(versions_dir), 'index_manifest.json')
+    if os.path.basename(versions_dir) == 'index_versions' and os.path.exists(manifest):  # published by pipeline.py
+        with open(manifest, 'r', encoding='utf-8') as f:
+            info['index_version'] = json.load(f).get('current')
+    return info
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    lat = report['latency_ms']
+    print(f"{report['target']} x{report['concurrency']}: {report['queries']} queries in {report['seconds']}s  "
+          f"{report['throughput_qps']} q/s  errors {report['errors']}")
+    print('  latency ms  ' + '  '.join(f'{k} {v}' for k, v in lat.items()))
+    for row in report['timeline']:
+        print(f"  t={row['t']:>6}s  {row['qps']:>8.1f} q/s  p50 {row['p50_ms']:>8.3f}  p99 {row['p99_ms']:>8.3f}  "
+              f"errors {row['errors']}")
+    for err, n in report['top_errors'].items():
+        print(f'  {n:>6} x {err}')
+    if baseline:
+        def delta(new, old):
+            return f'{new} vs {old} ({100 * (new - old) / old:+.1f}%)' if old else f'{new} vs {old}'
+        print(f"vs baseline ({baseline.get('build', {}).get('git_commit')}): "
+              f"q/s {delta(report['throughput_qps'], baseline['throughput_qps'])}, "
+              f"p99 ms {delta(lat['p99'], baseline['latency_ms']['p99'])}, "
+              f"errors {report['errors']} vs {baseline['errors']}")
+
+
+if __name__ == '__main__':
+    from search_core import default_index_paths, load_index
+    default_index, default_postings = default_index_paths()
+    ap = argparse.ArgumentParser(description='Replay a query log or a Zipfian query mix against the search path.')
+    ap.add_argument('--index', default=default_index)
+    ap.add_argument('--postings', default=default_postings)
+    ap.add_argument('--log', help='Query log to replay (text, one query per line, or JSONL with "query")')
+    ap.add_argument('--queries', type=int, default=5000, help='Synthetic queries to generate without --log')
+    ap.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of the synthetic query popularity')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--concurrency', type=int, default=4)
+    ap.add_argument('--duration', type=float, help='Seconds to run, cycling the queries (default: one pass)')
+    ap.add_argument('--interval', type=float, default=1.0, help='Seconds per timeline bucket')
+    ap.add_argument('--url', help="Search endpoint instead of in-process rank, e.g. 'http://localhost:8000/search?q={q}'")
+    ap.add_argument('--timeout', type=float, default=10.0, help='HTTP timeout per request (seconds)')
+    ap.add_argument('--pack', action='store_true', help='Workers mmap index.pack instead of each loading the JSON')
+    ap.add_argument('--load-timeout', type=float, default=600.0,
+                    help='Seconds workers may take to load the index and warm up before the run is aborted')
+    ap.add_argument('--topk', type=int, default=10)
+    ap.add_argument('--facets', action='store_true', help='Ask rank for facets too')
+    ap.add_argument('--json', help='Write the report to this file')
+    ap.add_argument('--baseline', help='Earlier --json report to compare against')
+    args = ap.parse_args()
+    if args.concurrency < 1:
+        ap.error('--concurrency must be at least 1')
+    if args.interval <= 0:
+        ap.error('--interval must be positive')
+
+    if args.log:
+        queries, skipped = read_query_log(args.log)
+        mix = {'log': os.path.abspath(args.log), 'skipped_lines': skipped}
+    else:
+        _, postings = load_index(args.index, args.postings)
+        queries = zipf_queries(postings, args.queries, s=args.zipf, seed=args.seed)
+        mix = {'zipf': args.zipf, 'distinct': len(set(queries)), 'seed': args.seed}
+        del postings
+    if not queries:
+        ap.error('no queries to replay')
+
+    options = {'topk': args.topk, 'with_facets': args.facets}
+    if args.url:
+        records, wall = run_http(args.url, queries, args.concurrency, args.duration, args.timeout)
+        target = 'http'
+    else:
+        try:
+            records, wall = run_in_process(args.index, args.postings, queries, args.concurrency, args.duration,
+                                           options, packed=args.pack, load_timeout=args.load_timeout)
+        except RuntimeError as e:
+            sys.exit(f'Load test aborted: {e}')
+        target = 'pack' if args.pack else 'json'
+    report = {'target': target, 'url': args.url, 'concurrency': args.concurrency, 'mix': mix, 'options': options,
+              'build': build_info(args.index), 'cpus': os.cpu_count(),
+              **summarize(records, wall, args.interval)}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report['errors'] and report['errors'] == report['queries'] else 0)
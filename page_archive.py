@@ -0,0 +1,127 @@
+import gzip, hashlib, json, os, threading, uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_FILE = "pages.warc.gz"
+INDEX_FILE = "pages.idx.jsonl"
+
+
+class PageArchive:
+    """Append-only archive of raw HTML pages and the stylesheets they use.
+
+    Every page is written as its own gzip member holding a WARC-style record
+    (headers, blank line, body), so the archive as a whole is still a valid
+    ``.gz`` stream. ``pages.idx.jsonl`` maps each record to its byte offset
+    and compressed length for random access. Stylesheets are records of kind
+    ``stylesheet``, stored once per URL and content; replay inlines them, since
+    extraction depends on layout.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.archive_path = self.directory / ARCHIVE_FILE
+        self.index_path = self.directory / INDEX_FILE
+        self._lock = threading.Lock()
+        self._stylesheet_hashes: Optional[set] = None
+
+    def append(self, url: str, html: str, content_type: str = "text/html; charset=utf-8", **extra) -> Dict:
+        body = html.encode("utf-8")
+        fetched_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        headers = [
+            "WARC/1.1",
+            "WARC-Type: resource",
+            f"WARC-Target-URI: {url}",
+            f"WARC-Date: {fetched_at}",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+        ]
+        record = ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8") + body + b"\r\n\r\n"
+        member = gzip.compress(record)
+        entry = {"url": url, "date": fetched_at, "sha1": hashlib.sha1(body).hexdigest(), **extra}
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self.archive_path.open("ab") as archive_file:
+                entry["offset"] = archive_file.tell()
+                archive_file.write(member)
+            entry["length"] = len(member)
+            with self.index_path.open("a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def append_stylesheet(self, url: str, css: str) -> Optional[Dict]:
+        """Archive a stylesheet unless this exact content is already stored for ``url``."""
+        key = (url, hashlib.sha1(css.encode("utf-8")).hexdigest())
+        with self._lock:
+            if self._stylesheet_hashes is None:
+                self._stylesheet_hashes = {(e["url"], e["sha1"]) for e in self.entries(False, kind="stylesheet")}
+            if key in self._stylesheet_hashes:
+                return None
+            self._stylesheet_hashes.add(key)
+        return self.append(url, css, content_type="text/css; charset=utf-8", kind="stylesheet")
+
+    def entries(self, latest_only: bool = True, kind: str = "page") -> List[Dict]:
+        """Index entries of ``kind`` in archive order; with ``latest_only`` keep the newest capture per URL."""
+        if not self.index_path.exists():
+            return []
+        with self.index_path.open("r", encoding="utf-8") as index_file:
+            all_entries = [entry for entry in map(json.loads, filter(str.strip, index_file))
+                           if entry.get("kind", "page") == kind]
+        if not latest_only:
+            return all_entries
+        latest = {}
+        for entry in all_entries:
+            latest[entry["url"]] = entry
+        return list(latest.values())
+
+    def read(self, entry: Dict) -> Tuple[Dict[str, str], str]:
+        """Return ``(headers, html)`` for one index entry."""
+        with self.archive_path.open("rb") as archive_file:
+            archive_file.seek(entry["offset"])
+            record = gzip.decompress(archive_file.read(entry["length"]))
+        head, _, body = record.partition(b"\r\n\r\n")
+        headers = {}
+        for line in head.decode("utf-8").split("\r\n")[1:]:
+            key, _, value = line.partition(":")
+            headers[key.strip()] = value.strip()
+        content_length = int(headers.get("Content-Length", len(body)))
+        return headers, body[:content_length].decode("utf-8")
+
+    def stylesheets(self) -> Dict[str, str]:
+        """URL -> CSS text of the newest capture of every archived stylesheet."""
+        return {entry["url"]: self.read(entry)[1] for entry in self.entries(kind="stylesheet")}
+
+    def iter_pages(self, latest_only: bool = True) -> Iterator[Tuple[Dict, str]]:
+        for entry in self.entries(latest_only):
+            yield entry, self.read(entry)[1]
+
+
+def archive_stats(directory: str) -> Optional[Dict]:
+    archive = PageArchive(directory)
+    if not archive.archive_path.exists():
+        return None
+    all_entries = archive.entries(latest_only=False)
+    return {
+        "records": len(all_entries),
+        "urls": len({e["url"] for e in all_entries}),
+        "stylesheets": len(archive.entries(latest_only=False, kind="stylesheet")),
+        "compressed_bytes": os.path.getsize(archive.archive_path),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect a raw page archive written by crawler.py --archive.")
+    ap.add_argument("directory")
+    ap.add_argument("--show", help="Print the latest archived HTML for this URL.")
+    args = ap.parse_args()
+    if args.show:
+        for entry in PageArchive(args.directory).entries():
+            if entry["url"] == args.show:
+                print(PageArchive(args.directory).read(entry)[1])
+                break
+        else:
+            print(f"{args.show} is not in the archive.")
+    else:
+        print(json.dumps(archive_stats(args.directory), indent=2))
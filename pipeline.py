@@ -0,0 +1,299 @@
+import argparse, hashlib, json, os, queue, shutil, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from indexer import IndexBuilder, build_index
+
+DATA_DIR = 'data'
+VERSIONS_DIR = 'index_versions'
+MANIFEST_FILE = 'index_manifest.json'
+CURRENT_LINK = 'current'
+KEEP_VERSIONS = 3
+
+
+def record_digest(rec: dict) -> str:
+    canonical = json.dumps(rec, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def combine_digests(record_digests: Iterable[str]) -> str:
+    """Order-independent digest of a crawl (parallel workers finish in any order)."""
+    h = hashlib.sha256()
+    for d in sorted(record_digests):
+        h.update(d.encode('ascii'))
+    return h.hexdigest()
+
+
+def content_hash(jsonl_path: str) -> str:
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        return combine_digests(record_digest(json.loads(line)) for line in f if line.strip())
+
+
+def _atomic_write_json(path: Path, obj):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_manifest(data_dir: str = DATA_DIR) -> Dict:
+    path = Path(data_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {'current': None, 'versions': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _swap_current_link(data_dir: Path, version: str):
+    link, tmp = data_dir / CURRENT_LINK, data_dir / (CURRENT_LINK + '.tmp')
+    try:
+        if tmp.is_symlink() or tmp.exists():
+            tmp.unlink()
+        os.symlink(Path(VERSIONS_DIR) / version, tmp, target_is_directory=True)
+        os.replace(tmp, link)
+    except (OSError, NotImplementedError):
+        pass  # no symlinks (e.g. Windows without privileges): the manifest alone is authoritative
+
+
+def publish(data_dir: str, version: str, keep: int = KEEP_VERSIONS):
+    """Point readers at ``version``: manifest swap via os.replace, plus a ``current`` symlink."""
+    _check_keep(keep)  # before the swap, not halfway through it
+    root = Path(data_dir)
+    manifest = read_manifest(data_dir)
+    manifest['current'] = version
+    _atomic_write_json(root / MANIFEST_FILE, manifest)
+    _swap_current_link(root, version)
+    prune_versions(data_dir, keep)
+
+
+def _check_keep(keep: int):
+    if keep < 1:
+        raise ValueError(f'keep must be at least 1 (got {keep})')
+
+
+def prune_versions(data_dir: str, keep: int = KEEP_VERSIONS):
+    """Delete all but the newest ``keep`` versions (and the published one)."""
+    _check_keep(keep)
+    manifest = read_manifest(data_dir)
+    names = [v['version'] for v in manifest['versions']]
+    retained = set(names[max(0, len(names) - keep):]) | {manifest['current']}
+    manifest['versions'] = [v for v in manifest['versions'] if v['version'] in retained]
+    _atomic_write_json(Path(data_dir) / MANIFEST_FILE, manifest)
+    for name in names:
+        if name not in retained:
+            shutil.rmtree(Path(data_dir) / VERSIONS_DIR / name, ignore_errors=True)
+
+
+def rollback(data_dir: str = DATA_DIR, steps: int = 1) -> Optional[str]:
+    manifest = read_manifest(data_dir)
+    names = [v['version'] for v in manifest['versions']]
+    if manifest['current'] not in names:
+        return None
+    pos = names.index(manifest['current']) - steps
+    if pos < 0:
+        return None
+    publish(data_dir, names[pos], keep=len(names))
+    return names[pos]
+
+
+def _staging_dir(data_dir: str, version: str) -> Path:
+    staging = Path(data_dir) / VERSIONS_DIR / f'.{version}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    return staging
+
+
+def _version_name(data_dir: str, digest: str) -> str:
+    """Timestamp + content hash; suffixed when the same content is rebuilt (other options, --force) in one second."""
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{digest[:12]}"
+    versions, n, candidate = Path(data_dir) / VERSIONS_DIR, 1, name
+    while (versions / candidate).exists():
+        n += 1
+        candidate = f'{name}-{n}'
+    return candidate
+
+
+def build_version(jsonl_path: str, data_dir: str, digest: str, classify: bool = False, semantic_dims: int = 0,
+                  dedupe: bool = False, num_shards: int = 0) -> str:
+    """Build a complete index into a fresh version directory; readers never see a partial build."""
+    version = _version_name(data_dir, digest)
+    staging = _staging_dir(data_dir, version)
+    build_index(jsonl_path, str(staging / 'index.json'), str(staging / 'postings.json'), classify=classify,
+                semantic_dims=semantic_dims, dedupe=dedupe, num_shards=num_shards)
+    os.replace(staging, Path(data_dir) / VERSIONS_DIR / version)
+    return version
+
+
+def build_options(classify: bool = False, semantic_dims: int = 0, dedupe: bool = False, num_shards: int = 0) -> Dict:
+    """Index settings recorded with each version; a rebuild is skipped only when content and these both match."""
+    return {'classify': bool(classify), 'semantic_dims': int(semantic_dims or 0), 'dedupe': bool(dedupe),
+            'num_shards': int(num_shards or 0)}
+
+
+def _is_unchanged(current: Optional[Dict], digest: str, options: Dict) -> bool:
+    # Versions recorded before build options were stored never match, so they are rebuilt once.
+    return bool(current) and current.get('content_hash') == digest and current.get('build_options') == options
+
+
+def _current_version(data_dir: str) -> Optional[Dict]:
+    manifest = read_manifest(data_dir)
+    return next((v for v in manifest['versions'] if v['version'] == manifest['current']), None)
+
+
+def _record_and_publish(data_dir: str, version: str, digest: str, options: Dict, durations: Dict, keep: int):
+    manifest = read_manifest(data_dir)
+    manifest['versions'].append({'version': version, 'content_hash': digest, 'build_options': options,
+                                 'built_at': datetime.now(timezone.utc).isoformat(), 'durations': durations})
+    _atomic_write_json(Path(data_dir) / MANIFEST_FILE, manifest)
+    t0 = time.perf_counter()
+    publish(data_dir, version, keep)
+    durations['publish'] = round(time.perf_counter() - t0, 3)
+
+
+def run_streaming_pipeline(data_dir: str = DATA_DIR, max_pages: int = 50, workers: int = 6,
+                           force: bool = False, keep: int = KEEP_VERSIONS, classify: bool = False,
+                           semantic_dims: int = 0, dedupe: bool = False, num_shards: int = 0) -> Dict:
+    """Index records while the crawl is still running and seal the index when the last one lands.
+
+    The crawler pushes each extracted record onto a queue from its worker
+    threads; this thread normalizes and posts it immediately, so tokenization
+    overlaps with network-bound scraping instead of following it.
+    """
+    _check_keep(keep)
+    import crawler
+    durations = {}
+    run = {'started_at': datetime.now(timezone.utc).isoformat(), 'durations': durations, 'mode': 'stream'}
+    records: 'queue.Queue' = queue.Queue()
+    done = object()
+    crawl_result = {}
+
+    def crawl():
+        try:
+            crawl_result['path'] = crawler.main(
+                ['--max-pages', str(max_pages), '--workers', str(workers), '--outdir', data_dir],
+                on_record=records.put)
+        except BaseException as e:
+            crawl_result['error'] = e
+        finally:
+            records.put(done)
+
+    t0 = time.perf_counter()
+    crawl_thread = threading.Thread(target=crawl, name='crawl', daemon=True)
+    crawl_thread.start()
+    builder, digests = IndexBuilder(dedupe=dedupe), []
+    index_busy = 0.0
+    while True:
+        rec = records.get()
+        if rec is done:
+            break
+        t1 = time.perf_counter()
+        digests.append(record_digest(rec))
+        builder.add(rec)
+        index_busy += time.perf_counter() - t1
+    crawl_thread.join()
+    durations['crawl'] = round(time.perf_counter() - t0, 3)
+    durations['index_overlapped'] = round(index_busy, 3)
+    if 'error' in crawl_result:
+        raise crawl_result['error']
+    if crawl_result.get('path') is None or not builder.docs:
+        run['status'] = 'crawl_empty'
+        print('Crawl produced no records; keeping the published index.')
+        return run
+
+    digest = combine_digests(digests)
+    run['content_hash'] = digest
+    options = build_options(classify, semantic_dims, dedupe, num_shards)
+    current = _current_version(data_dir)
+    if _is_unchanged(current, digest, options) and not force:
+        run.update({'status': 'unchanged', 'version': current['version']})
+        print(f"Crawl output and build options unchanged ({digest[:12]}); {current['version']} stays published.")
+        return run
+
+    t0 = time.perf_counter()
+    version = _version_name(data_dir, digest)
+    staging = _staging_dir(data_dir, version)
+    builder.seal(str(staging / 'index.json'), str(staging / 'postings.json'), classify=classify,
+                 semantic_dims=semantic_dims, num_shards=num_shards)
+    os.replace(staging, Path(data_dir) / VERSIONS_DIR / version)
+    durations['seal'] = round(time.perf_counter() - t0, 3)
+
+    _record_and_publish(data_dir, version, digest, options, durations, keep)
+    run.update({'status': 'published', 'version': version})
+    print(f"Published {version} (stages: {durations})")
+    return run
+
+
+def run_pipeline(data_dir: str = DATA_DIR, max_pages: int = 50, workers: int = 6, skip_crawl: bool = False,
+                 force: bool = False, keep: int = KEEP_VERSIONS, classify: bool = False,
+                 semantic_dims: int = 0, dedupe: bool = False, num_shards: int = 0) -> Dict:
+    """Crawl, hash, (re)index and publish in one process; returns the run record."""
+    _check_keep(keep)
+    durations = {}
+    jsonl_path = str(Path(data_dir) / 'publications.jsonl')
+    run = {'started_at': datetime.now(timezone.utc).isoformat(), 'durations': durations}
+
+    if not skip_crawl:
+        import crawler  # Selenium is only needed when actually crawling
+        t0 = time.perf_counter()
+        written = crawler.main(['--max-pages', str(max_pages), '--workers', str(workers), '--outdir', data_dir])
+        durations['crawl'] = round(time.perf_counter() - t0, 3)
+        if written is None:
+            run['status'] = 'crawl_empty'
+            print('Crawl produced no records; keeping the published index.')
+            return run
+
+    t0 = time.perf_counter()
+    digest = content_hash(jsonl_path)
+    durations['hash'] = round(time.perf_counter() - t0, 3)
+    run['content_hash'] = digest
+
+    options = build_options(classify, semantic_dims, dedupe, num_shards)
+    current = _current_version(data_dir)
+    if _is_unchanged(current, digest, options) and not force:
+        run['status'] = 'unchanged'
+        run['version'] = current['version']
+        print(f"Crawl output and build options unchanged ({digest[:12]}); {current['version']} stays published.")
+        return run
+
+    t0 = time.perf_counter()
+    version = build_version(jsonl_path, data_dir, digest, classify=classify, semantic_dims=semantic_dims,
+                            dedupe=dedupe, num_shards=num_shards)
+    durations['index'] = round(time.perf_counter() - t0, 3)
+
+    _record_and_publish(data_dir, version, digest, options, durations, keep)
+    run.update({'status': 'published', 'version': version})
+    print(f"Published {version} (stages: {durations})")
+    return run
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Crawl + index in one process and publish the index atomically.')
+    ap.add_argument('--data-dir', default=DATA_DIR)
+    ap.add_argument('--max-pages', type=int, default=50)
+    ap.add_argument('--workers', type=int, default=6)
+    ap.add_argument('--skip-crawl', action='store_true', help='Index the existing publications.jsonl')
+    ap.add_argument('--force', action='store_true', help='Rebuild even if the crawl output is unchanged')
+    ap.add_argument('--keep', type=int, default=KEEP_VERSIONS, help='Index versions kept for rollback')
+    ap.add_argument('--rollback', type=int, nargs='?', const=1, metavar='STEPS', help='Re-publish an older version')
+    ap.add_argument('--status', action='store_true', help='Show published and retained versions')
+    ap.add_argument('--stream', action='store_true', help='Index records as the crawler produces them')
+    ap.add_argument('--classify', action='store_true', help='Store predicted categories in the index')
+    ap.add_argument('--semantic', type=int, nargs='?', const=128, default=0, metavar='DIMS',
+                    help='Also build LSA vectors for similar papers / query expansion')
+    ap.add_argument('--dedupe', action='store_true', help='Merge near-duplicate publications before indexing')
+    ap.add_argument('--shards', type=int, default=0, metavar='N', help='Also write N index shards for shards.py')
+    args = ap.parse_args()
+    if args.keep < 1:
+        ap.error('--keep must be at least 1')
+    if args.status:
+        print(json.dumps(read_manifest(args.data_dir), indent=2))
+    elif args.rollback:
+        restored = rollback(args.data_dir, args.rollback)
+        print(f'Rolled back to {restored}.' if restored else 'No older version to roll back to.')
+    elif args.stream:
+        run_streaming_pipeline(args.data_dir, args.max_pages, args.workers, args.force, args.keep, args.classify,
+                               args.semantic, args.dedupe, args.shards)
+    else:
+        run_pipeline(args.data_dir, args.max_pages, args.workers, args.skip_crawl, args.force, args.keep,
+                     args.classify, args.semantic, args.dedupe, args.shards)
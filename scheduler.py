@@ -1,12 +1,12 @@
-import os, time, schedule, subprocess
+import os, time, schedule
+from pipeline import run_pipeline as run_indexing_pipeline
 
 DATA_DIR = 'data'
 os.makedirs(DATA_DIR, exist_ok=True)
 
 def run_pipeline():
     print('Running weekly crawl + index...')
-    subprocess.run(['python', 'crawler.py', '--max-pages', '50', '--workers', '6', '--outdir', DATA_DIR], check=True)
-    subprocess.run(['python', 'indexer.py', '--in', f'{DATA_DIR}/publications.jsonl', '--index', f'{DATA_DIR}/index.json', '--postings', f'{DATA_DIR}/postings.json'], check=True)
+    run_indexing_pipeline(DATA_DIR, max_pages=50, workers=6)
     print('Done.')
 
 # Every Monday at 03:30
@@ -1,7 +1,141 @@
+import html
+import json
 import streamlit as st
 import streamlit.components.v1 as components
-from search_core import load_index, rank
-from classifier.predict import classify  # 🔥 import classifier
+from search_core import QueryTrace, category_labels, default_index_paths, index_memory, load_index, rank
+
+RESULTS_PAGE = 15        # cards added per "Load more" click, client-side
+RESULTS_PAYLOAD = 300    # results sent to the browser per rerun
+ROW_HEIGHT = 176         # px per card; fixed so the list can be virtualized
+LIST_HEIGHT = 720
+
+# One iframe for the whole result list. Results arrive as a JSON payload; only the cards in view (plus a few
+# above and below) exist in the DOM, and "Load more" / detail popups run in the browser without a rerun.
+RESULTS_HTML = """
+<style>
+  body { margin: 0; font-family: 'Segoe UI', sans-serif; }
+  #list { height: __LIST_HEIGHT__px; overflow-y: auto; position: relative; }
+  #spacer { position: relative; }
+  .result-card { position: absolute; left: 6px; right: 6px; height: __CARD_HEIGHT__px; box-sizing: border-box;
+    background: #fff; border-radius: 12px; box-shadow: 0 2px 8px #e0eafc; padding: 1rem 1.2rem; cursor: pointer;
+    overflow: hidden; border: 2px solid transparent; transition: box-shadow 0.3s; }
+  .result-card:hover { box-shadow: 0 6px 24px #b3cdf6; border-color: #3066be; }
+  .result-title { display: block; font-size: 1.15rem; font-weight: 700; color: #20509e; text-decoration: none;
+    white-space: nowrap; overflow: hidden; text-overflow: ellipsis; margin-bottom: 0.3rem; }
+  .chip { display: inline-block; padding: 3px 12px; font-size: 0.9rem; margin-right: 8px; background: #f0f7ff;
+    border-radius: 16px; color: #3066be; font-weight: 600; }
+  .authors { color: #444; font-size: 0.95rem; margin: 6px 0 4px; white-space: nowrap; overflow: hidden;
+    text-overflow: ellipsis; }
+  .abstract { color: #333; font-size: 0.95rem; display: -webkit-box; -webkit-line-clamp: 2;
+    -webkit-box-orient: vertical; overflow: hidden; }
+  #more { display: flex; gap: 1rem; align-items: center; justify-content: center; height: 48px; color: #555; }
+  #more button { background: #3066be; color: #fff; border: 0; border-radius: 8px; padding: 8px 18px; cursor: pointer; }
+  .popup-bg { position: fixed; inset: 0; background: rgba(48,102,190,0.13); display: flex; justify-content: center;
+    align-items: center; z-index: 99; }
+  .popup-bg[hidden] { display: none; }
+  .popup-card { background: #fff; border-radius: 20px; box-shadow: 0 8px 40px #20509e57; padding: 1.5rem 2.2rem;
+    max-width: 640px; max-height: 80%; overflow-y: auto; }
+  .popup-close { float: right; font-size: 1.8rem; color: #3066be; cursor: pointer; }
+</style>
+<div id="list"><div id="spacer"></div></div>
+<div id="more"><span id="count"></span><button id="more-btn">Load more results</button></div>
+<div id="popup" class="popup-bg" hidden>
+  <div class="popup-card">
+    <span class="popup-close" id="popup-close">&times;</span>
+    <h2 id="p-title" style="color:#20509e;"></h2>
+    <p id="p-meta"></p>
+    <p id="p-authors"></p>
+    <p id="p-abstract" style="margin-top:18px;"></p>
+    <p><a id="p-link" target="_blank" style="color:#3066be;">Open publication ↗</a></p>
+  </div>
+</div>
+<script type="application/json" id="payload">__PAYLOAD__</script>
+<script>
+const data = JSON.parse(document.getElementById('payload').textContent);
+const rows = data.results, ROW = __ROW_HEIGHT__, PAGE = __PAGE__, OVERSCAN = 4;
+const list = document.getElementById('list'), spacer = document.getElementById('spacer');
+const moreBtn = document.getElementById('more-btn'), count = document.getElementById('count');
+let shown = Math.min(data.shown, rows.length), pending = false;
+
+function el(tag, cls, text) {
+  const e = document.createElement(tag);
+  if (cls) e.className = cls;
+  if (text !== undefined) e.textContent = text;
+  return e;
+}
+function card(i) {
+  const r = rows[i], c = el('div', 'result-card');
+  c.dataset.i = i;
+  c.style.top = (i * ROW) + 'px';
+  const a = el('a', 'result-title', r.title || '(untitled)');
+  a.href = r.url || '#';
+  a.target = '_blank';
+  c.appendChild(a);
+  const chips = el('div');
+  chips.appendChild(el('span', 'chip', '📅 ' + r.year));
+  chips.appendChild(el('span', 'chip', '⭐ ' + r.score));
+  if (r.category) chips.appendChild(el('span', 'chip', '🏷️ ' + r.category));
+  c.appendChild(chips);
+  c.appendChild(el('div', 'authors', '👤 ' + r.authors));
+  if (r.abstract) c.appendChild(el('div', 'abstract', r.abstract));
+  return c;
+}
+function render() {
+  pending = false;
+  spacer.style.height = (shown * ROW) + 'px';
+  const first = Math.max(0, Math.floor(list.scrollTop / ROW) - OVERSCAN);
+  const last = Math.min(shown, Math.ceil((list.scrollTop + list.clientHeight) / ROW) + OVERSCAN);
+  const frag = document.createDocumentFragment();
+  for (let i = first; i < last; i++) frag.appendChild(card(i));
+  spacer.replaceChildren(frag);
+  count.textContent = 'Showing ' + shown + ' of ' + data.total;
+  moreBtn.hidden = shown >= rows.length;
+}
+list.addEventListener('scroll', () => { if (!pending) { pending = true; requestAnimationFrame(render); } });
+moreBtn.addEventListener('click', () => { shown = Math.min(rows.length, shown + PAGE); render(); });
+
+const popup = document.getElementById('popup');
+spacer.addEventListener('click', (ev) => {
+  const c = ev.target.closest('.result-card');
+  if (!c || ev.target.closest('a')) return;
+  const r = rows[+c.dataset.i];
+  document.getElementById('p-title').textContent = r.title || '(untitled)';
+  document.getElementById('p-meta').textContent = 'Year: ' + r.year + '   Score: ' + r.score +
+    (r.category ? '   Category: ' + r.category : '');
+  document.getElementById('p-authors').textContent = 'Authors: ' + r.authors;
+  document.getElementById('p-abstract').textContent = r.abstract || 'No abstract available.';
+  document.getElementById('p-link').href = r.url || '#';
+  popup.hidden = false;
+});
+popup.addEventListener('click', (ev) => { if (ev.target === popup) popup.hidden = true; });
+document.getElementById('popup-close').addEventListener('click', () => { popup.hidden = true; });
+document.addEventListener('keydown', (ev) => { if (ev.key === 'Escape') popup.hidden = true; });
+render();
+</script>
+"""
+
+def render_results(results, total, shown=RESULTS_PAGE):
+    """The result list as one component: ``results`` go to the browser as JSON, ``shown`` of them listed at first."""
+    payload = {
+        'total': total,
+        'shown': shown,
+        'results': [{
+            'title': r['title'],
+            'year': r['year'] if r['year'] is not None else 'n.d.',
+            'score': f"{r['score']:.2f}",
+            'category': r.get('category'),
+            'authors': ', '.join(a['name'] for a in r['authors']) if r['authors'] else 'N/A',
+            'abstract': r.get('abstract') or '',
+            'url': r.get('pub_url'),
+        } for r in results],
+    }
+    list_height = min(LIST_HEIGHT, len(results) * ROW_HEIGHT + 8)
+    results_html = (RESULTS_HTML.replace('__LIST_HEIGHT__', str(list_height))
+            .replace('__CARD_HEIGHT__', str(ROW_HEIGHT - 12))
+            .replace('__ROW_HEIGHT__', str(ROW_HEIGHT))
+            .replace('__PAGE__', str(RESULTS_PAGE))
+            .replace('__PAYLOAD__', json.dumps(payload).replace('<', '\\u003c')))  # no '</script>' in the data
+    components.html(results_html, height=list_height + 56)
 
 # --- Page Config ---
 st.set_page_config(page_title="Information Retrieval Search Engine", page_icon="📚", layout="wide")
@@ -12,6 +146,8 @@ page = st.sidebar.radio("Go to", ["🔍 Search Engine", "🧠 Document Classifie
 
 # ------------------ SEARCH ENGINE PAGE ------------------
 if page == "🔍 Search Engine":
+    # Created before anything else so it keeps its state whether or not a query is entered.
+    debug = st.sidebar.checkbox("🛠️ Debug panel", key="debug_panel")
 
     # --- Custom CSS for style and animation ---
     st.markdown("""
@@ -39,28 +175,6 @@ if page == "🔍 Search Engine":
             margin-bottom: 1.5rem;
             animation: fadeInDown 0.7s;
         }
-        .result-card {
-            background: #fff;
-            border-radius: 12px;
-            box-shadow: 0 2px 8px #e0eafc;
-            padding: 1.5rem 1.2rem;
-            margin-bottom: 1.2rem;
-            transition: box-shadow 0.3s;
-            animation: fadeInUp 0.6s;
-            cursor: pointer;
-        }
-        .result-card:hover {
-            box-shadow: 0 6px 24px #b3cdf6;
-            transform: scale(1.02);
-            border: 2px solid #3066be;
-        }
-        .result-title {
-            font-size: 1.25rem;
-            font-weight: 700;
-            color: #20509e;
-            margin-bottom: 0.3rem;
-            text-decoration: none;
-        }
         .chip {
             display: inline-block;
             padding: 5px 14px;
@@ -71,17 +185,6 @@ if page == "🔍 Search Engine":
             color: #3066be;
             font-weight: 600;
         }
-        .authors {
-            color: #444;
-            font-size: 1rem;
-            margin-bottom: 8px;
-        }
-        .abstract {
-            color: #333;
-            font-size: 1rem;
-            margin-top: 7px;
-            animation: fadeIn 1.2s;
-        }
         .filter-bar {
             background: #f7fafd;
             border-radius: 12px;
@@ -110,33 +213,6 @@ if page == "🔍 Search Engine":
             from { opacity: 0;}
             to { opacity: 1;}
         }
-        .popup-bg {
-            position: fixed;
-            top:0; left:0; width:100vw; height:100vh;
-            background: rgba(48,102,190,0.13);
-            z-index:99;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }
-        .popup-card {
-            background: #fff;
-            border-radius: 20px;
-            box-shadow: 0 8px 40px #20509e57;
-            padding: 2rem 2.2rem 1.5rem 2.2rem;
-            max-width: 540px;
-            min-width: 320px;
-            z-index:100;
-            animation: fadeIn 0.5s;
-        }
-        .popup-close {
-            float:right;
-            font-size: 1.8rem;
-            color: #3066be;
-            cursor: pointer;
-            margin-top: -10px;
-            margin-right: -8px;
-        }
         </style>
     """, unsafe_allow_html=True)
 
@@ -164,20 +240,8 @@ if page == "🔍 Search Engine":
             st.rerun()
 
 
-    # --- Filter Bar ---
-    st.markdown("<div class='filter-bar'>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        yfrom = st.number_input("📅 From Year", min_value=1900, max_value=2100, value=2010, step=1)
-    with col2:
-        yto = st.number_input("📅 To Year", min_value=1900, max_value=2100, value=2100, step=1)
-    with col3:
-        score_min = st.slider("⭐ Min. Score", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
-    st.markdown("</div>", unsafe_allow_html=True)
-
     # --- Load Index ---
-    idx_path = 'data/index.json'
-    postings_path = 'data/postings.json'
+    idx_path, postings_path = default_index_paths()
 
     try:
         meta, postings = load_index(idx_path, postings_path)
@@ -186,86 +250,69 @@ if page == "🔍 Search Engine":
         ready = False
         st.warning('⚠️ Index not found. Please run the crawler and indexer first.')
 
-    # --- Infinite Scroll State ---
-    if "loaded_count" not in st.session_state:
-        st.session_state.loaded_count = 15
-    if "popup_data" not in st.session_state:
-        st.session_state.popup_data = None
+    # --- Filter Bar ---
+    # Categories come from labels stored in the index (indexer.py --classify): no model call per query.
+    categories = category_labels(meta) if ready else []
+    st.markdown("<div class='filter-bar'>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        yfrom = st.number_input("📅 From Year", min_value=1900, max_value=2100, value=2010, step=1)
+    with col2:
+        yto = st.number_input("📅 To Year", min_value=1900, max_value=2100, value=2100, step=1)
+    with col3:
+        score_min = st.slider("⭐ Min. Score", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
+    with col4:
+        selected_categories = st.multiselect("🏷️ Category", categories, disabled=not categories,
+                                             help=None if categories else "Rebuild the index with --classify")
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    def show_popup(pub):
-        st.session_state.popup_data = pub
-    def close_popup():
-        st.session_state.popup_data = None
+    # --- Results paging: the component shows RESULTS_PAGE more per click from a payload of payload_size ---
+    # A new query or filter starts again from the first payload.
+    search_key = (q, int(yfrom), int(yto), score_min, tuple(selected_categories))
+    if st.session_state.get("search_key") != search_key:
+        st.session_state.search_key = search_key
+        st.session_state.payload_size = RESULTS_PAYLOAD
 
     # --- Search Results ---
+    trace = None
     if ready and q.strip():
         with st.spinner("🔎 Searching..."):
-            all_results = rank(meta, postings, q, topk=99999, year_from=int(yfrom), year_to=int(yto))
+            trace = QueryTrace()
+            try:
+                all_results, facets = rank(meta, postings, q, topk=99999, year_from=int(yfrom), year_to=int(yto),
+                                           category=selected_categories or None, with_facets=True, trace=trace)
+            except ValueError as e:  # e.g. a query with only NOT clauses
+                st.warning(f'⚠️ {e}')
+                all_results, facets = [], {}
             all_results = [r for r in all_results if r['score'] >= score_min]
 
         total_results = len(all_results)
         st.markdown(f"<h4 style='color:#20509e;margin-bottom:1rem;'>{total_results} results found</h4>", unsafe_allow_html=True)
-        loaded_count = st.session_state.loaded_count
-
-        show_results = all_results[:loaded_count]
-        for idx, r in enumerate(show_results):
-            year = r['year'] if r['year'] is not None else 'n.d.'
-            card_key = f"resultcard_{idx}"
-            st.markdown(
-                f"""
-                <div class="result-card" onclick="window.dispatchEvent(new CustomEvent('popup_{card_key}'));">
-                    <a href="{r['pub_url']}" target="_blank" class="result-title">{r['title']}</a>
-                    <div>
-                        <span class="chip">📅 {year}</span>
-                        <span class="chip">⭐ {r['score']:.2f}</span>
-                    </div>
-                    <div class="authors">
-                        <b>👤 Authors:</b> {', '.join(a['name'] for a in r['authors']) if r['authors'] else 'N/A'}
-                    </div>
-                    {'<div class="abstract">' + r['abstract'] + '</div>' if r.get('abstract') else ''}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-            components.html(f"""
-            <script>
-            window.addEventListener("popup_{card_key}", function() {{
-                window.parent.postMessage({{"popup": "{card_key}"}}, "*");
-            }});
-            </script>
-            """, height=0)
-
-            if st.button("🔎 View Details", key=f"popupbtn_{card_key}"):
-                show_popup(r)
-
-        if loaded_count < total_results:
-            if st.button("Load more results"):
-                st.session_state.loaded_count += 15
-                st.experimental_rerun()
-
-        if st.session_state.popup_data is not None:
-            pub = st.session_state.popup_data
-            year = pub['year'] if pub['year'] is not None else 'n.d.'
-            authors = ', '.join(a['name'] for a in pub['authors']) if pub['authors'] else 'N/A'
-            abstract = pub.get('abstract', 'No abstract available.')
-            components.html(f"""
-            <div class="popup-bg" onclick="window.parent.postMessage({{popup_close: true}}, '*');">
-                <div class="popup-card" onclick="event.stopPropagation();">
-                    <span class="popup-close" onclick="window.parent.postMessage({{popup_close: true}}, '*');">&times;</span>
-                    <h2 style="color:#20509e;">{pub['title']}</h2>
-                    <p><b>Year:</b> {year} &nbsp; <b>Score:</b> {pub['score']:.2f}</p>
-                    <p><b>Authors:</b> {authors}</p>
-                    <p style="margin-top:18px;">{abstract}</p>
-                    <p style='margin-top:16px;'><a href="{pub['pub_url']}" target="_blank" style="color:#3066be;">Open publication ↗</a></p>
-                </div>
-            </div>
-            """, height=400)
-            if st.button("Close", key="popup_close_btn"):
-                close_popup()
-                st.experimental_rerun()
+        for field, icon in (('category', '🏷️'), ('year', '📅'), ('author', '👤')):
+            if facets.get(field):
+                st.markdown(' '.join(f"<span class='chip'>{icon} {html.escape(str(value))} · {n}</span>"
+                                     for value, n in facets[field].items()), unsafe_allow_html=True)
+        payload_size = st.session_state.payload_size
+        if all_results:
+            render_results(all_results[:payload_size], total_results,
+                           shown=min(total_results, max(RESULTS_PAGE, payload_size - RESULTS_PAYLOAD + RESULTS_PAGE)))
+        if payload_size < total_results:
+            if st.button(f"Load more results ({total_results - payload_size} not sent yet)"):
+                st.session_state.payload_size += RESULTS_PAYLOAD
+                st.rerun()
     elif ready:
         st.info("💡 Enter a search query above to find publications.")
 
+    if debug:
+        with st.sidebar.expander("Query trace", expanded=True):
+            if trace is not None:
+                st.json(trace.as_dict())
+            else:
+                st.caption("Run a search to see its trace.")
+        if ready:
+            with st.sidebar.expander("Index memory (MiB)"):
+                st.json({part: round(size / 2**20, 2) for part, size in index_memory(meta, postings).items()})
+
 # ------------------ DOCUMENT CLASSIFIER PAGE ------------------
 elif page == "🧠 Document Classifier":
     st.title("🧠 Document Classifier")
@@ -284,5 +331,6 @@ elif page == "🧠 Document Classifier":
 
     if st.button("Classify") and text.strip():
         with st.spinner("Classifying..."):
+            from classifier.predict import classify  # loads joblib/sklearn only when the classifier is used
             prediction = classify(text)
         st.success(f"Predicted Category: **{prediction}**")
@@ -1,19 +1,105 @@
-import argparse, webbrowser
-from search_core import load_index, rank
+import argparse, json, os, statistics, sys, time, webbrowser
+from facets import FACET_FIELDS
+from preprocess import normalize
+from search_core import QueryTrace, category_labels, default_index_paths, index_memory, load_index, load_index_traced, rank
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument('query')
-    ap.add_argument('--index', default='data/index.json')
-    ap.add_argument('--postings', default='data/postings.json')
+    ap.add_argument('query', nargs='?', help='Free text; author:smith or author:"Smith J" limits to an author\'s papers; '
+                                  'AND / OR / NOT and +term / -term match boolean expressions, grouped with (...)')
+    ap.add_argument('--index', help='Default: the published version in data/, else data/index.json')
+    ap.add_argument('--postings')
     ap.add_argument('--topk', type=int, default=20)
     ap.add_argument('--from-year', type=int)
     ap.add_argument('--to-year', type=int)
+    ap.add_argument('--category', action='append', help='Only this predicted category (repeatable; needs indexer --classify)')
+    ap.add_argument('--min-confidence', type=float, default=0.0, help='Minimum classifier confidence for --category')
     ap.add_argument('--open', action='store_true', help='Open top result in browser')
+    ap.add_argument('--facets', action='store_true', help='Also count matches per year and top co-authors')
+    ap.add_argument('--trace', action='store_true', help='Print per-phase query timings and index memory use')
+    ap.add_argument('--expand', action='store_true', help='Add related terms from the LSA index (indexer --semantic)')
+    ap.add_argument('--similar', type=int, metavar='N', help='Show papers similar to result N (needs indexer --semantic)')
+    ap.add_argument('--queries-file', metavar='PATH', help="Run every query in PATH ('-' = stdin; text lines or JSONL "
+                                                           "with \"query\") and write one JSONL result line per query")
+    ap.add_argument('--out', help='Write --queries-file results here instead of stdout')
+    ap.add_argument('--repl', action='store_true', help='Keep the index loaded and read queries interactively')
     args = ap.parse_args()
+    batch = args.queries_file is not None
+    if batch and args.repl:
+        ap.error('--queries-file and --repl are exclusive')
+    if (batch or args.repl) and (args.query or args.similar is not None or args.open):
+        ap.error('a query, --similar and --open only apply to a single search')
+    if not (batch or args.repl or args.query):
+        ap.error('a query, --queries-file or --repl is required')
+    if args.similar is not None and args.similar < 1:
+        ap.error('--similar must be at least 1')
 
-    meta, postings = load_index(args.index, args.postings)
-    results = rank(meta, postings, args.query, topk=args.topk, year_from=args.from_year, year_to=args.to_year)
+    default_index, default_postings = default_index_paths()
+    index_path = args.index or default_index
+    if args.trace:
+        meta, postings, load_stats = load_index_traced(index_path, args.postings or default_postings)
+    else:
+        meta, postings = load_index(index_path, args.postings or default_postings)
+    if (args.category or args.min_confidence > 0) and not category_labels(meta):
+        ap.error('--category / --min-confidence need an index built with indexer.py --classify')
+    semantic = None
+    if args.expand or args.similar:
+        from semantic import SemanticIndex, semantic_dir_for
+        if not os.path.exists(os.path.join(semantic_dir_for(index_path), 'semantic.json')):
+            ap.error('no semantic index; rebuild with indexer.py --semantic')
+        semantic = SemanticIndex(semantic_dir_for(index_path))
+
+    def search(query: str, trace=None):
+        """(results, facets, expansion, seconds) for one query with the command-line filters."""
+        t0 = time.perf_counter()
+        expansion = semantic.expand(normalize(query), meta['idf']) if args.expand else None
+        results, facets = rank(meta, postings, query, topk=args.topk, year_from=args.from_year,
+                               year_to=args.to_year, category=args.category, min_confidence=args.min_confidence,
+                               with_facets=True, expansion=expansion,
+                               facet_fields=FACET_FIELDS if args.facets else ('category',), trace=trace)
+        return results, facets, expansion, time.perf_counter() - t0
+
+    if batch:
+        run_batch(args, search)
+        return
+    if args.repl:
+        run_repl(args, search)
+        return
+
+    trace = QueryTrace() if args.trace else None
+    try:
+        results, facets, expansion, _ = search(args.query, trace)
+    except ValueError as e:  # e.g. a query with only NOT clauses
+        ap.error(str(e))
+    if args.similar and args.similar > len(results):  # checked before anything is printed
+        ap.error(f'--similar must be between 1 and {len(results)}' if results else '--similar: the query has no results')
+    if expansion:
+        print('Expanded with: ' + ', '.join(f'{t} ({w:.2f})' for t, w in expansion.items()))
+    if trace is not None:
+        print(trace.format())
+        print(f"load_index: {load_stats['seconds'] * 1000:.0f} ms, {load_stats['allocated_bytes'] / 2**20:.1f} MiB "
+              f"allocated (peak {load_stats['peak_bytes'] / 2**20:.1f} MiB)")
+        print('index memory: ' + ', '.join(f'{part} {size / 2**20:.2f} MiB'
+                                           for part, size in index_memory(meta, postings).items()))
+        print()
+    print_results(results, facets)
+
+    if args.similar:
+        source = results[args.similar - 1]
+        print(f"Similar to [{args.similar}] {source['title']}:")
+        for did, score in semantic.similar(source['doc_id'], k=args.topk):
+            rec = meta['docs'][did]
+            print(f"  {score:.3f}  {rec.get('title')} ({rec.get('year') or 'n.d.'})  {rec.get('pub_url')}")
+
+    if args.open and results:
+        webbrowser.open(results[0]['pub_url'])
+
+def print_results(results, facets):
+    for field, title in (('category', 'Categories'), ('year', 'Years'), ('author', 'Top authors')):
+        if facets.get(field):
+            print(f'{title}: ' + ', '.join(f'{value} ({n})' for value, n in facets[field].items()))
+    if any(facets.values()):
+        print()
 
     if not results:
         print('No results.')
@@ -22,7 +108,8 @@ def main():
     for i, r in enumerate(results, 1):
         authors = ', '.join(a['name'] for a in r['authors'])
         year = r['year'] if r['year'] is not None else 'n.d.'
-        print(f"[{i}] {r['title']} ({year})  score={r['score']}")
+        category = f"  [{r['category']} {r['category_confidence']:.2f}]" if r.get('category') else ''
+        print(f"[{i}] {r['title']} ({year})  score={r['score']}{category}")
         if authors:
             print(f"    Authors: {authors}")
         if r.get('abstract'):
@@ -30,8 +117,100 @@ def main():
         print(r['pub_url'])
         print()
 
-    if args.open:
-        webbrowser.open(results[0]['pub_url'])
+def read_queries(f, skipped=None):
+    """Queries from text lines or JSONL records with "query" (or "q"); blank lines and '#' comments skipped.
+
+    A malformed JSONL line is reported on stderr with its line number and skipped;
+    its number is also appended to the ``skipped`` list when one is given.
+    """
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            try:
+                rec = json.loads(line)
+                line = rec.get('query') or rec.get('q') or ''
+                if not isinstance(line, str):
+                    raise ValueError('"query" is not a string')
+            except ValueError as e:  # JSONDecodeError is one
+                print(f'line {lineno}: skipped ({e})', file=sys.stderr)
+                if skipped is not None:
+                    skipped.append(lineno)
+                continue
+        if line:
+            yield line
+
+def _latency_summary(latencies) -> str:
+    if not latencies:
+        return '0 queries'
+    ms = sorted(1000 * s for s in latencies)
+    p95 = ms[min(len(ms) - 1, int(0.95 * len(ms)))]
+    return (f'{len(ms)} queries in {sum(ms) / 1000:.2f}s: mean {statistics.fmean(ms):.2f} ms, '
+            f'median {statistics.median(ms):.2f} ms, p95 {p95:.2f} ms, max {ms[-1]:.2f} ms')
+
+def run_batch(args, search):
+    """One JSONL line per query, written as soon as it is answered; a latency summary goes to stderr."""
+    src = sys.stdin if args.queries_file == '-' else open(args.queries_file, 'r', encoding='utf-8')
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    latencies = []
+    try:
+        for query in read_queries(src):
+            trace = QueryTrace() if args.trace else None
+            try:
+                results, facets, expansion, seconds = search(query, trace)
+            except ValueError as e:
+                out.write(json.dumps({'query': query, 'error': str(e)}, ensure_ascii=False) + '\n')
+                out.flush()
+                continue
+            latencies.append(seconds)
+            line = {'query': query, 'latency_ms': round(seconds * 1000, 3), 'results': results, 'facets': facets}
+            if expansion:
+                line['expansion'] = expansion
+            if trace is not None:
+                line['trace'] = trace.as_dict()
+            out.write(json.dumps(line, ensure_ascii=False) + '\n')
+            out.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(_latency_summary(latencies), file=sys.stderr)
+
+def run_repl(args, search):
+    """Read queries until EOF / :q, printing results and the time each took."""
+    try:
+        import readline  # noqa: F401  (line editing and history for input())
+    except ImportError:
+        pass
+    latencies = []
+    print('Index loaded. Type a query, or :q to quit.')
+    while True:
+        try:
+            query = input('search> ').strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if query in (':q', ':quit'):  # not 'exit': that is a query like any other
+            break
+        if not query:
+            continue
+        trace = QueryTrace() if args.trace else None
+        try:
+            results, facets, expansion, seconds = search(query, trace)
+        except ValueError as e:
+            print(f'Error: {e}')
+            continue
+        latencies.append(seconds)
+        if expansion:
+            print('Expanded with: ' + ', '.join(f'{t} ({w:.2f})' for t, w in expansion.items()))
+        if trace is not None:
+            print(trace.format())
+            print()
+        print_results(results, facets)
+        print(f'({len(results)} results in {seconds * 1000:.1f} ms)')
+    print(_latency_summary(latencies))
 
 if __name__ == '__main__':
     main()
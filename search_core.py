@@ -1,7 +1,20 @@
-import json, math
-from typing import List, Dict
+import heapq, json, math, os, re, sys, time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from facets import FACET_FIELDS, TOP_AUTHORS
 from preprocess import normalize
 
+def default_index_paths(data_dir: str = 'data') -> Tuple[str, str]:
+    """Index files of the version published by pipeline.py, else the legacy data/index.json pair."""
+    manifest_path = os.path.join(data_dir, 'index_manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            current = json.load(f).get('current')
+        if current:
+            version_dir = os.path.join(data_dir, 'index_versions', current)
+            return os.path.join(version_dir, 'index.json'), os.path.join(version_dir, 'postings.json')
+    return os.path.join(data_dir, 'index.json'), os.path.join(data_dir, 'postings.json')
+
 def load_index(index_path: str, postings_path: str):
     with open(index_path, 'r', encoding='utf-8') as f:
         meta = json.load(f)
@@ -9,35 +22,482 @@ def load_index(index_path: str, postings_path: str):
         postings = json.load(f)
     return meta, postings
 
-def rank(meta: dict, postings: dict, query: str, topk: int = 20, year_from=None, year_to=None):
-    q_toks = normalize(query)
-    if not q_toks:
-        return []
+def category_labels(meta: dict) -> List[str]:
+    """Categories stored by ``indexer.py --classify`` (empty for indexes built without it)."""
+    return list(meta.get('categories', {}).get('labels', []))
+
+def doc_years(meta: dict) -> Dict[str, Optional[int]]:
+    """doc id -> year, one flat dict kept on ``meta`` so the year filter is a single lookup per posting."""
+    cached = meta.get('_doc_years')
+    if cached is None:
+        cached = meta['_doc_years'] = {did: rec.get('year') for did, rec in meta['docs'].items()}
+    return cached
+
+def doc_rows(meta: dict) -> Dict[str, int]:
+    """doc id -> position in the unsharded index (shards store it as ``global_rows``); the last tie-break."""
+    cached = meta.get('_doc_rows')
+    if cached is None:
+        rows = meta.get('global_rows') or range(len(meta['docs']))
+        cached = meta['_doc_rows'] = dict(zip(meta['docs'], rows))
+    return cached
+
+def doc_categories(meta: dict) -> Dict[str, Tuple[int, float]]:
+    """doc id -> (category code, confidence), built once from the index columns and kept on ``meta``."""
+    cached = meta.get('_doc_categories')
+    if cached is None:
+        cols = meta.get('categories') or {'codes': [], 'confidence': []}
+        cached = dict(zip(meta['docs'], zip(cols['codes'], cols['confidence'])))
+        meta['_doc_categories'] = cached
+    return cached
+
+class QueryTrace:
+    """Opt-in per-query stats: pass one to ``rank(..., trace=...)`` and read it afterwards."""
+
+    def __init__(self):
+        self.query = None
+        self.phases: Dict[str, float] = {}   # seconds, in the order the phases ran
+        self.counters: Counter = Counter()
+        self.start()
+
+    def start(self, query: Optional[str] = None):
+        self.query = query
+        self.phases.clear()
+        self.counters.clear()
+        self._last = self._started = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self._started
+
+    def as_dict(self) -> dict:
+        return {
+            'query': self.query,
+            'total_ms': round(self.total * 1000, 3),
+            'phases_ms': {k: round(v * 1000, 3) for k, v in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+
+    def format(self) -> str:
+        lines = [f"trace: {self.total * 1000:.2f} ms total"]
+        for phase, sec in self.phases.items():
+            share = sec / self.total * 100 if self.total else 0.0
+            lines.append(f"  {phase:<16}{sec * 1000:>9.3f} ms  {share:5.1f}%")
+        lines.append('  ' + ', '.join(f'{k}={v}' for k, v in self.counters.items()))
+        return '\n'.join(lines)
+
+def _no_lap(phase: str):
+    pass
+
+def deep_sizeof(obj) -> int:
+    """sys.getsizeof of ``obj`` and everything reachable through dicts, lists, tuples and sets (each object once)."""
+    seen, stack, total = set(), [obj], 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
+
+def index_memory(meta: dict, postings: dict) -> Dict[str, int]:
+    """Bytes held by each part of a loaded index (deep sizeof; shared strings are counted where first seen)."""
+    parts = {'idf': meta.get('idf', {}), 'postings': postings, 'docs': meta.get('docs', {})}
+    parts.update({k: v for k, v in meta.items() if k not in parts and k != 'num_docs'})
+    return {name: deep_sizeof(value) for name, value in parts.items()}
+
+def load_index_traced(index_path: str, postings_path: str):
+    """``load_index`` under tracemalloc: returns (meta, postings, {'seconds', 'allocated_bytes', 'peak_bytes'})."""
+    import tracemalloc
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    meta, postings = load_index(index_path, postings_path)
+    seconds = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    if started:
+        tracemalloc.stop()
+    return meta, postings, {'seconds': round(seconds, 4), 'allocated_bytes': current - before, 'peak_bytes': peak - before}
+
+_AUTHOR_RE = re.compile(r'\bauthor:(?:"([^"]*)"|(\S+))', re.I)
+
+def parse_query(query: str) -> Tuple[str, List[str]]:
+    """Split ``author:smith`` / ``author:"Smith J"`` clauses off the free-text part of a query."""
+    authors = [quoted or bare for quoted, bare in _AUTHOR_RE.findall(query)]
+    return _AUTHOR_RE.sub(' ', query), [a for a in authors if a.strip()]
+
+# ---------------- Boolean queries ----------------
+# Operators are upper-case so "and" / "or" / "not" typed as words stay ordinary (stop)words.
+_BOOL_TOKEN_RE = re.compile(r'[()]|[^\s()]+')
+_BOOL_SYNTAX_RE = re.compile(r'\b(?:AND|OR|NOT)\b|(?:^|[\s(])[+-](?=\w)')  # parentheses alone stay plain text
+NEGATIVE_ONLY = 'the query only excludes terms (NOT / -); add a term or an author: clause to match against'
+
+def parse_boolean(text: str):
+    """
+    ``climate AND risk NOT insurance`` / ``+climate risk -insurance`` / ``(flood OR drought) AND risk``
+    -> a tree of ``('term', token)`` and ``('bool', must, should, must_not)`` nodes, or None for a plain
+    query (which keeps the disjunctive ranking). AND makes both neighbours required, ``+`` one term,
+    NOT / ``-`` exclude; other clauses are optional and only add to the score when something is required.
+    Parentheses only group once an operator or ``+`` / ``-`` makes the query boolean.
+    """
+    if not _BOOL_SYNTAX_RE.search(text):
+        return None
+    node, _ = _parse_group(_BOOL_TOKEN_RE.findall(text), 0)
+    return node or ('bool', [], [], [])
+
+def _parse_group(toks: List[str], i: int):
+    clauses = []  # [occur, node]
+    pending_and = negate = False
+    while i < len(toks):
+        tok = toks[i]
+        i += 1
+        if tok == ')':
+            break
+        if tok in ('AND', 'OR', 'NOT'):
+            pending_and = pending_and or tok == 'AND'
+            negate = negate or tok == 'NOT'
+            continue
+        occur = 'should'
+        if tok == '(':
+            node, i = _parse_group(toks, i)
+        else:
+            if len(tok) > 1 and tok[0] in '+-':
+                occur, tok = ('must' if tok[0] == '+' else 'not'), tok[1:]
+            terms = normalize(tok)
+            node = ('term', terms[0]) if len(terms) == 1 else \
+                ('bool', [('term', t) for t in terms], [], []) if terms else None  # "risk-based": every part
+        if negate:
+            occur = 'not'
+        if pending_and:
+            occur = 'must' if occur == 'should' else occur
+            if clauses and clauses[-1][0] == 'should':
+                clauses[-1][0] = 'must'
+        pending_and = negate = False
+        if node is not None:
+            clauses.append([occur, node])
+    groups = {'must': [], 'should': [], 'not': []}
+    for occur, node in clauses:
+        groups[occur].append(node)
+    if not groups['must'] and not groups['should'] and not groups['not']:
+        return None, i
+    return ('bool', groups['must'], groups['should'], groups['not']), i
+
+def excludes(node) -> bool:
+    return node[0] == 'bool' and (bool(node[3]) or any(excludes(child) for child in node[1] + node[2]))
+
+def validate_query(query: str):
+    """ValueError for a query that can only exclude (``NOT x``, ``-x``): it would match nothing."""
+    text, author_queries = parse_query(query)
+    tree = parse_boolean(text)
+    if tree is not None and not author_queries and not positive_terms(tree) and excludes(tree):
+        raise ValueError(NEGATIVE_ONLY)
+
+def positive_terms(node) -> List[str]:
+    """Terms that score: everything outside NOT clauses, in query order."""
+    if node[0] == 'term':
+        return [node[1]]
+    return [t for child in node[1] + node[2] for t in positive_terms(child)]
+
+def _gallop(key, n: int, lo: int, target: int) -> Tuple[int, int]:
+    """First i >= lo with key(i) >= target (n if none) and the number of probes: doubling steps, then bisection."""
+    probes, step, hi = 0, 1, lo
+    while hi < n:
+        probes += 1
+        if key(hi) >= target:
+            break
+        lo = hi + 1
+        hi += step
+        step *= 2
+    hi = min(hi, n)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        probes += 1
+        if key(mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo, probes
+
+class _BooleanMatcher:
+    """
+    Evaluates a ``parse_boolean`` tree over postings sorted by doc row (the order the indexer appends them).
+    Required clauses are intersected smallest list first. A much longer list is probed with galloping
+    search instead of being read, so ``postings_scanned`` follows the rarest required term, not the commonest.
+    """
+
+    def __init__(self, meta: dict, postings: dict):
+        self.rows, self.postings, self.touched = doc_rows(meta), postings, 0
+        self.tf: Dict[str, dict] = {}  # term -> {doc: tf} for postings read in full, reused when scoring
+
+    def _plist(self, term: str):
+        return self.postings[term] if term in self.postings else ()
+
+    def _size(self, node) -> int:
+        return len(self._plist(node[1])) if node[0] == 'term' else -1
+
+    def _read(self, term: str) -> dict:
+        if term not in self.tf:
+            plist = self._plist(term)
+            self.touched += len(plist)
+            self.tf[term] = dict(plist)
+        return self.tf[term]
+
+    def docs(self, node) -> list:
+        """Matching doc ids in row order."""
+        if node[0] == 'term':
+            return list(self._read(node[1]))
+        _, must, should, must_not = node
+        if must:
+            # Sub-queries (size unknown until evaluated) go first; their result is usually small.
+            ordered = sorted(must, key=self._size)
+            cand = self.docs(ordered[0])
+            for child in ordered[1:]:
+                if not cand:
+                    break
+                cand = self._filter(cand, child, keep=True)
+        else:
+            cand = self._union([self.docs(child) for child in should])
+        for child in must_not:
+            if not cand:
+                break
+            cand = self._filter(cand, child, keep=False)
+        return cand
+
+    def restrict(self, cand: list, node) -> list:
+        """``cand`` (row order) minus the docs excluded by the tree's NOT clauses (author-only queries)."""
+        for child in node[3]:
+            cand = self._filter(cand, child, keep=False)
+        return cand
+
+    def _worth_galloping(self, n: int, m: int) -> bool:
+        """Probing a list of ``n`` for ``m`` docs (~2 log2(n/m) probes each) beats reading all ``n``."""
+        return m and n > 4 * m * (1 + math.log2(n / m + 1))
+
+    def _filter(self, cand: list, node, keep: bool) -> list:
+        """Docs of ``cand`` that are (keep) / are not in ``node``'s matches."""
+        if node[0] == 'bool':
+            members = set(self.docs(node))
+        elif node[1] in self.tf or not self._worth_galloping(len(self._plist(node[1])), len(cand)):
+            members = self._read(node[1])
+        else:
+            plist, rows = self._plist(node[1]), self.rows
+            key, n, j, out = (lambda i: rows[plist[i][0]]), len(plist), 0, []
+            for did in cand:
+                r = rows[did]
+                j, probes = _gallop(key, n, j, r)
+                self.touched += probes
+                hit = j < n and plist[j][0] == did
+                if hit == keep:
+                    out.append(did)
+            return out
+        return [did for did in cand if (did in members) == keep]
+
+    def _union(self, lists: List[list]) -> list:
+        lists = [docs for docs in lists if docs]
+        if len(lists) < 2:
+            return lists[0] if lists else []
+        out, last = [], None
+        for did in heapq.merge(*lists, key=self.rows.__getitem__):
+            if did != last:
+                out.append(did)
+                last = did
+        return out
+
+    def score(self, docs: list, weighted: List[Tuple[str, float]], idf: dict, counters: Counter) -> Dict[str, float]:
+        """TF-IDF of ``docs`` (row order) over the positive terms, same formula as the disjunctive scan."""
+        scores = dict.fromkeys(docs, 0.0)
+        rows = self.rows
+        for qt, weight in weighted:
+            plist = self._plist(qt)
+            if not plist:
+                counters['terms_missing'] += 1
+                continue
+            counters['terms'] += 1
+            w = idf.get(qt, 0.0) * weight
+            if qt in self.tf or not self._worth_galloping(len(plist), len(docs)):
+                tfs = self._read(qt)
+                for did in docs:
+                    tf = tfs.get(did)
+                    if tf:
+                        scores[did] += (1 + math.log(tf)) * w
+                continue
+            key, n, j = (lambda i: rows[plist[i][0]]), len(plist), 0
+            for did in docs:
+                j, probes = _gallop(key, n, j, rows[did])
+                self.touched += probes
+                if j == n:
+                    break
+                d, tf = plist[j]
+                if d == did:
+                    scores[did] += (1 + math.log(tf)) * w
+        return scores
+
+def score_query(meta: dict, postings: dict, query: str, year_from=None, year_to=None,
+                category: Optional[Union[str, Iterable[str]]] = None, min_confidence: float = 0.0,
+                with_facets: bool = False, expansion: Optional[Dict[str, float]] = None,
+                facet_fields: Iterable[str] = FACET_FIELDS, top_authors: Optional[int] = TOP_AUTHORS,
+                trace: Optional[QueryTrace] = None) -> Tuple[Dict[str, float], dict]:
+    """Every doc matching ``query`` after the filters, with its TF-IDF score, and the facets (see ``rank``)."""
+    lap = trace.lap if trace is not None else _no_lap
+    counters = trace.counters if trace is not None else Counter()
+    if trace is not None:
+        trace.start(query)
+    text, author_queries = parse_query(query)
+    tree = parse_boolean(text)
+    q_toks = normalize(text) if tree is None else positive_terms(tree)
+    lap('normalize')
+    allowed = None
+    if author_queries:
+        from authors import author_index
+        index = author_index(meta)
+        by_author = [index.lookup(a) for a in author_queries]
+        allowed = set(by_author[0]).intersection(*by_author[1:])
+        counters['author_docs'] = len(allowed)
+        lap('author_lookup')
+    if tree is not None and not q_toks and allowed is None and excludes(tree):
+        raise ValueError(NEGATIVE_ONLY)
+    if not q_toks and allowed is None:
+        return {}, ({f: {} for f in facet_fields} if with_facets else {})
+
+    # Year filter: an undated doc never passes a bound. Checked per posting so rejected docs are never scored.
+    years = None
+    if year_from is not None or year_to is not None:
+        years = doc_years(meta)
+        lap('year_table')
+    lo = year_from if year_from is not None else -math.inf
+    hi = year_to if year_to is not None else math.inf
 
     scores = {}
-    for qt in q_toks:
+    weighted = [(qt, 1.0) for qt in q_toks] + list((expansion or {}).items())
+    if tree is not None:
+        # Boolean query: match first (sorted-postings intersection), then score only the matches.
+        matcher = _BooleanMatcher(meta, postings)
+        if q_toks:
+            matched = matcher.docs(tree)
+        else:  # author clauses with only NOT clauses beside them
+            matched = matcher.restrict(by_author[0], tree)
+        matched = [did for did in matched if (allowed is None or did in allowed) and
+                   (years is None or (years[did] is not None and lo <= years[did] <= hi))]
+        counters['boolean_matches'] = len(matched)
+        scores = matcher.score(matched, weighted, meta['idf'], counters) if q_toks else dict.fromkeys(matched, 0.0)
+        counters['postings_scanned'] += matcher.touched
+        weighted = []
+    for qt, weight in weighted:
         if qt not in postings:
+            counters['terms_missing'] += 1
             continue
-        idf = meta['idf'].get(qt, 0.0)
-        for did, tf in postings[qt]:
-            rec = meta['docs'][did]
-            y = rec.get('year')
-            if year_from is not None and (y is None or y < year_from):
-                continue
-            if year_to is not None and (y is None or y > year_to):
+        idf = meta['idf'].get(qt, 0.0) * weight
+        plist = postings[qt]
+        counters['terms'] += 1
+        counters['postings_scanned'] += len(plist)
+        for did, tf in plist:
+            if allowed is not None and did not in allowed:
                 continue
+            if years is not None:
+                y = years[did]
+                if y is None or y < lo or y > hi:
+                    continue
             scores[did] = scores.get(did, 0.0) + (1 + math.log(tf)) * idf
+    if not q_toks and tree is None:  # author clauses only: every paper scores 0 and top_docs lists them newest first
+        scores = dict.fromkeys((did for did in by_author[0] if did in allowed and
+                                (years is None or (years[did] is not None and lo <= years[did] <= hi))), 0.0)
+    counters['candidates'] = len(scores)
+    lap('scan')
+
+    labels = category_labels(meta)
+    cats = doc_categories(meta) if labels else {}
+    facets = {}
+    if with_facets and 'category' in facet_fields:
+        counts = Counter(cats[did][0] for did in scores if did in cats)
+        facets['category'] = dict(sorted(((labels[code], n) for code, n in counts.items()),
+                                         key=lambda x: (-x[1], x[0])))
+    if labels and (category or min_confidence > 0):
+        wanted = {category} if isinstance(category, str) else set(category or labels)
+        codes = {i for i, label in enumerate(labels) if label in wanted}
+        scores = {did: sc for did, sc in scores.items()
+                  if did in cats and cats[did][0] in codes and cats[did][1] >= min_confidence}
+        counters['after_category_filter'] = len(scores)
+    lap('category')
+
+    if with_facets and ('year' in facet_fields or 'author' in facet_fields):
+        from facets import facet_columns
+        columns = facet_columns(meta)
+        rows = columns.rows(scores)
+        if 'year' in facet_fields:
+            facets['year'] = columns.year_counts(rows)
+        if 'author' in facet_fields:
+            facets['author'] = columns.author_counts(rows, top_authors)
+        lap('facets')
+    return scores, facets
+
+def order_key(meta: dict, did, score: float) -> tuple:
+    """Result order: higher score, then newer year, then earlier in the (unsharded) index."""
+    return -score, -(doc_years(meta)[did] or 0), doc_rows(meta)[did]
+
+def top_docs(meta: dict, scores: Dict[str, float], topk: int) -> List[Tuple[str, float]]:
+    """The ``topk`` best (doc id, score) pairs by ``order_key``, without sorting every match."""
+    if topk <= 0 or not scores:
+        return []
+    items = scores.items()
+    if len(scores) > topk:
+        kth = heapq.nlargest(topk, scores.values())[-1]
+        items = [(did, sc) for did, sc in items if sc >= kth]
+    return sorted(items, key=lambda x: order_key(meta, *x))[:topk]
+
+def result_record(meta: dict, did, score: float) -> dict:
+    rec = meta['docs'][did]
+    labels = category_labels(meta)
+    code, confidence = doc_categories(meta).get(did, (None, None)) if labels else (None, None)
+    return {
+        'doc_id': did,
+        'score': round(score, 4),
+        'title': rec.get('title'),
+        'year': rec.get('year'),
+        'pub_url': rec.get('pub_url'),
+        'authors': rec.get('authors', []),
+        'abstract': rec.get('abstract', ''),
+        'category': labels[code] if code is not None else None,
+        'category_confidence': confidence,
+    }
 
-    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:topk]
-    results = []
-    for did, sc in ranked:
-        rec = meta['docs'][did]
-        results.append({
-            'score': round(sc, 4),
-            'title': rec.get('title'),
-            'year': rec.get('year'),
-            'pub_url': rec.get('pub_url'),
-            'authors': rec.get('authors', []),
-            'abstract': rec.get('abstract', ''),
-        })
-    return results
+def rank(meta: dict, postings: dict, query: str, topk: int = 20, year_from=None, year_to=None,
+         category: Optional[Union[str, Iterable[str]]] = None, min_confidence: float = 0.0,
+         with_facets: bool = False, expansion: Optional[Dict[str, float]] = None,
+         facet_fields: Iterable[str] = FACET_FIELDS, top_authors: int = TOP_AUTHORS,
+         trace: Optional[QueryTrace] = None):
+    """
+    TF-IDF ranking with optional year and category filters. ``category`` is one label
+    or several; it and ``min_confidence`` only apply to indexes built with --classify.
+    With ``with_facets`` returns ``(results, facets)``: ``facets[field]`` maps value -> matching
+    docs for each of ``facet_fields``. 'category' counts before the category filter is applied,
+    'year' and 'author' (the ``top_authors`` most frequent) count the final matches, all of them,
+    not just the top k. ``expansion`` maps extra index terms (e.g. from
+    semantic.SemanticIndex.expand) to the weight their scores get. ``author:`` clauses
+    (see authors.py) restrict matches to those authors' papers; on their own they list
+    the papers newest first. AND / OR / NOT and ``+term`` / ``-term`` switch to boolean matching,
+    where parentheses group (see ``parse_boolean``): only docs satisfying the expression are scored.
+    A query that only excludes (``NOT x``) raises ValueError.
+    ``trace`` (a QueryTrace) collects phase timings and counts.
+    Ties are broken by ``order_key``, so sharded and packed indexes return the same list.
+    """
+    scores, facets = score_query(meta, postings, query, year_from, year_to, category, min_confidence,
+                                 with_facets, expansion, facet_fields, top_authors, trace)
+    lap = trace.lap if trace is not None else _no_lap
+    ranked = top_docs(meta, scores, topk)
+    lap('sort')
+    results = [result_record(meta, did, sc) for did, sc in ranked]
+    if trace is not None:
+        trace.counters['results'] = len(results)
+    lap('results')
+    return (results, facets) if with_facets else results
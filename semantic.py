@@ -0,0 +1,273 @@
+"""Latent semantic (LSA) vectors for "more like this" and query expansion.
+
+Document vectors come from a truncated SVD of the TF-IDF matrix the index
+already holds (rows rebuilt from the postings), computed with a randomized
+range finder in plain NumPy. They are written next to index.json as ``.npy``
+files, float32 or int8 with a per-row scale, and opened with ``mmap_mode``.
+An IVF index (spherical k-means over the unit vectors) answers nearest-
+neighbour queries by scanning only the few closest lists.
+"""
+import argparse, json, math, os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SEMANTIC_DIR = 'semantic'
+DEFAULT_DIMS = 128
+DEFAULT_PROBES = 8
+BRUTE_FORCE_BELOW = 2_000  # docs; below this an exact scan is as fast as IVF
+
+
+def semantic_dir_for(index_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(index_path)), SEMANTIC_DIR)
+
+
+# ---------------- Sparse TF-IDF matrix (CSR in NumPy arrays) ----------------
+class _CSR:
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, shape: Tuple[int, int]):
+        self.indptr, self.indices, self.data, self.shape = indptr, indices, data, shape
+
+    @classmethod
+    def from_coo(cls, rows, cols, vals, shape) -> '_CSR':
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols[order], vals[order], shape)
+
+    def transpose(self) -> '_CSR':
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return _CSR.from_coo(self.indices, rows, self.data, (self.shape[1], self.shape[0]))
+
+    def dot(self, dense: np.ndarray, block_nnz: int = 1 << 20) -> np.ndarray:
+        """self @ dense, in row blocks of about ``block_nnz`` nonzeros to bound temporary memory."""
+        out = np.zeros((self.shape[0], dense.shape[1]), dtype=dense.dtype)
+        start = 0
+        while start < self.shape[0]:
+            stop = int(np.searchsorted(self.indptr, self.indptr[start] + block_nnz, side='right'))
+            stop = min(max(stop - 1, start + 1), self.shape[0])
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if hi > lo:
+                prod = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+                counts = np.diff(self.indptr[start:stop + 1])
+                nonempty = np.flatnonzero(counts)
+                seg_starts = (self.indptr[start:stop] - lo)[nonempty]
+                out[start + nonempty] = np.add.reduceat(prod, seg_starts, axis=0)
+            start = stop
+        return out
+
+
+def tfidf_matrix(meta: dict, postings: dict) -> Tuple[_CSR, List[str], List[str]]:
+    """L2-normalized (1 + log tf) * idf rows, the same weights ``rank`` scores with."""
+    doc_ids = list(meta['docs'])
+    doc_pos = {did: i for i, did in enumerate(doc_ids)}
+    terms = sorted(postings)
+    rows, cols, vals = [], [], []
+    for j, term in enumerate(terms):
+        idf = meta['idf'].get(term, 0.0)
+        for did, tf in postings[term]:
+            rows.append(doc_pos[did])
+            cols.append(j)
+            vals.append((1 + math.log(tf)) * idf)
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    vals = np.asarray(vals, dtype=np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=vals.astype(np.float64) ** 2, minlength=len(doc_ids)))
+    vals /= np.maximum(norms[rows], 1e-12).astype(np.float32)
+    return _CSR.from_coo(rows, cols, vals, (len(doc_ids), len(terms))), doc_ids, terms
+
+
+def randomized_svd(A: _CSR, k: int, oversample: int = 10, n_iter: int = 4, seed: int = 0):
+    """Halko et al. randomized truncated SVD; returns (U, S, Vt) with k components."""
+    rng = np.random.default_rng(seed)
+    At = A.transpose()
+    width = min(k + oversample, min(A.shape))
+    Q, _ = np.linalg.qr(A.dot(rng.standard_normal((A.shape[1], width)).astype(np.float32)))
+    for _ in range(n_iter):  # power iterations sharpen the spectrum; QR keeps them stable
+        Q, _ = np.linalg.qr(At.dot(Q))
+        Q, _ = np.linalg.qr(A.dot(Q))
+    B = At.dot(Q).T  # (width, n_terms) = Q^T A
+    Ub, S, Vt = np.linalg.svd(B, full_matrices=False)
+    k = min(k, len(S))
+    return (Q @ Ub)[:, :k], S[:k], Vt[:k]
+
+
+# ---------------- IVF ----------------
+def _unit_rows(X: np.ndarray) -> np.ndarray:
+    return X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+
+
+def spherical_kmeans(X: np.ndarray, n_lists: int, n_iter: int = 15, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centroids = X[rng.choice(len(X), size=n_lists, replace=False)].copy()
+    assign = np.zeros(len(X), dtype=np.int64)
+    for it in range(n_iter):
+        new_assign = (X @ centroids.T).argmax(axis=1)
+        if it and np.array_equal(new_assign, assign):
+            break
+        assign = new_assign
+        for c in range(n_lists):
+            members = X[assign == c]
+            # An emptied list takes a random point so every list stays usable.
+            centroids[c] = members.sum(axis=0) if len(members) else X[rng.integers(len(X))]
+        centroids = _unit_rows(centroids)
+    return centroids.astype(np.float32), assign
+
+
+def _quantize(X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scale = np.maximum(np.abs(X).max(axis=1), 1e-12) / 127.0
+    return np.round(X / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+
+# ---------------- Build ----------------
+def build_semantic(meta: dict, postings: dict, out_dir: str, dims: int = DEFAULT_DIMS, dtype: str = 'float32',
+                   n_lists: Optional[int] = None, seed: int = 0) -> Dict:
+    A, doc_ids, terms = tfidf_matrix(meta, postings)
+    if min(A.shape) < 2:
+        raise ValueError('Need at least two documents and two terms for LSA.')
+    U, S, Vt = randomized_svd(A, dims, seed=seed)
+    docs = _unit_rows((U * S).astype(np.float32))            # == rows of A @ V, so queries fold in with V
+    term_vecs = _unit_rows((Vt.T * S).astype(np.float32))   # term-term similarity in the same space
+    n_lists = n_lists or max(1, int(math.sqrt(len(doc_ids))))
+    n_lists = min(n_lists, len(doc_ids))
+    centroids, assign = spherical_kmeans(docs, n_lists, seed=seed)
+    order = np.argsort(assign, kind='stable')
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    if dtype == 'int8':
+        q, scale = _quantize(docs)
+        np.save(out / 'doc_vectors.npy', q)
+        np.save(out / 'doc_scale.npy', scale)
+    else:
+        np.save(out / 'doc_vectors.npy', docs)
+    np.save(out / 'term_vectors.npy', term_vecs)
+    np.save(out / 'projection.npy', Vt.T.astype(np.float32))  # (n_terms, dims): query folding-in
+    np.save(out / 'ivf_centroids.npy', centroids)
+    np.save(out / 'ivf_members.npy', order.astype(np.int32))
+    np.save(out / 'ivf_offsets.npy', offsets)
+    total = float((A.data.astype(np.float64) ** 2).sum())
+    manifest = {
+        'dims': int(len(S)), 'dtype': dtype, 'num_docs': len(doc_ids), 'num_terms': len(terms),
+        'n_lists': n_lists, 'explained_variance': round(float((S.astype(np.float64) ** 2).sum()) / max(total, 1e-12), 4),
+        'doc_ids': doc_ids, 'terms': terms,
+    }
+    with open(out / 'semantic.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    print(f"LSA: {len(doc_ids)} docs x {len(S)} dims ({dtype}), {n_lists} IVF lists, "
+          f"{manifest['explained_variance']:.0%} of TF-IDF energy. Wrote {out}")
+    return manifest
+
+
+# ---------------- Query ----------------
+class SemanticIndex:
+    """Memory-mapped LSA vectors with an IVF nearest-neighbour search."""
+
+    def __init__(self, directory: str):
+        d = Path(directory)
+        with open(d / 'semantic.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.doc_ids: List[str] = self.manifest['doc_ids']
+        self.doc_pos = {did: i for i, did in enumerate(self.doc_ids)}
+        self.term_pos = {t: j for j, t in enumerate(self.manifest['terms'])}
+        self.terms = self.manifest['terms']
+        self.docs = np.load(d / 'doc_vectors.npy', mmap_mode='r')
+        self.scale = np.load(d / 'doc_scale.npy', mmap_mode='r') if self.manifest['dtype'] == 'int8' else None
+        self.term_vecs = np.load(d / 'term_vectors.npy', mmap_mode='r')
+        self.projection = np.load(d / 'projection.npy', mmap_mode='r')
+        self.centroids = np.load(d / 'ivf_centroids.npy')
+        self.members = np.load(d / 'ivf_members.npy', mmap_mode='r')
+        self.offsets = np.load(d / 'ivf_offsets.npy')
+
+    def _scores(self, rows: np.ndarray, vec: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.docs[rows], dtype=np.float32)
+        scores = block @ vec
+        if self.scale is not None:
+            scores *= self.scale[rows]
+        return scores
+
+    def nearest(self, vec: np.ndarray, k: int = 10, n_probe: int = DEFAULT_PROBES,
+                exclude: Optional[int] = None) -> List[Tuple[str, float]]:
+        vec = vec.astype(np.float32) / max(float(np.linalg.norm(vec)), 1e-12)
+        if len(self.doc_ids) < BRUTE_FORCE_BELOW or n_probe >= len(self.centroids):
+            rows = np.arange(len(self.doc_ids))
+        else:
+            lists = np.argsort(-(self.centroids @ vec))[:n_probe]
+            rows = np.concatenate([self.members[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+        scores = self._scores(rows, vec)
+        if exclude is not None:
+            scores[rows == exclude] = -np.inf
+        top = np.argsort(-scores)[:k]
+        return [(self.doc_ids[rows[i]], round(float(scores[i]), 4)) for i in top if np.isfinite(scores[i])]
+
+    def similar(self, did: str, k: int = 10, n_probe: int = DEFAULT_PROBES) -> List[Tuple[str, float]]:
+        """More-like-this: nearest documents to ``did`` (excluding itself)."""
+        pos = self.doc_pos[did]
+        vec = np.asarray(self.docs[pos], dtype=np.float32)
+        return self.nearest(vec, k, n_probe, exclude=pos)
+
+    def fold_query(self, tokens: List[str], idf: Dict[str, float]) -> Optional[np.ndarray]:
+        """Project a tokenized query into the LSA space (TF-IDF weights times V)."""
+        weights: Dict[int, float] = {}
+        for t in tokens:
+            if t in self.term_pos:
+                weights[self.term_pos[t]] = weights.get(self.term_pos[t], 0.0) + 1.0
+        if not weights:
+            return None
+        cols = np.fromiter(weights, dtype=np.int64)
+        w = np.array([(1 + math.log(weights[c])) * idf.get(self.terms[c], 0.0) for c in cols], dtype=np.float32)
+        return w @ np.asarray(self.projection[cols])
+
+    def search(self, tokens: List[str], idf: Dict[str, float], k: int = 10,
+               n_probe: int = DEFAULT_PROBES) -> List[Tuple[str, float]]:
+        vec = self.fold_query(tokens, idf)
+        return self.nearest(vec, k, n_probe) if vec is not None else []
+
+    def expand(self, tokens: List[str], idf: Dict[str, float], n_terms: int = 5,
+               min_similarity: float = 0.3) -> Dict[str, float]:
+        """Index terms closest to the query in LSA space (not already in it) -> similarity."""
+        vec = self.fold_query(tokens, idf)
+        if vec is None:
+            return {}
+        vec = vec / max(float(np.linalg.norm(vec)), 1e-12)
+        sims = np.asarray(self.term_vecs) @ vec
+        skip = {self.term_pos[t] for t in tokens if t in self.term_pos}
+        out = {}
+        for j in np.argsort(-sims):
+            if len(out) >= n_terms or sims[j] < min_similarity:
+                break
+            if j not in skip:
+                out[self.terms[j]] = round(float(sims[j]), 4)
+        return out
+
+
+if __name__ == '__main__':
+    from search_core import default_index_paths, load_index
+    from preprocess import normalize
+    default_index, default_postings = default_index_paths()
+    ap = argparse.ArgumentParser(description='Build or query LSA vectors for an index.')
+    ap.add_argument('--index', default=default_index)
+    ap.add_argument('--postings', default=default_postings)
+    ap.add_argument('--build', action='store_true')
+    ap.add_argument('--dims', type=int, default=DEFAULT_DIMS)
+    ap.add_argument('--dtype', choices=['float32', 'int8'], default='float32')
+    ap.add_argument('--query', help='Semantic search (and show expansion terms)')
+    ap.add_argument('--similar', help='Doc id to find similar papers for')
+    ap.add_argument('--k', type=int, default=10)
+    args = ap.parse_args()
+    meta, postings = load_index(args.index, args.postings)
+    if args.build:
+        build_semantic(meta, postings, semantic_dir_for(args.index), args.dims, args.dtype)
+    sem = SemanticIndex(semantic_dir_for(args.index))
+    if args.similar:
+        if args.similar not in sem.doc_pos:
+            ap.error(f'unknown doc id {args.similar!r} (ids are the keys of index.json "docs")')
+        hits = sem.similar(args.similar, args.k)
+    elif args.query:
+        print('Expansion:', sem.expand(normalize(args.query), meta['idf']))
+        hits = sem.search(normalize(args.query), meta['idf'], args.k)
+    else:
+        hits = []
+    for did, score in hits:
+        print(f"{score:.3f}  {meta['docs'][did].get('title')}")
@@ -0,0 +1,272 @@
+"""Sharded index: N partitions of the docs, queried scatter-gather.
+
+``write_shards`` splits a sealed index by a stable hash of the doc id into
+``shards/shard-XX/{index.json,postings.json}``. Every shard keeps the global
+idf of its terms (df counted over the whole collection) and each doc's row in
+the unsharded index, so a doc scores exactly as it would unsharded and ties
+break the same way (``search_core.order_key``).
+
+``ShardCoordinator`` starts one worker process per shard; each loads its shard
+once and answers queries over a pipe. ``rank`` sends the query to every worker
+at once, and each returns its own top k plus unabridged facet counts. The
+coordinator merges the top-k lists and sums the facets.
+
+    python indexer.py --in data/publications.jsonl --index data/index.json --postings data/postings.json --shards 4
+    python shards.py "corporate governance" --from-year 2018
+    python shards.py --verify                # sharded == unsharded over sample queries
+"""
+import argparse, hashlib, heapq, json, os, sys, time
+from collections import Counter
+from itertools import islice
+from typing import Dict, List, Optional
+
+from authors import build_author_index
+from facets import FACET_FIELDS, TOP_AUTHORS, build_columns
+from search_core import order_key, result_record, score_query, top_docs, validate_query
+
+SHARDS_DIR = 'shards'
+MANIFEST = 'shards.json'
+
+
+def shards_dir_for(index_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(index_path)), SHARDS_DIR)
+
+
+def shard_of(did: str, num_shards: int) -> int:
+    """Stable across runs and machines (unlike ``hash``), so a doc stays on its shard when the index is rebuilt."""
+    return int.from_bytes(hashlib.blake2b(did.encode('utf-8'), digest_size=8).digest(), 'big') % num_shards
+
+
+def write_shards(meta: dict, postings: dict, out_dir: str, num_shards: int) -> dict:
+    """Partition a sealed index (``indexer.IndexBuilder.seal``) into ``num_shards`` shard indexes."""
+    if num_shards < 1:
+        raise ValueError('num_shards must be at least 1')
+    docs = [{} for _ in range(num_shards)]
+    rows = [[] for _ in range(num_shards)]
+    owner = {}
+    for row, (did, rec) in enumerate(meta['docs'].items()):
+        s = owner[did] = shard_of(did, num_shards)
+        docs[s][did] = rec
+        rows[s].append(row)
+    parts = [{} for _ in range(num_shards)]
+    for t, plist in postings.items():
+        for did, tf in plist:
+            parts[owner[did]].setdefault(t, []).append((did, tf))
+
+    cats = meta.get('categories')
+    manifest = {'num_shards': num_shards, 'num_docs': len(meta['docs']), 'classified': bool(cats), 'shards': []}
+    for s in range(num_shards):
+        name = f'shard-{s:02d}'
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        shard = {
+            'num_docs': len(docs[s]),
+            'global_num_docs': len(meta['docs']),
+            'idf': {t: meta['idf'][t] for t in parts[s]},  # global idf: scores match the unsharded index
+            'docs': docs[s],
+            'global_rows': rows[s],  # tie-break order of the unsharded index
+            'columns': build_columns(docs[s]),
+            'author_index': build_author_index(docs[s]),
+        }
+        if cats:
+            shard['categories'] = {'labels': cats['labels'],
+                                   'codes': [cats['codes'][r] for r in rows[s]],
+                                   'confidence': [cats['confidence'][r] for r in rows[s]]}
+        index_path = os.path.join(name, 'index.json')
+        postings_path = os.path.join(name, 'postings.json')
+        with open(os.path.join(out_dir, index_path), 'w', encoding='utf-8') as f:
+            json.dump(shard, f)
+        with open(os.path.join(out_dir, postings_path), 'w', encoding='utf-8') as f:
+            json.dump(parts[s], f)
+        manifest['shards'].append({'index': index_path, 'postings': postings_path,
+                                   'num_docs': len(docs[s]), 'terms': len(parts[s])})
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    sizes = ', '.join(str(sh['num_docs']) for sh in manifest['shards'])
+    print(f"Wrote {num_shards} shards to {out_dir} ({sizes} docs)")
+    return manifest
+
+
+# ---------------- Query side ----------------
+def shard_search(meta: dict, postings: dict, query: str, topk: int, options: dict):
+    """One shard's part of a query: its top k as (order key, result) and facet counts (all authors)."""
+    options = dict(options, top_authors=None)
+    scores, facets = score_query(meta, postings, query, **options)
+    hits = [(order_key(meta, did, sc), result_record(meta, did, sc)) for did, sc in top_docs(meta, scores, topk)]
+    return hits, facets
+
+
+def merge_facets(parts: List[dict], top_authors: int = TOP_AUTHORS) -> dict:
+    """Sum per-shard facet counts, ordered the way ``search_core.rank`` orders them."""
+    totals: Dict[str, Counter] = {}
+    for facets in parts:
+        for field, counts in facets.items():
+            totals.setdefault(field, Counter()).update(counts)
+    merged = {}
+    for field, counts in totals.items():
+        if field == 'year':
+            merged[field] = dict(sorted(counts.items()))
+        else:
+            best = sorted(counts.items(), key=lambda x: (-x[1], x[0]))
+            merged[field] = dict(best[:top_authors] if field == 'author' else best)
+    return merged
+
+
+def _serve(conn, index_path: str, postings_path: str):
+    from search_core import load_index
+    meta, postings = load_index(index_path, postings_path)
+    conn.send('ready')
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        try:
+            conn.send(('ok', shard_search(meta, postings, *msg)))
+        except Exception as e:  # report to the coordinator instead of leaving it waiting
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+    conn.close()
+
+
+class ShardCoordinator:
+    """Scatter-gather ``rank`` over the shards listed in ``shards.json``.
+
+    With ``processes=False`` the shards are loaded in this process and queried
+    one after another (for debugging and for machines with a single core).
+    """
+
+    def __init__(self, shard_dir: str, processes: bool = True):
+        with open(os.path.join(shard_dir, MANIFEST), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        paths = [(os.path.join(shard_dir, sh['index']), os.path.join(shard_dir, sh['postings']))
+                 for sh in self.manifest['shards']]
+        self._conns, self._procs, self._local = [], [], []
+        if processes:
+            import multiprocessing as mp
+            ctx = mp.get_context('spawn')
+            for index_path, postings_path in paths:
+                parent, child = ctx.Pipe()
+                proc = ctx.Process(target=_serve, args=(child, index_path, postings_path), daemon=True)
+                proc.start()
+                child.close()
+                self._conns.append(parent)
+                self._procs.append(proc)
+            for conn in self._conns:  # shards load in parallel
+                if conn.recv() != 'ready':
+                    raise RuntimeError('shard worker failed to start')
+        else:
+            from search_core import load_index
+            self._local = [load_index(*p) for p in paths]
+
+    def rank(self, query: str, topk: int = 20, year_from=None, year_to=None, category=None,
+             min_confidence: float = 0.0, with_facets: bool = False, expansion: Optional[Dict[str, float]] = None,
+             facet_fields=FACET_FIELDS, top_authors: int = TOP_AUTHORS):
+        """Same arguments and result as ``search_core.rank`` on the unsharded index (no ``trace``)."""
+        validate_query(query)  # rejected here rather than as N worker errors
+        options = {'year_from': year_from, 'year_to': year_to, 'category': category,
+                   'min_confidence': min_confidence, 'with_facets': with_facets, 'expansion': expansion,
+                   'facet_fields': tuple(facet_fields)}
+        if self._conns:
+            for conn in self._conns:
+                conn.send((query, topk, options))
+            replies = [conn.recv() for conn in self._conns]
+            errors = [r[1] for r in replies if r[0] != 'ok']
+            if errors:
+                raise RuntimeError(f'shard query failed: {errors[0]}')
+            parts = [r[1] for r in replies]
+        else:
+            parts = [shard_search(meta, postings, query, topk, options) for meta, postings in self._local]
+        merged = heapq.merge(*(hits for hits, _ in parts), key=lambda h: h[0])
+        results = [rec for _, rec in islice(merged, max(topk, 0))]
+        if not with_facets:
+            return results
+        return results, merge_facets([facets for _, facets in parts], top_authors)
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns, self._procs, self._local = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def verify(index_path: str, postings_path: str, shard_dir: str, n_queries: int = 200, processes: bool = True) -> int:
+    """Compare sharded against unsharded results and facets; returns the number of mismatching queries."""
+    from search_core import load_index, rank
+    from shared_index import sample_queries
+    meta, postings = load_index(index_path, postings_path)
+    queries = sample_queries(meta, postings, n_queries)
+    surnames = [k.split('|')[0] for k in meta['author_index']['keys'][::max(1, len(meta['author_index']['keys']) // 20)]]
+    queries += [f'author:{s}' for s in surnames] + [f'author:{s} {q}' for s, q in zip(surnames, queries)]
+    pairs = [q.split()[:2] for q in queries[:n_queries // 4] if len(q.split()) > 1]
+    queries += [f'{a} AND {b}' for a, b in pairs] + [f'{a} NOT {b}' for a, b in pairs]
+    years = sorted(y for y in meta['columns']['year'] if y)
+    mid = years[len(years) // 2] if years else None
+    filters = [{}, {'year_from': mid}, {'year_to': mid}]
+    labels = (meta.get('categories') or {}).get('labels')
+    if labels:
+        filters.append({'category': labels[0]})
+    bad = checked = 0
+    t_mono = t_shard = 0.0
+    with ShardCoordinator(shard_dir, processes=processes) as coord:
+        for q in queries:
+            for kw in filters:
+                t0 = time.perf_counter()
+                want = rank(meta, postings, q, topk=20, with_facets=True, **kw)
+                t1 = time.perf_counter()
+                got = coord.rank(q, topk=20, with_facets=True, **kw)
+                t_shard += time.perf_counter() - t1
+                t_mono += t1 - t0
+                checked += 1
+                if json.dumps(want) != json.dumps(got):
+                    bad += 1
+                    if bad <= 5:
+                        print(f'MISMATCH {q!r} {kw}')
+    print(f'{checked} queries over {coord.manifest["num_shards"]} shards: {bad} mismatches; '
+          f'unsharded {1000 * t_mono / checked:.2f} ms/query, sharded {1000 * t_shard / checked:.2f} ms/query')
+    return bad
+
+
+if __name__ == '__main__':
+    from search_core import default_index_paths
+    default_index, default_postings = default_index_paths()
+    ap = argparse.ArgumentParser(description='Query the sharded index (scatter-gather over shard worker processes).')
+    ap.add_argument('query', nargs='?', help='Query text (may include author:"Surname I" clauses)')
+    ap.add_argument('--index', default=default_index, help='Unsharded index.json; shards are read from shards/ beside it')
+    ap.add_argument('--postings', default=default_postings)
+    ap.add_argument('--topk', type=int, default=10)
+    ap.add_argument('--from-year', type=int)
+    ap.add_argument('--to-year', type=int)
+    ap.add_argument('--category')
+    ap.add_argument('--in-process', action='store_true', help='Load every shard in this process instead of workers')
+    ap.add_argument('--verify', action='store_true', help='Check sharded results against the unsharded index')
+    ap.add_argument('--queries', type=int, default=200, help='Sample queries for --verify')
+    args = ap.parse_args()
+    shard_dir = shards_dir_for(args.index)
+    if args.verify:
+        sys.exit(1 if verify(args.index, args.postings, shard_dir, args.queries, not args.in_process) else 0)
+    if not args.query:
+        ap.error('a query (or --verify) is required')
+    try:
+        validate_query(args.query)
+    except ValueError as e:
+        ap.error(str(e))
+    with ShardCoordinator(shard_dir, processes=not args.in_process) as coord:
+        if args.category and not coord.manifest.get('classified', True):  # shards written before the flag: let it through
+            ap.error('--category needs an index built with indexer.py --classify')
+        t0 = time.perf_counter()
+        results, facets = coord.rank(args.query, topk=args.topk, year_from=args.from_year, year_to=args.to_year,
+                                     category=args.category, with_facets=True)
+        ms = 1000 * (time.perf_counter() - t0)
+    for i, r in enumerate(results, 1):
+        print(f"{i:2d}. {r['title']} ({r.get('year')})  score={r['score']}")
+        print(f"    {r.get('pub_url')}")
+    print(f"{len(results)} results from {coord.manifest['num_shards']} shards in {ms:.1f} ms; "
+          f"years: {dict(islice(facets.get('year', {}).items(), 10))}")
@@ -0,0 +1,445 @@
+"""Packed, read-only index that several query processes share without copying.
+
+``json.load`` gives every search process its own copy of ``meta`` and
+``postings``, so N workers hold N indexes. ``pack`` writes one flat file: a
+small JSON directory followed by 8-byte-aligned arrays (sorted term table,
+idf, a postings CSR of doc rows and tfs, doc records as JSON blobs, and the
+year / category / author columns). Workers open it with ``load`` either
+
+- from the file via ``mmap`` (the OS page cache holds it once for everyone), or
+- from a ``multiprocessing.shared_memory`` block a loader process filled with
+  ``publish`` (``load('shm:<name>')``),
+
+and get back ``(meta, postings)`` made of read-only Mapping views over those
+buffers, so ``search_core.rank`` runs unchanged. Only the postings a query
+touches and the records it returns are turned into Python objects. In this
+mode a result's ``doc_id`` is the doc's row number; ``meta['docs'].doc_id(row)``
+gives the original id.
+
+    python shared_index.py pack                       # data/index.json -> data/index.pack
+    python shared_index.py bench --workers 1 2 4      # throughput and memory per worker count
+"""
+import argparse, atexit, bisect, gc, json, mmap, os, statistics, struct, sys, time
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'IRPACK01'
+PACK_NAME = 'index.pack'
+SHM_PREFIX = 'shm:'
+_ALIGN = 8
+LOOKUP_MEMO = 16_384  # string -> position results remembered per table and process
+
+
+def pack_path_for(index_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(index_path)), PACK_NAME)
+
+
+# ---------------- Writing ----------------
+def _strings(values) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode('utf-8') for v in values]
+    off = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=off[1:])
+    return off, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def pack(meta: dict, postings: dict, out_path: str) -> Dict[str, int]:
+    """Write ``meta`` + ``postings`` (as loaded by search_core.load_index) to one packed file."""
+    from authors import build_author_index
+    from facets import build_columns
+    docs = meta['docs']
+    row_of = {did: i for i, did in enumerate(docs)}
+    terms = sorted(postings)
+    sections: Dict[str, np.ndarray] = {}
+
+    sections['term_off'], sections['term_blob'] = _strings(terms)
+    sections['idf'] = np.array([meta['idf'].get(t, 0.0) for t in terms], dtype=np.float64)
+    lengths = [len(postings[t]) for t in terms]
+    sections['post_off'] = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=sections['post_off'][1:])
+    sections['post_doc'] = np.fromiter((row_of[did] for t in terms for did, _ in postings[t]),
+                                       dtype=np.int32, count=sum(lengths))
+    sections['post_tf'] = np.fromiter((tf for t in terms for _, tf in postings[t]), dtype=np.int32, count=sum(lengths))
+
+    sections['docid_off'], sections['docid_blob'] = _strings(docs)
+    sections['doc_off'], sections['doc_blob'] = _strings(json.dumps(rec, ensure_ascii=False) for rec in docs.values())
+
+    cols = meta.get('columns') or build_columns(docs)
+    sections['year'] = np.asarray(cols['year'], dtype=np.int32)
+    sections['author_ptr'] = np.asarray(cols['author_ptr'], dtype=np.int64)
+    sections['author_ids'] = np.asarray(cols['author_ids'], dtype=np.int32)
+    sections['author_off'], sections['author_blob'] = _strings(cols['authors'])
+
+    aidx = meta.get('author_index') or build_author_index(docs)
+    sections['akey_off'], sections['akey_blob'] = _strings(aidx['keys'])
+    sections['aname_off'], sections['aname_blob'] = _strings(aidx['names'])
+    sections['aptr'] = np.asarray(aidx['ptr'], dtype=np.int64)
+    sections['arows'] = np.asarray(aidx['rows'], dtype=np.int32)
+
+    labels = []
+    if meta.get('categories'):
+        labels = meta['categories']['labels']
+        sections['cat_code'] = np.asarray(meta['categories']['codes'], dtype=np.int16)
+        sections['cat_conf'] = np.asarray(meta['categories']['confidence'], dtype=np.float32)
+
+    directory, offset = {}, 0
+    for name, arr in sections.items():
+        directory[name] = [offset, arr.dtype.str, int(arr.size)]
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({'num_docs': len(docs), 'num_terms': len(terms), 'category_labels': labels,
+                         'sections': directory}).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % _ALIGN)
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for arr in sections.values():
+            data = arr.tobytes()
+            f.write(data + b'\0' * (-len(data) % _ALIGN))
+    os.replace(tmp, out_path)
+    size = os.path.getsize(out_path)
+    print(f"Packed {len(docs)} docs, {len(terms)} terms, {int(sections['post_off'][-1])} postings "
+          f"into {out_path} ({size / 2**20:.1f} MiB)")
+    return {'bytes': size, 'docs': len(docs), 'terms': len(terms)}
+
+
+# ---------------- Read-only views ----------------
+class _Strings(Sequence):
+    """i -> str over an offsets array and a UTF-8 blob; sorted tables support bisect."""
+    def __init__(self, off: np.ndarray, blob: np.ndarray):
+        self.off, self.blob = off, blob
+        self._memo: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.off) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.off[i]:self.off[i + 1]].tobytes().decode('utf-8')
+
+    def index_of(self, value: str) -> int:
+        # A query term is looked up several times (in, [], idf) and popular terms recur across queries.
+        i = self._memo.get(value)
+        if i is None:
+            i = bisect.bisect_left(self, value)
+            i = i if i < len(self) and self[i] == value else -1
+            if len(self._memo) >= LOOKUP_MEMO:
+                self._memo.clear()
+            self._memo[value] = i
+        return i
+
+
+class _PostingList(Sequence):
+    def __init__(self, docs: np.ndarray, tfs: np.ndarray):
+        self.docs, self.tfs = docs, tfs
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __getitem__(self, i):
+        return int(self.docs[i]), int(self.tfs[i])
+
+    def __iter__(self):
+        return zip(self.docs.tolist(), self.tfs.tolist())
+
+
+class _Postings(Mapping):
+    """term -> [(doc row, tf), ...]"""
+    def __init__(self, terms: _Strings, off: np.ndarray, docs: np.ndarray, tfs: np.ndarray):
+        self.terms, self.off, self.docs, self.tfs = terms, off, docs, tfs
+
+    def __contains__(self, term):
+        return self.terms.index_of(term) >= 0
+
+    def __getitem__(self, term):
+        i = self.terms.index_of(term)
+        if i < 0:
+            raise KeyError(term)
+        lo, hi = self.off[i], self.off[i + 1]
+        return _PostingList(self.docs[lo:hi], self.tfs[lo:hi])
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class _Column(Mapping):
+    """Array as a Mapping keyed by a sorted string table (term -> idf)."""
+    def __init__(self, values: np.ndarray, keys: _Strings):
+        self.values, self.keys = values, keys
+
+    def __contains__(self, key):
+        return self.keys.index_of(key) >= 0
+
+    def __getitem__(self, key):
+        i = self.keys.index_of(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values.item(i)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _Years(Mapping):
+    """doc row -> year (None when unknown); on the hot path of year-filtered queries, so kept minimal."""
+    def __init__(self, values: np.ndarray):
+        self.item = values.item
+        self.n = len(values)
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.n:
+            raise KeyError(row)
+        return self.item(row) or None
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+    def __len__(self):
+        return self.n
+
+
+class _Categories(Mapping):
+    """doc row -> (category code, confidence), like search_core.doc_categories."""
+    def __init__(self, codes: np.ndarray, conf: np.ndarray):
+        self.codes, self.conf = codes, conf
+
+    def __getitem__(self, row):
+        if not isinstance(row, (int, np.integer)) or not 0 <= row < len(self.codes):
+            raise KeyError(row)
+        return int(self.codes[row]), float(self.conf[row])
+
+    def __iter__(self):
+        return iter(range(len(self.codes)))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _Docs(Mapping):
+    """doc row -> record dict, decoded from JSON on access."""
+    def __init__(self, ids: _Strings, records: _Strings):
+        self.ids, self.records = ids, records
+
+    def __getitem__(self, row):
+        if not isinstance(row, (int, np.integer)) or not 0 <= row < len(self.records):
+            raise KeyError(row)
+        return json.loads(self.records[row])
+
+    def __iter__(self):
+        return iter(range(len(self.records)))
+
+    def __len__(self):
+        return len(self.records)
+
+    def doc_id(self, row: int) -> str:
+        return self.ids[row]
+
+
+# ---------------- Attaching ----------------
+def _views(buf) -> Tuple[dict, Mapping]:
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError('not a packed index (bad magic)')
+    (hlen,) = struct.unpack_from('<Q', buf, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(buf[start:start + hlen]))
+    base = start + hlen
+    arr = {name: np.frombuffer(buf, dtype=np.dtype(dt), count=n, offset=base + off)
+           for name, (off, dt, n) in header['sections'].items()}
+
+    from authors import AuthorIndex
+    from facets import FacetColumns
+    terms = _Strings(arr['term_off'], arr['term_blob'])
+    meta = {
+        'num_docs': header['num_docs'],
+        'idf': _Column(arr['idf'], keys=terms),
+        'docs': _Docs(_Strings(arr['docid_off'], arr['docid_blob']), _Strings(arr['doc_off'], arr['doc_blob'])),
+        # Prebuilt caches search_core / facets / authors would otherwise derive from the dicts.
+        '_doc_years': _Years(arr['year']),
+        '_doc_rows': range(header['num_docs']),  # doc ids are the rows
+        '_facet_columns': FacetColumns.from_arrays(arr['year'], arr['author_ptr'], arr['author_ids'],
+                                                   _Strings(arr['author_off'], arr['author_blob'])),
+        '_author_index': AuthorIndex.from_arrays(_Strings(arr['akey_off'], arr['akey_blob']),
+                                                 _Strings(arr['aname_off'], arr['aname_blob']),
+                                                 arr['aptr'], arr['arows'], header['num_docs']),
+    }
+    if header['category_labels']:
+        meta['categories'] = {'labels': header['category_labels']}
+        meta['_doc_categories'] = _Categories(arr['cat_code'], arr['cat_conf'])
+    postings = _Postings(terms, arr['post_off'], arr['post_doc'], arr['post_tf'])
+    return meta, postings
+
+
+def _attach_shm(name: str):
+    from multiprocessing import shared_memory
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block with the process's resource tracker, which unlinks it
+    # when that tracker shuts down. A tracker inherited from the loader (spawned workers) already knows
+    # the block; a process with its own tracker must take the registration back.
+    from multiprocessing import resource_tracker
+    inherited = getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+    shm = shared_memory.SharedMemory(name=name)
+    if not inherited:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+_attached = []  # keeps mmaps / shared memory blocks alive while their views are in use
+
+
+def _close_attached():
+    """Close attached shared memory at exit. Blocks whose arrays are still referenced cannot be
+    closed (BufferError, printed by SharedMemory.__del__ otherwise); they are detached from their
+    views instead and unmapped by the OS when the process ends."""
+    gc.collect()  # drop views that are only kept alive by reference cycles
+    for shm in _attached:
+        if isinstance(shm, mmap.mmap):
+            continue
+        try:
+            shm.close()
+        except BufferError:
+            shm._buf = shm._mmap = None  # the exported arrays keep the mapping alive
+            shm.close()  # now only closes the file descriptor
+    _attached.clear()
+
+
+atexit.register(_close_attached)
+
+
+def load(source: str) -> Tuple[dict, Mapping]:
+    """(meta, postings) views over a packed file path (mmap) or 'shm:<name>' (shared memory)."""
+    if source.startswith(SHM_PREFIX):
+        shm = _attach_shm(source[len(SHM_PREFIX):])
+        _attached.append(shm)
+        return _views(shm.buf)
+    with open(source, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _attached.append(mm)
+    return _views(mm)
+
+
+def publish(pack_file: str, name: Optional[str] = None):
+    """Copy a packed file into a new shared memory block (loader side); returns the SharedMemory to keep and unlink."""
+    from multiprocessing import shared_memory
+    size = os.path.getsize(pack_file)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    with open(pack_file, 'rb') as f:
+        f.readinto(shm.buf[:size])
+    return shm
+
+
+# ---------------- Benchmark ----------------
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS (shared pages split between the processes mapping them) from /proc."""
+    out = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    out[key.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def _bench_worker(mode: str, source: str, postings_path: str, queries: List[str], start, done, out):
+    from search_core import load_index, rank
+    meta, postings = load_index(source, postings_path) if mode == 'json' else load(source)
+    for q in queries[:20]:  # warm-up
+        rank(meta, postings, q, topk=10)
+    start.wait()
+    t0 = time.perf_counter()
+    for q in queries:
+        rank(meta, postings, q, topk=10)
+    elapsed = time.perf_counter() - t0
+    done.wait()  # every worker is still alive while memory is read, so PSS splits the shared pages fairly
+    out.put((elapsed, _memory_kb(os.getpid())))
+    done.wait()
+
+
+def sample_queries(meta: dict, postings: Mapping, n: int, seed: int = 0) -> List[str]:
+    """1-3 word queries over mid-frequency terms of the index."""
+    import random
+    rng = random.Random(seed)
+    terms = [t for t in postings if len(t) > 2 and not t.isdigit()]
+    terms.sort(key=lambda t: -len(postings[t]))
+    pool = terms[len(terms) // 100:len(terms) // 100 + 2000] or terms  # skip the near-stopwords at the top
+    return [' '.join(rng.sample(pool, min(len(pool), rng.randint(1, 3)))) for _ in range(n)]
+
+
+def benchmark(index_path: str, postings_path: str, workers: List[int], modes: List[str],
+              n_queries: int = 2000) -> List[Dict]:
+    import multiprocessing as mp
+    from search_core import load_index
+    meta, postings = load_index(index_path, postings_path)
+    pack_file = pack_path_for(index_path)
+    if not os.path.exists(pack_file) or os.path.getmtime(pack_file) < os.path.getmtime(postings_path):
+        pack(meta, postings, pack_file)
+    queries = sample_queries(meta, postings, n_queries)
+    del meta, postings
+    ctx = mp.get_context('spawn')
+    report = []
+    for mode in modes:
+        shm = publish(pack_file) if mode == 'shm' else None
+        source = {'json': index_path, 'mmap': pack_file, 'shm': SHM_PREFIX + (shm.name if shm else '')}[mode]
+        try:
+            for n in workers:
+                start, done, out = ctx.Barrier(n + 1), ctx.Barrier(n + 1), ctx.Queue()
+                procs = [ctx.Process(target=_bench_worker,
+                                     args=(mode, source, postings_path, queries[i::n], start, done, out))
+                         for i in range(n)]
+                for proc in procs:
+                    proc.start()
+                start.wait()
+                t0 = time.perf_counter()
+                done.wait()
+                wall = time.perf_counter() - t0
+                runs = [out.get() for _ in procs]
+                done.wait()
+                for proc in procs:
+                    proc.join()
+                row = {
+                    'mode': mode, 'workers': n, 'queries': len(queries),
+                    'qps': round(len(queries) / wall, 1),
+                    'worker_seconds_median': round(statistics.median(r[0] for r in runs), 3),
+                    'rss_mib_total': round(sum(m.get('rss', 0) for _, m in runs) / 1024, 1),
+                    'pss_mib_total': round(sum(m.get('pss', 0) for _, m in runs) / 1024, 1),
+                }
+                report.append(row)
+                print(f"{mode:>4} x{n}: {row['qps']:>8.1f} q/s   RSS {row['rss_mib_total']:>7.1f} MiB   "
+                      f"PSS {row['pss_mib_total']:>7.1f} MiB")
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    return report
+
+
+if __name__ == '__main__':
+    from search_core import default_index_paths, load_index
+    default_index, default_postings = default_index_paths()
+    ap = argparse.ArgumentParser(description='Pack the index for shared, zero-copy loading by query workers.')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('pack', help='Write index.pack next to index.json')
+    b = sub.add_parser('bench', help='Queries/s and total memory per worker count')
+    b.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    b.add_argument('--modes', nargs='+', choices=['json', 'mmap', 'shm'], default=['json', 'mmap', 'shm'])
+    b.add_argument('--queries', type=int, default=2000)
+    b.add_argument('--json', help='Also write the report to this file')
+    for sp in (p, b):
+        sp.add_argument('--index', default=default_index)
+        sp.add_argument('--postings', default=default_postings)
+    args = ap.parse_args()
+    if args.cmd == 'pack':
+        pack(*load_index(args.index, args.postings), pack_path_for(args.index))
+    else:
+        report = benchmark(args.index, args.postings, args.workers, args.modes, args.queries)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
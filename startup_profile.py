@@ -0,0 +1,121 @@
+import argparse, json, os, re, statistics, subprocess, sys, time
+from typing import Dict, List
+
+# Packages that should never load on the search path; reported when they show up.
+HEAVY_PACKAGES = ('numpy', 'scipy', 'sklearn', 'joblib', 'selenium', 'webdriver_manager', 'nltk')
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Runs in a fresh interpreter; prints phase timings (seconds) as JSON.
+COLD_START_SNIPPET = r'''
+import json, sys, time
+t0 = time.perf_counter()
+if sys.argv[1] == 'app':
+    import streamlit
+import search_core
+t1 = time.perf_counter()
+index_path, postings_path = search_core.default_index_paths(sys.argv[3])
+meta, postings = search_core.load_index(index_path, postings_path)
+t2 = time.perf_counter()
+results = search_core.rank(meta, postings, sys.argv[2], topk=10)
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'load_index': t2 - t1, 'first_query': t3 - t2, 'results': len(results),
+                  'heavy_modules': sorted(m for m in sys.modules if m.split('.')[0] in %r)}))
+''' % (HEAVY_PACKAGES,)
+
+
+def import_profile(module: str, top: int = 15) -> Dict:
+    """``python -X importtime -c 'import <module>'`` summarized: slowest imports and heavy packages pulled in."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if m:
+            rows.append({'module': m.group(4), 'self_us': int(m.group(1)), 'cumulative_us': int(m.group(2)),
+                         'depth': len(m.group(3)) // 2})
+    target = next((r for r in reversed(rows) if r['module'] == module), None)
+    heavy = sorted({r['module'].split('.')[0] for r in rows} & set(HEAVY_PACKAGES))
+    return {
+        'module': module,
+        'ok': proc.returncode == 0,
+        'error': proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        'total_ms': round(target['cumulative_us'] / 1000, 1) if target else None,
+        'modules_imported': len(rows),
+        'heavy_packages': heavy,
+        'slowest_cumulative': sorted(rows, key=lambda r: r['cumulative_us'], reverse=True)[:top],
+        'slowest_self': sorted(rows, key=lambda r: r['self_us'], reverse=True)[:top],
+    }
+
+
+def cold_start(target: str, query: str, data_dir: str, repeat: int = 5) -> Dict:
+    """Time-to-first-query in fresh interpreters: imports, index load, first ranked query."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs: List[Dict] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if target == 'cli':
+            proc = subprocess.run([sys.executable, os.path.join(here, 'search_cli.py'), query, '--topk', '10'],
+                                  capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(data_dir)))
+            run = {'process': time.perf_counter() - started}
+        else:
+            proc = subprocess.run([sys.executable, '-c', COLD_START_SNIPPET, target, query, os.path.abspath(data_dir)],
+                                  capture_output=True, text=True, cwd=here)
+            run = {'process': time.perf_counter() - started}
+            if proc.returncode == 0:
+                run.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        if proc.returncode != 0:
+            return {'target': target, 'ok': False, 'error': proc.stderr.strip().splitlines()[-1:]}
+        runs.append(run)
+    phases = [k for k, v in runs[0].items() if isinstance(v, float)]
+    return {
+        'target': target,
+        'ok': True,
+        'repeat': repeat,
+        'median_s': {k: round(statistics.median(r[k] for r in runs), 4) for k in phases},
+        'min_s': {k: round(min(r[k] for r in runs), 4) for k in phases},
+        'heavy_modules': runs[0].get('heavy_modules', []),
+    }
+
+
+def print_import_profile(prof: Dict):
+    if not prof['ok']:
+        print(f"import {prof['module']}: failed ({prof['error']})")
+        return
+    print(f"import {prof['module']}: {prof['total_ms']} ms, {prof['modules_imported']} modules"
+          + (f", heavy: {', '.join(prof['heavy_packages'])}" if prof['heavy_packages'] else ''))
+    for r in prof['slowest_cumulative']:
+        print(f"  {r['cumulative_us'] / 1000:>9.1f} ms  {'  ' * r['depth']}{r['module']}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Import-time and cold-start profile of the search entry points.')
+    sub = ap.add_subparsers(dest='mode', required=True)
+    imp = sub.add_parser('importtime', help='-X importtime report per module')
+    imp.add_argument('modules', nargs='*', default=['search_core', 'search_cli', 'classifier', 'crawler'])
+    imp.add_argument('--top', type=int, default=15)
+    cold = sub.add_parser('cold', help='Fresh-interpreter time to first query')
+    cold.add_argument('--target', choices=['core', 'cli', 'app'], action='append',
+                      help="core = search_core only, cli = search_cli.py process, app = streamlit + search_core")
+    cold.add_argument('--query', default='financial risk')
+    cold.add_argument('--data-dir', default='data')
+    cold.add_argument('--repeat', type=int, default=5)
+    for p in (imp, cold):
+        p.add_argument('--json', help='Also write the report to this file')
+    args = ap.parse_args()
+
+    if args.mode == 'importtime':
+        report = [import_profile(m, args.top) for m in args.modules]
+        for prof in report:
+            print_import_profile(prof)
+    else:
+        report = [cold_start(t, args.query, args.data_dir, args.repeat) for t in (args.target or ['core', 'cli', 'app'])]
+        for res in report:
+            if not res['ok']:
+                print(f"{res['target']}: failed {res['error']}")
+                continue
+            phases = ', '.join(f"{k} {v * 1000:.0f} ms" for k, v in res['median_s'].items())
+            print(f"{res['target']:>4} (median of {res['repeat']}): {phases}"
+                  + (f"; heavy modules loaded: {', '.join(res['heavy_modules'])}" if res['heavy_modules'] else ''))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,56 @@
+import pytest
+
+from authors import AuthorIndex, author_key, build_author_index
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Smith, Jane A.', 'smith|ja'),
+    ('Jane A. Smith', 'smith|ja'),
+    ('J. Smith', 'smith|j'),
+    ('Smith J', 'smith|j'),
+    ('Smith JA', 'smith|ja'),
+    ('JA Smith', 'smith|ja'),
+    ('Ludwig van Beethoven', 'van beethoven|l'),
+    ('José Álvarez', 'alvarez|j'),
+    ('', ''),
+])
+def test_existing_forms(name, key):
+    assert author_key(name) == key
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Wei Li', 'li|w'),
+    ('Li Wei', 'wei|l'),
+    ('Ng A', 'ng|a'),
+    ('Andrew Ng', 'ng|a'),
+    ('Xu Y.', 'xu|y'),
+    ('Wu', 'wu|'),
+])
+def test_short_surnames_are_not_initials(name, key):
+    assert author_key(name) == key
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Dr Jane Smith', 'smith|j'),
+    ('Prof. Jane A. Smith', 'smith|ja'),
+    ('Jane Smith PhD', 'smith|j'),
+    ('Jane Smith, Ph.D.', 'smith|j'),
+    ('Smith, Dr. Jane', 'smith|j'),
+    ('Smith, Jane, PhD', 'smith|j'),
+    ('John Smith Jr.', 'smith|j'),
+    ('Smith MA', 'smith|ma'),  # initials, not a degree
+    ('Dr Smith', 'smith|'),
+])
+def test_titles_and_degrees_are_dropped(name, key):
+    assert author_key(name) == key
+
+
+def test_lookup_by_short_surname():
+    docs = {'a': {'authors': [{'name': 'Wei Li'}]},
+            'b': {'authors': [{'name': 'Li W'}, {'name': 'Dr Jane Smith'}]},
+            'c': {'authors': [{'name': 'Lin Zhao'}]}}
+    idx = AuthorIndex({'docs': docs, 'author_index': build_author_index(docs)})
+    assert idx.lookup('Li') == ['a', 'b']
+    assert idx.lookup('Li W') == ['a', 'b']
+    assert idx.lookup('Smith J') == ['b']
+    assert idx.lookup('li*') == ['a', 'b']
@@ -0,0 +1,85 @@
+import functools, http.server, threading
+
+import pytest
+
+import crawler
+from page_archive import PageArchive
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>t</title><link rel="stylesheet" href="/css/site.css?v=1&amp;x=2" media="screen"></head>
+<body>
+<h1>Styled paper</h1>
+<div class="authors"><a href="/en/persons/jane-smith"><span>Jane Smith</span></a></div>
+<nav class="tabbed-navigation"><a href="#">Overview</a></nav>
+<div class="related"><a href="/en/persons/wei-li"><span>Wei Li</span></a></div>
+<section id="abstract"><div class="textblock">An abstract that is long enough.<span class="note"> Hidden note.</span></div></section>
+</body></html>
+"""
+# Without this sheet the related author sits below the navigation and the note is part of innerText.
+CSS = ".related { position: absolute; top: 0; } .note { display: none; }"
+
+
+def test_inline_stylesheets_resolves_links_and_keeps_media():
+    sheets = {'https://example.org/css/site.css?v=1&x=2': 'h1 { color: red }'}
+    html = crawler.inline_stylesheets(PAGE, 'https://example.org/en/publications/p', sheets)
+    assert '<link rel="stylesheet"' not in html
+    assert ('<style data-archived-href="https://example.org/css/site.css?v=1&amp;x=2" media="screen">'
+            'h1 { color: red }</style>') in html
+    untouched = '<link rel="alternate stylesheet" href="/css/site.css?v=1&x=2"><link rel="icon" href="/i.css">'
+    assert crawler.inline_stylesheets(untouched, 'https://example.org/', sheets) == untouched
+
+
+def test_stylesheets_are_archived_once_per_content(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    assert archive.append_stylesheet('https://example.org/a.css', 'p {}') is not None
+    assert archive.append_stylesheet('https://example.org/a.css', 'p {}') is None
+    assert PageArchive(str(tmp_path)).append_stylesheet('https://example.org/a.css', 'p {}') is None
+    archive.append_stylesheet('https://example.org/a.css', 'p { margin: 0 }')
+    archive.append('https://example.org/p', PAGE, stylesheets=['https://example.org/a.css'])
+    assert [e['url'] for e in archive.entries()] == ['https://example.org/p']
+    assert archive.stylesheets() == {'https://example.org/a.css': 'p { margin: 0 }'}
+
+
+def test_compare_records_reports_changed_fields():
+    live = [{'pub_url': 'u1', 'title': 'A', 'authors': []}, {'pub_url': 'u2', 'title': 'B', 'authors': []}]
+    replayed = [{'pub_url': 'u1', 'title': 'A', 'authors': []}, {'pub_url': 'u2', 'title': 'B', 'authors': [1]},
+                {'pub_url': 'u3', 'title': 'C', 'authors': []}]
+    assert crawler.compare_records(live, replayed) == ['u2: authors differ']
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'site.css').write_text(CSS)
+    (tmp_path / 'paper.html').write_text(PAGE)
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/paper.html'
+    server.shutdown()
+
+
+def test_replay_matches_live_extraction(site, tmp_path):
+    pytest.importorskip('selenium')
+    try:
+        live_pool = crawler.BrowserPool(1, block_resources=True)
+        live_pool.release(live_pool.acquire())
+    except Exception as e:  # no Chrome / chromedriver here
+        pytest.skip(f'no browser: {e}')
+    archive = PageArchive(str(tmp_path / 'archive'))
+    replay_pool = crawler.BrowserPool(1, offline=True)
+    try:
+        with live_pool.session() as web_driver:
+            crawler.load_publication_page(web_driver, site)
+            live = crawler.extract_loaded_publication(web_driver, site, '', archive)
+        entry = archive.entries()[0]
+        assert entry['stylesheets'] and not entry['stylesheets_unreadable']
+        replayed = crawler.replay_archived_page(archive, entry, replay_pool, archive.stylesheets())
+        unstyled = crawler.replay_archived_page(archive, entry, replay_pool)
+    finally:
+        live_pool.close()
+        replay_pool.close()
+    assert [a['name'] for a in live['authors']] == ['Jane Smith', 'Wei Li']
+    assert 'Hidden note' not in live['abstract']
+    assert replayed == live
+    assert unstyled != live  # the check above depends on the stylesheet
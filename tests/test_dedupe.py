@@ -0,0 +1,59 @@
+import random
+
+from dedupe import NearDuplicates, shingles
+
+
+def _word(rng):
+    return ''.join(rng.choice('bcdfghjklmnpqrstvwxz') + rng.choice('aeiou') for _ in range(3))
+
+
+def _corpus(n_docs=600, n_dupes=40, seed=7):
+    rng = random.Random(seed)
+    vocab = list({_word(rng) for _ in range(3000)})
+    docs = [{'title': f'Paper {i} ' + ' '.join(rng.sample(vocab, 6)),
+             'abstract': ' '.join(rng.choice(vocab) for _ in range(60)), 'year': 2000 + i % 20}
+            for i in range(n_docs)]
+    planted = []
+    for i in rng.sample(range(n_docs), n_dupes):
+        words = docs[i]['abstract'].split()
+        words[rng.randrange(len(words))] = rng.choice(vocab)  # one edited word
+        docs.append({'title': docs[i]['title'].upper() + '.', 'abstract': ' '.join(words), 'year': docs[i]['year']})
+        planted.append({i, len(docs) - 1})
+    return docs, planted, vocab, rng
+
+
+def _jaccard(a, b):
+    a, b = set(shingles(a)), set(shingles(b))
+    return len(a & b) / len(a | b)
+
+
+def test_estimates_track_true_jaccard():
+    docs, _, vocab, rng = _corpus(n_dupes=0)
+    nd = NearDuplicates()
+    pairs = []
+    for k in range(150):
+        a = docs[k]
+        words = a['abstract'].split()
+        keep = rng.randint(0, len(words))  # overlap from none to all
+        b = {'title': a['title'], 'abstract': ' '.join(words[:keep] + [rng.choice(vocab) for _ in words[keep:]])}
+        nd.add(f'a{k}', a)
+        nd.add(f'b{k}', b)
+        pairs.append((2 * k, 2 * k + 1, _jaccard(a, b)))
+    for k in range(150):  # unrelated papers
+        i, j = rng.sample(range(150, len(docs)), 2)
+        nd.add(f'x{k}', docs[i])
+        nd.add(f'y{k}', docs[j])
+        pairs.append((300 + 2 * k, 301 + 2 * k, _jaccard(docs[i], docs[j])))
+    errors = [abs(nd.similarity(i, j) - true) for i, j, true in pairs]
+    assert max(errors) < 0.15
+    assert sum(errors) / len(errors) < 0.05
+
+
+def test_only_planted_duplicates_merge():
+    docs, planted, _, _ = _corpus()
+    nd = NearDuplicates()
+    for i, rec in enumerate(docs):
+        nd.add(str(i), rec)
+    groups, stats = nd.clusters()
+    assert sorted(map(sorted, (set(g) for g in groups))) == sorted(map(sorted, planted))
+    assert stats['duplicates_removed'] == len(planted)
@@ -0,0 +1,29 @@
+import json, time
+
+import pytest
+
+from indexer import build_index
+from loadtest import run_in_process
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('loadtest')
+    with open(tmp / 'publications.jsonl', 'w', encoding='utf-8') as f:
+        for i in range(20):
+            f.write(json.dumps({'title': f'credit risk paper {i}', 'year': 2000 + i, 'pub_url': f'u{i}'}) + '\n')
+    build_index(str(tmp / 'publications.jsonl'), str(tmp / 'index.json'), str(tmp / 'postings.json'))
+    return str(tmp / 'index.json'), str(tmp / 'postings.json')
+
+
+def test_run_in_process(index):
+    records, wall = run_in_process(*index, ['credit', 'risk paper', 'NOT risk'], 2, None, {'topk': 5})
+    assert len(records) == 3 and wall >= 0
+    assert sum(err is not None for _, _, err in records) == 1  # the exclude-only query is counted as an error
+
+
+def test_worker_that_cannot_load_aborts_the_run(index, tmp_path):
+    t0 = time.perf_counter()
+    with pytest.raises(RuntimeError, match='failed to load the index: FileNotFoundError'):
+        run_in_process(str(tmp_path / 'missing.json'), index[1], ['credit'] * 4, 2, None, {}, load_timeout=60)
+    assert time.perf_counter() - t0 < 30
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from pipeline import prune_versions, read_manifest, rollback, run_pipeline
+
+
+def _write_crawl(data_dir, n=12):
+    with open(data_dir / 'publications.jsonl', 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write(json.dumps({'title': f'Paper {i} on credit risk and bank lending {i * 7}', 'year': 2010 + i,
+                                'abstract': f'Study {i} of monetary policy, inflation and growth number {i}.',
+                                'authors': [{'name': f'Author {i}'}], 'pub_url': f'http://x/{i}'}) + '\n')
+
+
+def test_unchanged_crawl_is_skipped_only_with_same_build_options(tmp_path):
+    _write_crawl(tmp_path)
+    first = run_pipeline(str(tmp_path), skip_crawl=True)
+    assert first['status'] == 'published'
+    assert run_pipeline(str(tmp_path), skip_crawl=True)['status'] == 'unchanged'
+
+    second = run_pipeline(str(tmp_path), skip_crawl=True, dedupe=True, num_shards=2)
+    assert second['status'] == 'published' and second['version'] != first['version']
+    entry = next(v for v in read_manifest(str(tmp_path))['versions'] if v['version'] == second['version'])
+    assert entry['build_options'] == {'classify': False, 'semantic_dims': 0, 'dedupe': True, 'num_shards': 2}
+    assert (tmp_path / 'index_versions' / second['version'] / 'shards' / 'shards.json').exists()
+    assert run_pipeline(str(tmp_path), skip_crawl=True, dedupe=True, num_shards=2)['status'] == 'unchanged'
+
+
+def test_prune_keeps_newest_versions_and_rejects_zero(tmp_path):
+    _write_crawl(tmp_path)
+    versions = [run_pipeline(str(tmp_path), skip_crawl=True, force=True, keep=10)['version'] for _ in range(3)]
+    with pytest.raises(ValueError):
+        prune_versions(str(tmp_path), keep=0)
+    with pytest.raises(ValueError):
+        run_pipeline(str(tmp_path), skip_crawl=True, force=True, keep=0)
+    assert [v['version'] for v in read_manifest(str(tmp_path))['versions']] == versions
+
+    prune_versions(str(tmp_path), keep=1)
+    assert [v['version'] for v in read_manifest(str(tmp_path))['versions']] == versions[-1:]
+    assert sorted(p.name for p in (tmp_path / 'index_versions').iterdir()) == versions[-1:]
+
+
+def test_fewer_versions_than_keep_are_all_kept(tmp_path):
+    _write_crawl(tmp_path)
+    versions = [run_pipeline(str(tmp_path), skip_crawl=True, force=True, keep=3)['version'] for _ in range(2)]
+    assert [v['version'] for v in read_manifest(str(tmp_path))['versions']] == versions
+    assert {p.name for p in (tmp_path / 'index_versions').iterdir()} == set(versions)
+    assert rollback(str(tmp_path)) == versions[0]
@@ -0,0 +1,16 @@
+import io
+
+from search_cli import read_queries
+
+
+def test_read_queries_skips_malformed_jsonl(capsys):
+    src = io.StringIO('# comment\nclimate risk\n\n{"query": "flood"\n{"query": "drought"}\n{"query": 5}\nexit\n')
+    assert list(read_queries(src)) == ['climate risk', 'drought', 'exit']
+    err = capsys.readouterr().err.splitlines()
+    assert [e.split(':')[0] for e in err] == ['line 4', 'line 6']
+
+
+def test_read_queries_counts_skipped_lines_and_accepts_q(capsys):
+    skipped = []
+    assert list(read_queries(io.StringIO('{"q": "flood"}\n{bad\n{"query": ""}\n'), skipped)) == ['flood']
+    assert skipped == [2]
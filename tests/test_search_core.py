@@ -0,0 +1,46 @@
+import pytest
+
+from search_core import parse_boolean, rank, validate_query
+
+DOCS = {
+    'a': {'title': 'Flood risk and insurance', 'year': 2020, 'authors': [{'name': 'Wei Li'}]},
+    'b': {'title': 'Drought risk in farming', 'year': 2019, 'authors': [{'name': 'Jane Smith'}]},
+    'c': {'title': 'Climate policy', 'year': 2021, 'authors': [{'name': 'Wei Li'}]},
+}
+POSTINGS = {'flood': [('a', 1)], 'risk': [('a', 1), ('b', 1)], 'insur': [('a', 1)], 'drought': [('b', 1)],
+            'farm': [('b', 1)], 'climat': [('c', 1)], 'polici': [('c', 1)]}
+
+
+@pytest.fixture
+def meta():
+    return {'docs': {k: dict(v) for k, v in DOCS.items()}, 'idf': {t: 1.0 for t in POSTINGS}}
+
+
+@pytest.mark.parametrize('query', ['flood risk', '(flood risk)', 'flood (risk)', 'risk-based pricing', 'x - y'])
+def test_plain_queries_stay_disjunctive(query):
+    assert parse_boolean(query) is None
+
+
+@pytest.mark.parametrize('query', ['flood AND risk', 'flood OR risk', 'risk NOT flood', '+risk flood',
+                                   'risk -flood', '(+flood risk)', '(flood OR drought) AND risk'])
+def test_operators_switch_to_boolean(query):
+    assert parse_boolean(query) is not None
+
+
+def test_parentheses_alone_rank_like_plain_text(meta):
+    assert rank(meta, POSTINGS, '(flood drought)') == rank(meta, POSTINGS, 'flood drought')
+    assert [r['doc_id'] for r in rank(meta, POSTINGS, '(flood OR drought) AND risk')] == ['a', 'b']
+
+
+@pytest.mark.parametrize('query', ['NOT flood', '-flood', '-flood -drought', '(NOT flood)'])
+def test_negative_only_query_is_rejected(meta, query):
+    with pytest.raises(ValueError, match='only excludes'):
+        validate_query(query)
+    with pytest.raises(ValueError, match='only excludes'):
+        rank(meta, POSTINGS, query)
+
+
+def test_negative_clauses_with_a_positive_part(meta):
+    assert [r['doc_id'] for r in rank(meta, POSTINGS, 'risk NOT flood')] == ['b']
+    assert [r['doc_id'] for r in rank(meta, POSTINGS, 'author:Li -flood')] == ['c']
+    validate_query('author:Li NOT flood')
@@ -0,0 +1,45 @@
+import json, random
+
+import pytest
+
+from indexer import build_index
+from shards import ShardCoordinator, shards_dir_for, verify
+
+WORDS = ('bank credit risk lending capital market equity bond yield inflation monetary policy growth firm '
+         'governance board audit earnings disclosure tax pension fund volatility liquidity crisis default').split()
+SURNAMES = ['Smith', 'Li', 'Ng', 'Okafor', 'Schmidt', 'Garcia', 'Patel', 'Wu']
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    """A small generated index split into 3 shards; repeated titles give score ties across shards."""
+    tmp = tmp_path_factory.mktemp('shards')
+    rng = random.Random(7)
+    with open(tmp / 'publications.jsonl', 'w', encoding='utf-8') as f:
+        for i in range(240):
+            title = ' '.join(rng.sample(WORDS, 4)) if i % 5 else 'credit risk and bank lending'
+            f.write(json.dumps({
+                'title': title, 'year': 2005 + i % 18,
+                'abstract': ' '.join(rng.choice(WORDS) for _ in range(30)),
+                'authors': [{'name': f'{rng.choice("ABCDJ")}. {s}'} for s in rng.sample(SURNAMES, 2)],
+                'pub_url': f'http://example.org/{i}'}) + '\n')
+    index_path, postings_path = str(tmp / 'index.json'), str(tmp / 'postings.json')
+    build_index(str(tmp / 'publications.jsonl'), index_path, postings_path, num_shards=3)
+    return index_path, postings_path
+
+
+def test_sharded_matches_unsharded(index):
+    index_path, postings_path = index
+    assert verify(index_path, postings_path, shards_dir_for(index_path), n_queries=60, processes=False) == 0
+
+
+def test_worker_processes_match_in_process(index):
+    index_path, _ = index
+    shard_dir = shards_dir_for(index_path)
+    kw = {'topk': 15, 'year_from': 2010, 'with_facets': True}
+    with ShardCoordinator(shard_dir, processes=False) as local:
+        assert local.manifest['classified'] is False  # shards.py rejects --category on it
+        want = [local.rank(q, **kw) for q in ('credit risk', 'author:Li', 'bank NOT lending')]
+    with ShardCoordinator(shard_dir, processes=True) as workers:
+        got = [workers.rank(q, **kw) for q in ('credit risk', 'author:Li', 'bank NOT lending')]
+    assert got == want and want[0][0]
@@ -0,0 +1,39 @@
+import json, os, subprocess, sys
+
+from indexer import build_index
+from search_core import load_index
+from shared_index import SHM_PREFIX, pack, publish
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The views are kept by a module that is torn down after shared_index (json was imported first), so
+# without the exit handler SharedMemory.__del__ tries to close the block while they still export it.
+CHILD = """
+import json, sys
+from shared_index import load
+json.views = meta, postings = load(sys.argv[1])
+print(meta['num_docs'], len(postings['credit']))
+"""
+
+
+def _pack(tmp_path):
+    with open(tmp_path / 'publications.jsonl', 'w', encoding='utf-8') as f:
+        for i in range(30):
+            f.write(json.dumps({'title': f'credit risk paper {i}', 'year': 2000 + i % 10, 'pub_url': f'u{i}',
+                                'authors': [{'name': 'Jane Smith'}]}) + '\n')
+    index_path, postings_path = str(tmp_path / 'index.json'), str(tmp_path / 'postings.json')
+    build_index(str(tmp_path / 'publications.jsonl'), index_path, postings_path)
+    pack(*load_index(index_path, postings_path), str(tmp_path / 'index.pack'))
+    return str(tmp_path / 'index.pack')
+
+
+def test_shared_memory_reader_exits_cleanly(tmp_path):
+    pack_file = _pack(tmp_path)
+    shm = publish(pack_file)
+    try:
+        child = subprocess.run([sys.executable, '-c', CHILD, SHM_PREFIX + shm.name], cwd=ROOT,
+                               capture_output=True, text=True, timeout=60)
+    finally:
+        shm.close()
+        shm.unlink()
+    assert child.returncode == 0 and child.stdout.split() == ['30', '30']
+    assert 'BufferError' not in child.stderr, child.stderr